@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark script - Compare per-call and batch Gregorian to Lunar conversion
+"""
+
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'calendar_app'))
+
+import datetime
+import random
+import time
+import lunar_calendar
+from lunar_calendar import solar_to_lunar, solar_to_lunar_many, solar_to_lunar_range
+
+COUNT = 1000000
+
+
+def timed(label, func):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<40} {elapsed * 1000:10.1f} ms  {COUNT / elapsed:14,.0f} dates/sec")
+    return elapsed
+
+
+def main():
+    random.seed(0)
+    first = datetime.date(1900, 1, 1).toordinal()
+    last = datetime.date(2100, 12, 31).toordinal()
+    dates = [datetime.date.fromordinal(random.randint(first, last)) for _ in range(COUNT)]
+    # Warm up the lookup table so it is not counted
+    solar_to_lunar(2026, 1, 1)
+
+    numpy = lunar_calendar._load_numpy()
+    backend = "numpy" if numpy is not None else "array.array"
+    print(f"Converting {COUNT:,} dates (batch backend: {backend})")
+    print("=" * 80)
+
+    per_call = timed("solar_to_lunar per call",
+                     lambda: [solar_to_lunar(d.year, d.month, d.day) for d in dates])
+    many = timed("solar_to_lunar_many (datetime.date list)",
+                 lambda: solar_to_lunar_many(dates))
+    if numpy is not None:
+        as_datetime64 = numpy.array(dates, dtype='datetime64[D]')
+        timed("solar_to_lunar_many (datetime64 array)",
+              lambda: solar_to_lunar_many(as_datetime64))
+
+    # A contiguous range of the same size wraps the 1900-2100 table
+    start = datetime.date(1900, 1, 1)
+    end = datetime.date(2100, 12, 31)
+    span = (end - start).days + 1
+    repeats = COUNT // span + 1
+    timed(f"solar_to_lunar_range (1900-2100 x{repeats})",
+          lambda: [solar_to_lunar_range(start, end) for _ in range(repeats)])
+
+    print("=" * 80)
+    print(f"Batch speedup over per-call: {per_call / many:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark script - Compare the default and columnar month payloads by size and serialization time
+"""
+
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'calendar_app'))
+
+import argparse
+import gzip
+import statistics
+import time
+import app
+from month_grid import build_month_grid
+
+# (label, grid -> dict, dict -> bytes) as served by /api/calendar/<year>/<month>
+FORMATS = (
+    ('json', app.month_payload, lambda data: app.serialize_payload(data)[0]),
+    # Includes the gzip compression done when the payload is cached
+    ('columnar', app.columnar_month_payload, lambda data: app.serialize_compact_payload(data)[0]),
+)
+
+
+def measure(grids, to_dict, serialize):
+    """(mean bytes, mean gzip bytes, mean microseconds to build and serialize a month)"""
+    start = time.perf_counter()
+    bodies = [serialize(to_dict(grid)) for grid in grids]
+    elapsed = time.perf_counter() - start
+    return (statistics.mean(len(body) for body in bodies),
+            statistics.mean(len(gzip.compress(body, compresslevel=app.GZIP_LEVEL, mtime=0)) for body in bodies),
+            elapsed / len(grids) * 1e6)
+
+
+def main(argv=None):
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Compare month payload formats")
+    parser.add_argument('--from', dest='first_year', type=int, default=2000)
+    parser.add_argument('--to', dest='last_year', type=int, default=2030)
+    args = parser.parse_args(argv)
+
+    # Grids are built up front so only the payload encoding is timed
+    grids = [build_month_grid(year, month)
+             for year in range(args.first_year, args.last_year + 1) for month in range(1, 13)]
+    print(f"Month payloads for {args.first_year}-{args.last_year} ({len(grids)} months)")
+    print("=" * 64)
+    print(f"{'format':<10} {'bytes':>10} {'gzip bytes':>12} {'serialize (us)':>16}")
+    results = {}
+    for label, to_dict, serialize in FORMATS:
+        size, gzipped, micros = results[label] = measure(grids, to_dict, serialize)
+        print(f"{label:<10} {size:>10,.0f} {gzipped:>12,.0f} {micros:>16.1f}")
+    print("=" * 64)
+    json_size, _, json_micros = results['json']
+    columnar_size, columnar_gzipped, columnar_micros = results['columnar']
+    print(f"Columnar: {json_size / columnar_size:.1f}x smaller ({json_size / columnar_gzipped:.1f}x with gzip), "
+          f"{json_micros / columnar_micros:.1f}x faster to serialize")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
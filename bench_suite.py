@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark suite - Time the conversion, holiday and API hot paths
+
+Each case reports ops/sec and p50/p99 latency per operation. Results can be
+saved as JSON and are compared against bench_baseline.json, so a slowdown
+in any hot path makes the run fail.
+
+The baseline holds absolute ops/sec of the machine it was recorded on, so it
+is only compared on the same host, architecture and Python version; anywhere
+else the comparison is skipped with a warning. Record a local baseline first
+(on CI, record it on the runner before the change under test).
+
+    python bench_suite.py                    # run and compare to the baseline
+    python bench_suite.py -o results.json    # also save the results
+    python bench_suite.py --save-baseline    # record a new baseline
+    python bench_suite.py --only CASE --save-baseline   # add or update one case
+"""
+
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'calendar_app'))
+
+import argparse
+import datetime
+import json
+import platform
+import random
+import time
+from collections import namedtuple
+import app
+import month_grid
+import recurrence
+from lunar_calendar import solar_to_lunar, lunar_to_solar, format_lunar
+from holidays import get_holiday_mark, get_lunar_holiday
+from holiday_index import next_holiday
+from month_grid import build_month_grid
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bench_baseline.json')
+# Fail when a case runs at less than (1 - tolerance) of its baseline ops/sec
+DEFAULT_TOLERANCE = 0.3
+# Run details that must match the baseline's for ops/sec to be comparable
+ENVIRONMENT_FIELDS = ('host', 'machine', 'python')
+# Seconds spent timing each case
+DEFAULT_DURATION = 1.0
+# Fewest timed batches per case, so percentiles stay meaningful
+MIN_ROUNDS = 20
+INPUT_COUNT = 10000
+# Dates per /api/convert request in the bulk case
+CONVERT_BATCH = 1000
+# Lunar years expanded per monthly recurrence (about 12.4 occurrences a year)
+RECURRENCE_YEARS = 80
+
+# A benchmark case: func is called with each input tuple, batch inputs per
+# timed round (fast operations are batched to keep timer overhead out)
+Case = namedtuple('Case', ['name', 'func', 'inputs', 'batch'])
+
+
+def _random_dates(count):
+    first = datetime.date(1900, 1, 1).toordinal()
+    last = datetime.date(2100, 12, 31).toordinal()
+    return [datetime.date.fromordinal(random.randint(first, last)) for _ in range(count)]
+
+
+def build_cases():
+    """Create the benchmark cases with fixed random inputs"""
+    random.seed(0)
+    dates = _random_dates(INPUT_COUNT)
+    solar = [(d.year, d.month, d.day) for d in dates]
+    lunar = [solar_to_lunar(*d) for d in solar]
+    client = app.app.test_client()
+    months = [(d.year, d.month) for d in dates[:500]]
+    years = [(y,) for y in random.sample(range(1900, 2101), 50)]
+
+    convert_bodies = [(json.dumps([d.isoformat() for d in dates[i:i + CONVERT_BATCH]]),)
+                      for i in range(0, len(dates), CONVERT_BATCH)]
+
+    def post_convert(body):
+        response = client.post('/api/convert', data=body, content_type='application/json')
+        if response.status_code != 200:
+            raise RuntimeError(f"/api/convert returned {response.status_code}")
+
+    def get_calendar(year, month):
+        # Without this every repeat after the first would be a cache hit
+        app.get_month_payload.cache_clear()
+        month_grid._cached_month_grid.cache_clear()
+        response = client.get(f'/api/calendar/{year}/{month}')
+        if response.status_code != 200:
+            raise RuntimeError(f"/api/calendar/{year}/{month} returned {response.status_code}")
+
+    recurrence_ranges = [(d, d.replace(month=1, day=1, year=d.year + RECURRENCE_YEARS) - datetime.timedelta(days=1))
+                         for d in dates[:200] if d.year + RECURRENCE_YEARS <= 2100]
+
+    return [
+        Case('solar_to_lunar', solar_to_lunar, solar, 100),
+        Case('lunar_to_solar', lunar_to_solar, [(l.year, l.month, l.day, l.isleap) for l in lunar], 100),
+        Case('format_lunar', format_lunar, [(l.year, l.month, l.day, l.isleap) for l in lunar], 100),
+        Case('get_lunar_holiday', get_lunar_holiday, [(l.month, l.day, l.isleap, l.month_days) for l in lunar], 100),
+        Case('get_holiday_mark', get_holiday_mark,
+             [(s[1], s[2], l.month, l.day, s[0], l.isleap, l.month_days) for s, l in zip(solar, lunar)], 100),
+        Case('next_holiday', next_holiday, [(d,) for d in dates], 100),
+        # One op builds, serializes and serves a month that is not cached
+        Case('api_calendar_month', get_calendar, months, 1),
+        # One op is a request of CONVERT_BATCH dates
+        Case('api_convert_bulk', post_convert, convert_bodies, 1),
+        # One op expands about a thousand occurrences
+        Case('recurrence_monthly', lambda first, last: recurrence.expand_columns('monthly', first, last, day=1),
+             recurrence_ranges, 1),
+        Case('build_month_grid', build_month_grid, months, 10),
+        Case('build_year_grids', lambda year: app.build_months(year, 1, year, 12), years, 1),
+    ]
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def run_case(case, duration=DEFAULT_DURATION):
+    """Time a case for about duration seconds
+
+    Returns:
+        {'ops', 'ops_per_sec', 'p50_us', 'p99_us'}
+    """
+    func, inputs, batch = case.func, case.inputs, case.batch
+    # Warm-up pass so lazily built tables and caches are not counted
+    for args in inputs[:batch]:
+        func(*args)
+
+    latencies = []
+    total = 0.0
+    position = 0
+    deadline = time.perf_counter() + duration
+    while len(latencies) < MIN_ROUNDS or time.perf_counter() < deadline:
+        chunk = inputs[position:position + batch]
+        position = (position + batch) % len(inputs)
+        if len(chunk) < batch:
+            chunk += inputs[:batch - len(chunk)]
+        start = time.perf_counter()
+        for args in chunk:
+            func(*args)
+        elapsed = time.perf_counter() - start
+        total += elapsed
+        latencies.append(elapsed / batch)
+
+    ops = len(latencies) * batch
+    return {
+        'ops': ops,
+        'ops_per_sec': ops / total,
+        'p50_us': _percentile(latencies, 0.50) * 1e6,
+        'p99_us': _percentile(latencies, 0.99) * 1e6,
+    }
+
+
+def run_suite(cases, duration=DEFAULT_DURATION, out=sys.stdout):
+    """Run all cases, printing one line each
+
+    Returns:
+        Results document: {'python', 'machine', 'timestamp', 'results': {name: stats}}
+    """
+    results = {}
+    print(f"{'case':<24} {'ops/sec':>14} {'p50 (us)':>10} {'p99 (us)':>10}", file=out)
+    print("=" * 61, file=out)
+    for case in cases:
+        stats = run_case(case, duration)
+        results[case.name] = stats
+        print(f"{case.name:<24} {stats['ops_per_sec']:14,.0f} {stats['p50_us']:10.2f} {stats['p99_us']:10.2f}",
+              file=out)
+    return {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'host': platform.node(),
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+        'results': results,
+    }
+
+
+def environment_mismatch(results, baseline):
+    """(field, baseline value, current value) for every run detail that differs; fields missing on either side are not compared"""
+    return [(field, baseline[field], results[field]) for field in ENVIRONMENT_FIELDS
+            if baseline.get(field) and results.get(field) and baseline[field] != results[field]]
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Compare results with a baseline
+
+    Returns:
+        List of (case name, baseline ops/sec, current ops/sec) for every case
+        slower than the baseline allows; cases missing on either side are skipped
+    """
+    regressions = []
+    for name, stats in results['results'].items():
+        expected = baseline['results'].get(name)
+        if expected and stats['ops_per_sec'] < expected['ops_per_sec'] * (1 - tolerance):
+            regressions.append((name, expected['ops_per_sec'], stats['ops_per_sec']))
+    return regressions
+
+
+def main(argv=None):
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Benchmark the calendar hot paths")
+    parser.add_argument('--duration', type=float, default=DEFAULT_DURATION,
+                        help=f"Seconds per case (default: {DEFAULT_DURATION})")
+    parser.add_argument('--only', nargs='+', metavar='CASE', help="Run only these cases")
+    parser.add_argument('-o', '--output', help="Save the results as JSON")
+    parser.add_argument('--baseline', default=BASELINE_FILE, help="Baseline file to compare against")
+    parser.add_argument('--save-baseline', action='store_true', help="Write the results as the new baseline")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help=f"Allowed slowdown as a fraction of baseline ops/sec (default: {DEFAULT_TOLERANCE})")
+    args = parser.parse_args(argv)
+
+    cases = build_cases()
+    if args.only:
+        unknown = set(args.only) - {case.name for case in cases}
+        if unknown:
+            parser.error(f"Unknown cases: {', '.join(sorted(unknown))}")
+        cases = [case for case in cases if case.name in args.only]
+
+    results = run_suite(cases, args.duration)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+    mismatch = environment_mismatch(results, baseline) if baseline else []
+
+    if args.save_baseline:
+        if args.only and baseline:
+            # Add or update the cases run, keeping the others
+            if mismatch:
+                parser.error("The baseline was recorded elsewhere; save a full baseline instead of --only")
+            results = dict(results, results=dict(baseline['results'], **results['results']))
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nSaved baseline to {args.baseline}")
+        return 0
+
+    if baseline is None:
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline to create one")
+        return 0
+    if mismatch:
+        print(f"\nWARNING: not compared, the baseline was recorded on another setup "
+              f"({', '.join(f'{field} {old} vs {new}' for field, old, new in mismatch)}); "
+              f"record a local one with --save-baseline")
+        return 0
+    missing = [name for name in results['results'] if name not in baseline['results']]
+    if missing:
+        print(f"\nNo baseline for: {', '.join(missing)} (add with --only CASE --save-baseline)")
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"\nREGRESSION: {len(regressions)} case(s) slower than baseline "
+              f"({args.tolerance:.0%} tolerance)")
+        for name, expected, current in regressions:
+            print(f"  {name:<24} {expected:14,.0f} -> {current:14,.0f} ops/sec ({current / expected - 1:+.0%})")
+        return 1
+    print(f"\nAll cases within {args.tolerance:.0%} of the baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
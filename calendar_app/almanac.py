@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Almanac - Sexagenary (ganzhi) year, month and day, zodiac animal and current solar term of each day
+
+The ganzhi year starts at Spring Begins (立春) and the ganzhi months at the
+12 sectional solar terms (节), so these attributes depend on solar term
+boundaries. For 1900-2100 they are precomputed into data/almanac.bin, one
+byte per day and attribute, in zlib-compressed blocks of a decade that are
+loaded on first use (regenerate with `python almanac.py build`). Other
+years in 1600-2400 are computed a year at a time from the solar terms.
+
+The day ganzhi is counted from a fixed day and the zodiac animal follows
+the lunar year, so neither needs a table.
+"""
+
+import argparse
+import datetime
+import os
+import struct
+import sys
+import zlib
+import metrics
+from collections import namedtuple
+from holidays import SOLAR_TERMS_CN
+from lunar_calendar import EXTENDED_FIRST_YEAR, EXTENDED_LAST_YEAR
+from solar_terms import get_solar_terms
+
+DATA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'almanac.bin')
+
+# Years covered by the data file, stored in blocks of DECADE years
+TABLE_FIRST_YEAR = 1900
+TABLE_LAST_YEAR = 2100
+DECADE = 10
+# Years outside the file kept in memory once computed
+COMPUTED_CACHE_SIZE = 16
+
+HEAVENLY_STEMS = '甲乙丙丁戊己庚辛壬癸'
+EARTHLY_BRANCHES = '子丑寅卯辰巳午未申酉戌亥'
+# The 60 ganzhi names, index 0 is 甲子
+GANZHI_NAMES = tuple(HEAVENLY_STEMS[i % 10] + EARTHLY_BRANCHES[i % 12] for i in range(60))
+ZODIAC_ANIMALS = ('Rat', 'Ox', 'Tiger', 'Rabbit', 'Dragon', 'Snake',
+                  'Horse', 'Goat', 'Monkey', 'Rooster', 'Dog', 'Pig')
+
+# Per-day columns of the data file: ganzhi year and month (0-59) and the
+# solar term the day falls in (SOLAR_TERMS_CN index)
+COLUMNS = ('year_ganzhi', 'month_ganzhi', 'solar_term')
+
+# File header: magic, version, first and last year, then per decade the
+# offset and length of its compressed block
+_MAGIC = b'ALMN'
+_VERSION = 1
+_HEADER = struct.Struct('<4sHHH')
+_BLOCK_ENTRY = struct.Struct('<II')
+
+_FIRST_ORDINAL = datetime.date(TABLE_FIRST_YEAR, 1, 1).toordinal()
+_DECADE_COUNT = (TABLE_LAST_YEAR - TABLE_FIRST_YEAR) // DECADE + 1
+# 1900-01-01 was a 甲戌 (index 10) day
+_DAY_GANZHI_OFFSET = 10 - _FIRST_ORDINAL % 60
+# 1984 was a 甲子 year
+_GANZHI_EPOCH_YEAR = 1984
+
+# The day's attributes as display names
+Almanac = namedtuple('Almanac', ['year_ganzhi', 'month_ganzhi', 'day_ganzhi', 'zodiac', 'solar_term'])
+
+# Day ganzhi indices over two cycles, so a month of them is one slice
+_DAY_CYCLE = tuple(range(60)) * 2
+
+# Loaded decade blocks: {decade index: (ordinal of the first day, column bytes)}
+_decades = {}
+_block_index = None
+
+
+def day_ganzhi(ordinal):
+    """Ganzhi index (0-59) of a day given by its ordinal (datetime.date.toordinal())"""
+    return (ordinal + _DAY_GANZHI_OFFSET) % 60
+
+
+def zodiac(lunar_year):
+    """Zodiac animal of a lunar year"""
+    return ZODIAC_ANIMALS[(lunar_year - _GANZHI_EPOCH_YEAR) % 12]
+
+
+def _ganzhi(stem, branch):
+    return (6 * stem - 5 * branch) % 60
+
+
+def compute_columns(first_year, last_year):
+    """
+    Compute the per-day columns for a range of Gregorian years from the solar terms
+
+    Returns:
+        Tuple of bytearray, one per name in COLUMNS, with one item per day
+        from January 1st of first_year to December 31st of last_year
+    """
+    # The terms of the year before give the term periods of early January
+    terms = [(date.toordinal(), SOLAR_TERMS_CN.index(name))
+             for year in range(first_year - 1, last_year + 1) for date, name in get_solar_terms(year)]
+    terms.sort()
+
+    first = datetime.date(first_year, 1, 1).toordinal()
+    last = datetime.date(last_year, 12, 31).toordinal()
+    year_column, month_column, term_column = columns = tuple(bytearray() for _ in COLUMNS)
+    position = -1
+    # The sectional term (even index) starting the current ganzhi month
+    sectional = None
+    for ordinal in range(first, last + 1):
+        while position + 1 < len(terms) and terms[position + 1][0] <= ordinal:
+            position += 1
+            if terms[position][1] % 2 == 0:
+                sectional = terms[position][1]
+        date = datetime.date.fromordinal(ordinal)
+        # Until Spring Begins (early February), in the months of Major Snow
+        # and Minor Cold, the ganzhi year is still that of the year before
+        ganzhi_year = date.year - 1 if date.month <= 2 and sectional >= 20 else date.year
+        year_index = (ganzhi_year - _GANZHI_EPOCH_YEAR) % 60
+        # Months count from the tiger (寅) month starting at Spring Begins
+        month_number = sectional // 2
+        month_stem = (year_index % 5 * 2 + 2 + month_number) % 10
+        year_column.append(year_index)
+        month_column.append(_ganzhi(month_stem, (2 + month_number) % 12))
+        term_column.append(terms[position][1])
+    return columns
+
+
+def build_data_file(path=DATA_FILE):
+    """Compute the columns for 1900-2100 and write them in compressed decade blocks"""
+    blocks = []
+    for decade in range(_DECADE_COUNT):
+        first_year = TABLE_FIRST_YEAR + decade * DECADE
+        columns = compute_columns(first_year, min(first_year + DECADE - 1, TABLE_LAST_YEAR))
+        blocks.append(zlib.compress(b''.join(columns), 9))
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    offset = _HEADER.size + _BLOCK_ENTRY.size * len(blocks)
+    with open(path, 'wb') as f:
+        f.write(_HEADER.pack(_MAGIC, _VERSION, TABLE_FIRST_YEAR, TABLE_LAST_YEAR))
+        for block in blocks:
+            f.write(_BLOCK_ENTRY.pack(offset, len(block)))
+            offset += len(block)
+        for block in blocks:
+            f.write(block)
+    return offset
+
+
+def _read_block_index(f):
+    magic, version, first_year, last_year = _HEADER.unpack(f.read(_HEADER.size))
+    if magic != _MAGIC or version != _VERSION or (first_year, last_year) != (TABLE_FIRST_YEAR, TABLE_LAST_YEAR):
+        raise ValueError(f"{DATA_FILE} is not an almanac file of this version; rebuild it")
+    return [_BLOCK_ENTRY.unpack(f.read(_BLOCK_ENTRY.size)) for _ in range(_DECADE_COUNT)]
+
+
+def _decade(decade):
+    """(ordinal of the first day, column bytes) of a stored decade, read on first use"""
+    global _block_index
+    block = _decades.get(decade)
+    if block is None:
+        with open(DATA_FILE, 'rb') as f:
+            if _block_index is None:
+                _block_index = _read_block_index(f)
+            offset, length = _block_index[decade]
+            f.seek(offset)
+            data = zlib.decompress(f.read(length))
+        first_year = TABLE_FIRST_YEAR + decade * DECADE
+        days = len(data) // len(COLUMNS)
+        block = _decades[decade] = (datetime.date(first_year, 1, 1).toordinal(),
+                                    tuple(data[i * days:(i + 1) * days] for i in range(len(COLUMNS))))
+    return block
+
+
+@metrics.counted_lru_cache(maxsize=COMPUTED_CACHE_SIZE)
+def _computed_year(year):
+    return datetime.date(year, 1, 1).toordinal(), tuple(bytes(column) for column in compute_columns(year, year))
+
+
+def _block(year):
+    if TABLE_FIRST_YEAR <= year <= TABLE_LAST_YEAR:
+        return _decade((year - TABLE_FIRST_YEAR) // DECADE)
+    if EXTENDED_FIRST_YEAR <= year <= EXTENDED_LAST_YEAR:
+        return _computed_year(year)
+    raise ValueError(f"The almanac is only available for {EXTENDED_FIRST_YEAR}-{EXTENDED_LAST_YEAR}")
+
+
+def month_columns(year, month):
+    """
+    Almanac columns of a Gregorian month
+
+    Returns:
+        (year_ganzhi, month_ganzhi, day_ganzhi, solar_term): sequences of
+        indices (into GANZHI_NAMES and SOLAR_TERMS_CN), one per day
+
+    Raises:
+        ValueError: If the month is outside 1600-2400
+    """
+    first_ordinal, columns = _block(year)
+    start = datetime.date(year, month, 1).toordinal()
+    end = (datetime.date(year + 1, 1, 1) if month == 12 else datetime.date(year, month + 1, 1)).toordinal()
+    year_column, month_column, term_column = (column[start - first_ordinal:end - first_ordinal]
+                                              for column in columns)
+    first_day = day_ganzhi(start)
+    return year_column, month_column, _DAY_CYCLE[first_day:first_day + end - start], term_column
+
+
+def get_almanac(year, month, day, lunar_year):
+    """
+    Almanac of a day
+
+    Args:
+        year, month, day: Gregorian date (1600-2400)
+        lunar_year: Lunar year of the date, for the zodiac animal
+
+    Returns:
+        Almanac of display names
+
+    Raises:
+        ValueError: If the date is outside 1600-2400
+    """
+    first_ordinal, (year_column, month_column, term_column) = _block(year)
+    ordinal = datetime.date(year, month, day).toordinal()
+    offset = ordinal - first_ordinal
+    return Almanac(GANZHI_NAMES[year_column[offset]], GANZHI_NAMES[month_column[offset]],
+                   GANZHI_NAMES[day_ganzhi(ordinal)], zodiac(lunar_year), SOLAR_TERMS_CN[term_column[offset]])
+
+
+def main(argv=None):
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Almanac data tools")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    build = subparsers.add_parser('build', help="Regenerate the precomputed almanac file (1900-2100)")
+    build.add_argument('-o', '--output', default=DATA_FILE)
+    show = subparsers.add_parser('show', help="Print the almanac of a date")
+    show.add_argument('date', type=datetime.date.fromisoformat, help="Date, YYYY-MM-DD")
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        size = build_data_file(args.output)
+        print(f"Wrote {size:,} bytes to {args.output}")
+        return 0
+
+    from lunar_calendar import solar_to_lunar
+    date = args.date
+    lunar = solar_to_lunar(date.year, date.month, date.day)
+    if lunar is None:
+        parser.error(f"The almanac is only available for {EXTENDED_FIRST_YEAR}-{EXTENDED_LAST_YEAR}")
+    almanac = get_almanac(date.year, date.month, date.day, lunar.year)
+    print(f"{date}: {almanac.year_ganzhi}年 {almanac.month_ganzhi}月 {almanac.day_ganzhi}日, "
+          f"year of the {almanac.zodiac}, solar term {almanac.solar_term}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
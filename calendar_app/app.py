@@ -4,70 +4,386 @@
 Web Calendar Application - Flask Server
 """
 
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, stream_with_context, url_for, g
+import argparse
 import datetime
-import calendar as cal
-from lunar_calendar import solar_to_lunar, format_lunar
+import json
+import gzip
+import hashlib
+import hmac
+import os
+import time
+import almanac
+import astro_calendar
+import bulk_convert
+import client_table
+import export
+import festival_calendar
+import holiday_reload
+import holidays
+import ics_feed
+import metrics
+import profiling
+import recurrence
+import shared_tables
+import solar_terms
+import workdays
+from lunar_calendar import solar_to_lunar, format_lunar, EXTENDED_FIRST_YEAR, EXTENDED_LAST_YEAR
+import month_grid
+from month_grid import build_month_grid, WEEKDAY_NAMES
 from holidays import get_gregorian_holiday, get_lunar_holiday
+from solar_terms import get_solar_term
 
 app = Flask(__name__)
 
 
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+
+@app.after_request
+def record_request_metrics(response):
+    """Count the request and record its latency under its route pattern"""
+    start = g.pop('request_start', None)
+    if start is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        metrics.observe_request(route, request.method, response.status_code, time.perf_counter() - start)
+    return response
+
+# Payload caches: enough entries to hold every month and year in 1900-2100
+TABLE_YEARS = 201
+MONTH_CACHE_SIZE = TABLE_YEARS * 12
+# How long browsers and CDNs may reuse a month response before revalidating
+MONTH_CACHE_MAX_AGE = 3600
+# Largest number of months a single range request may ask for
+MAX_RANGE_MONTHS = 36
+# Versioned client table URLs never change content, so browsers may keep them for a year
+TABLE_CACHE_MAX_AGE = 365 * 24 * 3600
+# Values of ?format= on the month and year endpoints
+PAYLOAD_FORMATS = ('json', 'columnar')
+# Compression level of the precompressed columnar payloads
+GZIP_LEVEL = 9
+# Years per /api/festivals request
+MAX_FESTIVAL_YEARS = 201
+FESTIVAL_CACHE_SIZE = 256
+# Years per /api/recurrence request
+MAX_RECURRENCE_YEARS = 201
+RECURRENCE_CACHE_SIZE = 1024
+# Environment variable holding the token of the admin endpoints (sent as
+# "Authorization: Bearer <token>"); they are disabled while it is unset
+ADMIN_TOKEN_ENV = 'CALENDAR_ADMIN_TOKEN'
+
+
 @app.route('/')
 def index():
     """Home page - Display calendar for current month"""
     today = datetime.date.today()
     return render_template('index.html', 
                           year=today.year, 
-                          month=today.month)
+                          month=today.month,
+                          table_url=url_for('get_table_version', version=table_version()))
+
+
+def month_payload(grid):
+    """JSON-ready dict of a MonthGrid, with weeks padded to 7 cells"""
+    return {
+        'year': grid.year,
+        'month': grid.month,
+        'days': [[None if day is None else {
+            'day': day.day,
+            'weekday': WEEKDAY_NAMES[day.weekday],
+            'lunar': day.lunar,
+            'lunar_year': day.lunar_year,
+            'lunar_month': day.lunar_month,
+            'lunar_day': day.lunar_day,
+            'lunar_leap': day.lunar_leap,
+            'greg_holiday': day.greg_holiday,
+            'lunar_holiday': day.lunar_holiday,
+            'solar_term': day.solar_term,
+            'lunar_month_days': day.lunar_month_days,
+            'year_ganzhi': day.year_ganzhi,
+            'month_ganzhi': day.month_ganzhi,
+            'day_ganzhi': day.day_ganzhi,
+            'zodiac': day.zodiac,
+            'current_term': day.current_term
+        } for day in week] for week in grid.weeks()]
+    }
+
+
+def columnar_month_payload(grid):
+    """
+    Compact JSON-ready dict of a MonthGrid: parallel per-day arrays instead of weeks of day dicts
+
+    Lunar labels, holidays, solar terms and almanac names are stored once in
+    'strings' and referenced by index (0 is the empty string). lunar_year is the lunar
+    year of the 1st; it goes up by one on the first day of lunar month 1.
+    Decoded by static/month_columns.js.
+    """
+    strings = {'': 0}
+
+    def refs(values):
+        return [strings.setdefault(value, len(strings)) for value in values]
+
+    days = grid.days
+    return {
+        'format': 'columnar',
+        'year': grid.year,
+        'month': grid.month,
+        'first_weekday': grid.first_weekday,
+        'lunar_year': days[0].lunar_year,
+        'lunar_month': [day.lunar_month for day in days],
+        'lunar_day': [day.lunar_day for day in days],
+        'lunar_leap': [int(day.lunar_leap) for day in days],
+        'lunar': refs(day.lunar for day in days),
+        'greg_holiday': refs(day.greg_holiday for day in days),
+        'lunar_holiday': refs(day.lunar_holiday for day in days),
+        'solar_term': refs(day.solar_term for day in days),
+        'lunar_month_days': [day.lunar_month_days for day in days],
+        'year_ganzhi': refs(day.year_ganzhi for day in days),
+        'month_ganzhi': refs(day.month_ganzhi for day in days),
+        'day_ganzhi': refs(day.day_ganzhi for day in days),
+        'zodiac': refs(day.zodiac for day in days),
+        'current_term': refs(day.current_term for day in days),
+        'strings': list(strings),
+    }
+
+
+def build_months(first_year, first_month, last_year, last_month):
+    """Build calendar grids for every month from first to last (inclusive)
+
+    Grids do not depend on the current date, so they can be cached; clients
+    mark today themselves.
+    """
+    months = []
+    year, month = first_year, first_month
+    while (year, month) <= (last_year, last_month):
+        months.append(month_payload(build_month_grid(year, month)))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+def build_month(year, month):
+    """Build the calendar grid for a month"""
+    return build_months(year, month, year, month)[0]
+
+
+def serialize_payload(data):
+    """Serialize a payload to JSON bytes and compute its ETag"""
+    body = app.json.dumps(data).encode('utf-8')
+    return body, hashlib.sha1(body).hexdigest()
+
+
+def serialize_compact_payload(data):
+    """Serialize a payload to JSON bytes without whitespace
+
+    Returns:
+        (body, ETag, gzip-compressed body)
+    """
+    body = app.json.dumps(data, separators=(',', ':')).encode('utf-8')
+    return body, hashlib.sha1(body).hexdigest(), gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+@metrics.counted_lru_cache(maxsize=MONTH_CACHE_SIZE)
+def get_month_payload(year, month, holiday_version):
+    """Serialized month JSON and its ETag, cached per holiday data version"""
+    with metrics.stage('month_grid'):
+        data = build_month(year, month)
+    with metrics.stage('serialize'):
+        return serialize_payload(data)
+
+
+@metrics.counted_lru_cache(maxsize=TABLE_YEARS)
+def get_year_payload(year, holiday_version):
+    """Serialized year JSON and its ETag, cached per holiday data version"""
+    with metrics.stage('month_grid'):
+        months = build_months(year, 1, year, 12)
+    with metrics.stage('serialize'):
+        return serialize_payload({
+            'year': year,
+            'months': months
+        })
+
+
+@metrics.counted_lru_cache(maxsize=MONTH_CACHE_SIZE)
+def get_columnar_month_payload(year, month, holiday_version):
+    """Serialized columnar month, its ETag and its gzip encoding, cached per holiday data version"""
+    with metrics.stage('month_grid'):
+        data = columnar_month_payload(build_month_grid(year, month))
+    with metrics.stage('serialize'):
+        return serialize_compact_payload(data)
+
+
+@metrics.counted_lru_cache(maxsize=TABLE_YEARS)
+def get_columnar_year_payload(year, holiday_version):
+    """Serialized columnar year, its ETag and its gzip encoding, cached per holiday data version"""
+    with metrics.stage('month_grid'):
+        months = [columnar_month_payload(build_month_grid(year, month)) for month in range(1, 13)]
+    with metrics.stage('serialize'):
+        return serialize_compact_payload({
+            'year': year,
+            'format': 'columnar',
+            'months': months
+        })
+
+
+def festival_entry(day):
+    """JSON form of a festival_calendar.FestivalDay"""
+    festival = day.festival
+    return {
+        'date': day.date.isoformat(),
+        'key': festival.key,
+        'kind': festival.kind,
+        'name': festival.en,
+        'zh_hans': festival.zh_hans[0],
+        'zh_hant': festival.zh_hant[0],
+    }
+
+
+@metrics.counted_lru_cache(maxsize=FESTIVAL_CACHE_SIZE)
+def get_festivals_payload(first_year, last_year, name, kind):
+    """Serialized festival list and its ETag, for a range of years and an optional name search or kind"""
+    with metrics.stage('festivals'):
+        if name:
+            days = festival_calendar.find(name, first_year, last_year)
+            if kind:
+                days = [day for day in days if day.festival.kind == kind]
+        else:
+            days = festival_calendar.festivals_between(first_year, last_year, kind or None)
+    with metrics.stage('serialize'):
+        return serialize_payload({'festivals': [festival_entry(day) for day in days]})
+
+
+@metrics.counted_lru_cache(maxsize=RECURRENCE_CACHE_SIZE)
+def get_recurrence_payload(rule, first, last, month, day, missing, leap):
+    """Serialized occurrences of a lunar rule and their ETag"""
+    with metrics.stage('recurrence'):
+        columns = recurrence.expand_columns(rule, first, last, month, day, missing, leap)
+    with metrics.stage('serialize'):
+        fromordinal = datetime.date.fromordinal
+        return serialize_payload({'occurrences': [{
+            'date': fromordinal(ordinal).isoformat(),
+            'lunar_year': lunar_year,
+            'lunar_month': lunar_month,
+            'lunar_day': lunar_day,
+            'lunar_leap': isleap,
+        } for ordinal, lunar_year, lunar_month, lunar_day, isleap in zip(*columns)]})
+
+
+@metrics.counted_lru_cache(maxsize=1)
+def get_table_payload(holiday_version):
+    """Serialized client table and its ETag, cached per holiday data version"""
+    return serialize_payload(client_table.build_client_table())
+
+
+def table_version():
+    """Version of the current client table (its ETag, shortened)"""
+    return get_table_payload(holidays.HOLIDAY_DATA_VERSION)[1][:12]
+
+
+def warm_month_cache(first_year=1900, last_year=2100):
+    """Precompute month payloads for a range of years"""
+    for year in range(first_year, last_year + 1):
+        for month in range(1, 13):
+            get_month_payload(year, month, holidays.HOLIDAY_DATA_VERSION)
+
+
+def cached_json_response(body, etag, gzipped=None):
+    """JSON response that browsers and CDNs may cache and revalidate
+
+    gzipped is the body compressed in advance, sent instead to clients that
+    accept gzip (with its own ETag, since the bytes differ).
+    """
+    use_gzip = gzipped is not None and request.accept_encodings['gzip'] > 0
+    response = app.response_class(gzipped if use_gzip else body, mimetype='application/json')
+    if gzipped is not None:
+        response.vary.add('Accept-Encoding')
+    if use_gzip:
+        response.content_encoding = 'gzip'
+        etag += '-gzip'
+    # No Last-Modified: the data file's time does not change when a deploy
+    # changes the body, while the ETag (a digest of the body) does
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = MONTH_CACHE_MAX_AGE
+    return response.make_conditional(request)
+
+
+def parse_year_month(text):
+    """Parse a 'YYYY-MM' string, returning (year, month) or None"""
+    try:
+        year, month = (int(part) for part in text.split('-'))
+    except (AttributeError, ValueError):
+        return None
+    if month < 1 or month > 12 or year < EXTENDED_FIRST_YEAR or year > EXTENDED_LAST_YEAR:
+        return None
+    return year, month
 
 
 @app.route('/api/calendar/<int:year>/<int:month>')
 def get_calendar(year, month):
-    """Get calendar data for specified month"""
-    if month < 1 or month > 12 or year < 1900 or year > 2100:
+    """Get calendar data for specified month (?format=columnar for the compact form)"""
+    if month < 1 or month > 12 or year < EXTENDED_FIRST_YEAR or year > EXTENDED_LAST_YEAR:
         return jsonify({'error': 'Invalid year or month'}), 400
+    payload_format = request.args.get('format', 'json')
+    if payload_format not in PAYLOAD_FORMATS:
+        return jsonify({'error': f"Unknown format; available: {', '.join(PAYLOAD_FORMATS)}"}), 400
     
-    # Get calendar for the month
-    calendar_data = cal.monthcalendar(year, month)
-    
-    # Build date data
-    days_data = []
-    days_in_month = cal.monthrange(year, month)[1]
-    
-    for week in calendar_data:
-        week_data = []
-        for day in week:
-            if day == 0:
-                week_data.append(None)
-            else:
-                lunar_y, lunar_m, lunar_d = solar_to_lunar(year, month, day)
-                lunar_str = format_lunar(lunar_y, lunar_m, lunar_d)
-                greg_holiday = get_gregorian_holiday(month, day, year)
-                lunar_holiday = get_lunar_holiday(lunar_m, lunar_d)
-                
-                # Determine if it's today
-                today = datetime.date.today()
-                is_today = (year == today.year and 
-                           month == today.month and 
-                           day == today.day)
-                
-                week_data.append({
-                    'day': day,
-                    'lunar': lunar_str,
-                    'lunar_month': lunar_m,
-                    'lunar_day': lunar_d,
-                    'greg_holiday': greg_holiday,
-                    'lunar_holiday': lunar_holiday,
-                    'is_today': is_today
-                })
-        days_data.append(week_data)
+    if payload_format == 'columnar':
+        return cached_json_response(*get_columnar_month_payload(year, month, holidays.HOLIDAY_DATA_VERSION))
+    return cached_json_response(*get_month_payload(year, month, holidays.HOLIDAY_DATA_VERSION))
+
+
+@app.route('/api/calendar/<int:year>')
+def get_calendar_year(year):
+    """Get calendar data for all months of a year (?format=columnar for the compact form)"""
+    if year < EXTENDED_FIRST_YEAR or year > EXTENDED_LAST_YEAR:
+        return jsonify({'error': 'Invalid year'}), 400
+    payload_format = request.args.get('format', 'json')
+    if payload_format not in PAYLOAD_FORMATS:
+        return jsonify({'error': f"Unknown format; available: {', '.join(PAYLOAD_FORMATS)}"}), 400
     
-    return jsonify({
-        'year': year,
-        'month': month,
-        'days': days_data
-    })
+    if payload_format == 'columnar':
+        return cached_json_response(*get_columnar_year_payload(year, holidays.HOLIDAY_DATA_VERSION))
+    return cached_json_response(*get_year_payload(year, holidays.HOLIDAY_DATA_VERSION))
+
+
+@app.route('/api/calendar/range')
+def get_calendar_range():
+    """Get calendar data for a range of months: ?from=YYYY-MM&to=YYYY-MM"""
+    first = parse_year_month(request.args.get('from'))
+    last = parse_year_month(request.args.get('to'))
+    if first is None or last is None or last < first:
+        return jsonify({'error': 'Invalid month range'}), 400
+    
+    month_count = (last[0] - first[0]) * 12 + last[1] - first[1] + 1
+    if month_count > MAX_RANGE_MONTHS:
+        return jsonify({'error': f'At most {MAX_RANGE_MONTHS} months per request'}), 400
+    
+    return cached_json_response(*serialize_payload({
+        'from': f'{first[0]}-{first[1]:02d}',
+        'to': f'{last[0]}-{last[1]:02d}',
+        'months': build_months(first[0], first[1], last[0], last[1])
+    }))
+
+
+@app.route('/api/table')
+def get_table():
+    """Client conversion table for 1900-2100, decoded by static/lunar_table.js"""
+    return cached_json_response(*get_table_payload(holidays.HOLIDAY_DATA_VERSION))
+
+
+@app.route('/api/table/<version>')
+def get_table_version(version):
+    """Client conversion table at a fixed version, cacheable for good"""
+    body, etag = get_table_payload(holidays.HOLIDAY_DATA_VERSION)
+    if version != etag[:12]:
+        return jsonify({'error': 'Unknown table version'}), 404
+    
+    response = cached_json_response(body, etag)
+    response.cache_control.max_age = TABLE_CACHE_MAX_AGE
+    response.cache_control.immutable = True
+    return response
 
 
 @app.route('/api/date/<int:year>/<int:month>/<int:day>')
@@ -78,27 +394,269 @@ def get_date_info(year, month, day):
     except ValueError:
         return jsonify({'error': 'Invalid date'}), 400
     
-    lunar_y, lunar_m, lunar_d = solar_to_lunar(year, month, day)
+    with metrics.stage('conversion'):
+        lunar = solar_to_lunar(year, month, day)
+        if lunar is None:
+            return jsonify({'error': f'Dates are only available for {EXTENDED_FIRST_YEAR}-{EXTENDED_LAST_YEAR}'}), 400
+        luna_str = format_lunar(lunar.year, lunar.month, lunar.day, lunar.isleap)
     
     # Get weekday
-    weekday_names = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
-    weekday = weekday_names[date_obj.weekday()]
+    weekday = WEEKDAY_NAMES[date_obj.weekday()]
     
-    luna_str = format_lunar(lunar_y, lunar_m, lunar_d)
-    greg_holiday = get_gregorian_holiday(month, day, year)
-    lunar_holiday = get_lunar_holiday(lunar_m, lunar_d)
+    with metrics.stage('holidays'):
+        greg_holiday = get_gregorian_holiday(month, day, year)
+        lunar_holiday = get_lunar_holiday(lunar.month, lunar.day, lunar.isleap, lunar.month_days)
+    with metrics.stage('solar_terms'):
+        solar_term = get_solar_term(year, month, day)
+    with metrics.stage('almanac'):
+        day_almanac = almanac.get_almanac(year, month, day, lunar.year)
+    with metrics.stage('festivals'):
+        festivals = [festival_entry(day) for day in festival_calendar.festivals_on(date_obj)
+                     if day.festival.kind == festival_calendar.KIND_FESTIVAL]
     
     return jsonify({
         'gregorian': f'{year}-{month:02d}-{day:02d}',
         'weekday': weekday,
         'lunar': luna_str,
-        'lunar_full': f'{lunar_y} {luna_str}',
+        'lunar_full': f'{lunar.year} {luna_str}',
+        'lunar_leap': lunar.isleap,
+        'lunar_month_days': lunar.month_days,
         'greg_holiday': greg_holiday,
-        'lunar_holiday': lunar_holiday
+        'lunar_holiday': lunar_holiday,
+        'solar_term': solar_term,
+        'current_term': day_almanac.solar_term,
+        'year_ganzhi': day_almanac.year_ganzhi,
+        'month_ganzhi': day_almanac.month_ganzhi,
+        'day_ganzhi': day_almanac.day_ganzhi,
+        'zodiac': day_almanac.zodiac,
+        'festivals': festivals
     })
 
 
+@app.route('/api/festivals')
+def get_festivals():
+    """Festivals and solar terms: ?year=YYYY or ?from=YYYY&to=YYYY, optionally &name= (lunar-find search) and &kind="""
+    try:
+        first_year = int(request.args.get('from', request.args.get('year', datetime.date.today().year)))
+        last_year = int(request.args.get('to', first_year))
+    except ValueError:
+        return jsonify({'error': 'Invalid year'}), 400
+    if first_year < EXTENDED_FIRST_YEAR or last_year > EXTENDED_LAST_YEAR or last_year < first_year:
+        return jsonify({'error': f'Festivals are only available for {EXTENDED_FIRST_YEAR}-{EXTENDED_LAST_YEAR}'}), 400
+    if last_year - first_year + 1 > MAX_FESTIVAL_YEARS:
+        return jsonify({'error': f'At most {MAX_FESTIVAL_YEARS} years per request'}), 400
+    kind = request.args.get('kind', '')
+    if kind not in ('', festival_calendar.KIND_FESTIVAL, festival_calendar.KIND_SOLAR_TERM):
+        return jsonify({'error': f"Unknown kind; available: {festival_calendar.KIND_FESTIVAL}, "
+                                 f"{festival_calendar.KIND_SOLAR_TERM}"}), 400
+    
+    return cached_json_response(*get_festivals_payload(first_year, last_year, request.args.get('name', ''), kind))
+
+
+@app.route('/api/recurrence')
+def get_recurrence():
+    """Dates of a recurring lunar date
+    
+    ?rule=yearly&month=M&day=D (a lunar anniversary) or ?rule=monthly&day=D
+    (that day of every lunar month), between from=YYYY-MM-DD (default today)
+    and to=YYYY-MM-DD (default a year later). missing=last|next|skip sets
+    where day 30 falls in 29-day months, leap=regular|leap|both which leap
+    months count.
+    """
+    try:
+        first = datetime.date.fromisoformat(request.args.get('from', datetime.date.today().isoformat()))
+        last = datetime.date.fromisoformat(request.args['to']) if 'to' in request.args \
+            else first + datetime.timedelta(days=365)
+        month = int(request.args['month']) if 'month' in request.args else None
+        day = int(request.args.get('day', 1))
+    except ValueError:
+        return jsonify({'error': 'Dates must be given as YYYY-MM-DD, and month and day as numbers'}), 400
+    if last.year - first.year + 1 > MAX_RECURRENCE_YEARS:
+        return jsonify({'error': f'At most {MAX_RECURRENCE_YEARS} years per request'}), 400
+    
+    args = (request.args.get('rule', ''), first, last, month, day,
+            request.args.get('missing', recurrence.MISSING_LAST), request.args.get('leap'))
+    try:
+        payload = get_recurrence_payload(*args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return cached_json_response(*payload)
+
+
+@app.route('/api/convert', methods=['POST'])
+def convert_dates():
+    """Convert many dates in one request
+
+    A JSON array of items gets {"results": [...]} in the same order; an
+    application/x-ndjson body (one item per line) is streamed back as one
+    result per line. Items that cannot be converted get {"error": ...}.
+    """
+    if request.mimetype == bulk_convert.NDJSON_MIMETYPE:
+        return app.response_class(stream_with_context(bulk_convert.iter_ndjson(bulk_convert.iter_lines(request.stream))),
+                                  mimetype=bulk_convert.NDJSON_MIMETYPE)
+    
+    items = request.get_json(silent=True)
+    if not isinstance(items, list):
+        return jsonify({'error': 'Expected a JSON array of dates or an application/x-ndjson body'}), 400
+    if len(items) > bulk_convert.MAX_ITEMS:
+        return jsonify({'error': f'At most {bulk_convert.MAX_ITEMS} dates per request; '
+                                 'send larger batches as application/x-ndjson'}), 400
+    
+    with metrics.stage('bulk_conversion'):
+        results = bulk_convert.convert_items(items)
+    with metrics.stage('serialize'):
+        body = json.dumps({'results': results}, separators=(',', ':'))
+    return app.response_class(body, mimetype='application/json')
+
+
+@app.route('/api/workdays')
+def get_workdays():
+    """Working day queries
+
+    ?from=YYYY-MM-DD&to=YYYY-MM-DD counts working days in [from, to);
+    ?date=YYYY-MM-DD&add=N finds the date N working days after date.
+    """
+    try:
+        if 'add' in request.args:
+            date = datetime.date.fromisoformat(request.args.get('date', ''))
+            count = int(request.args['add'])
+            return jsonify({
+                'date': date.isoformat(),
+                'add': count,
+                'result': workdays.add_workdays(date, count).isoformat()
+            })
+        start = datetime.date.fromisoformat(request.args.get('from', ''))
+        end = datetime.date.fromisoformat(request.args.get('to', ''))
+        return jsonify({
+            'from': start.isoformat(),
+            'to': end.isoformat(),
+            'workdays': workdays.workdays_between(start, end)
+        })
+    except ValueError as e:
+        return jsonify({'error': f'Invalid working day query: {e}'}), 400
+
+
+@app.route('/api/export')
+def export_calendar():
+    """Stream the calendar as NDJSON or CSV: ?format=&from=YYYY-MM-DD&to=YYYY-MM-DD&columns="""
+    try:
+        fmt, start, end, columns = export.parse_export_options(
+            request.args.get('format', 'ndjson'),
+            request.args.get('from'),
+            request.args.get('to'),
+            request.args.get('columns'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    filename = f'calendar_{start}_{end}.{fmt}'
+    return app.response_class(
+        stream_with_context(export.iter_export(fmt, start, end, columns)),
+        mimetype=export.EXPORT_MIMETYPES[fmt],
+        headers={'Content-Disposition': f'attachment; filename={filename}'})
+
+
+@app.route('/calendar.ics')
+def calendar_feed():
+    """ICS subscription feed: ?include=gregorian,lunar,terms&from=YYYY&to=YYYY"""
+    try:
+        options = ics_feed.parse_feed_options(
+            request.args.get('include'),
+            request.args.get('from'),
+            request.args.get('to'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    # The ETag depends only on the options and data version, so most polls
+    # are answered with a 304 before anything is generated. The data is read
+    # once, so a reload during the request cannot pair the ETag with other blocks
+    holiday_data = holidays.get_holiday_data()
+    etag = ics_feed.feed_etag(*options, holiday_data)
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+    else:
+        response = app.response_class(stream_with_context(ics_feed.iter_feed(*options, holiday_data)),
+                                      mimetype=ics_feed.ICS_MIMETYPE)
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = MONTH_CACHE_MAX_AGE
+    return response
+
+
+@app.route('/metrics')
+def get_metrics():
+    """Request, stage, cache and memory metrics of this process in the Prometheus text format"""
+    return app.response_class(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
+def is_admin_request(req):
+    """Whether a request carries the admin token"""
+    token = os.environ.get(ADMIN_TOKEN_ENV)
+    return bool(token) and hmac.compare_digest(req.headers.get('Authorization', ''), f'Bearer {token}')
+
+
+@app.route('/api/admin/reload-holidays', methods=['POST'])
+def reload_holidays():
+    """Reload data/holidays.csv in this process; month and response caches move to the new version"""
+    if not is_admin_request(request):
+        return jsonify({'error': f'Admin token required (set {ADMIN_TOKEN_ENV} to enable)'}), 403
+    try:
+        result = holiday_reload.reload_holidays(force=request.args.get('force') == '1')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({
+        'reloaded': result.reloaded,
+        'holiday_version': result.version,
+        'previous_version': result.previous_version
+    })
+
+
+@app.route('/ready')
+def ready():
+    """Readiness probe: reports which shared table file this process serves from"""
+    tables = shared_tables.mapped_table_info()
+    return jsonify({
+        'status': 'ready',
+        'pid': os.getpid(),
+        'mapped': tables is not None,
+        'table_version': tables['version'] if tables else None,
+        'table_file': tables['path'] if tables else None,
+        'holiday_version': holidays.HOLIDAY_DATA_VERSION
+    })
+
+
+metrics.register_cache('month_payload', get_month_payload)
+metrics.register_cache('year_payload', get_year_payload)
+metrics.register_cache('columnar_month_payload', get_columnar_month_payload)
+metrics.register_cache('columnar_year_payload', get_columnar_year_payload)
+metrics.register_cache('client_table', get_table_payload)
+metrics.register_cache('festivals_payload', get_festivals_payload)
+metrics.register_cache('festival_years', festival_calendar.get_year)
+metrics.register_cache('recurrence_payload', get_recurrence_payload)
+metrics.register_cache('recurrence_year_months', recurrence._year_months)
+metrics.register_cache('month_grid', month_grid._cached_month_grid)
+metrics.register_cache('astro_sui', astro_calendar._sui)
+metrics.register_cache('ics_year_block', ics_feed._cached_year_block)
+metrics.register_cache('solar_terms_computed', solar_terms._computed_year)
+metrics.register_cache('almanac_computed', almanac._computed_year)
+
+# Opt-in request profiling: views are only wrapped when a dump directory is set
+if os.environ.get(profiling.DIR_ENV):
+    profiling.install(app, os.environ[profiling.DIR_ENV], float(os.environ.get(profiling.RATE_ENV, 0)),
+                      authorize=is_admin_request)
+
+
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Gregorian-Lunar Calendar Web Version")
+    parser.add_argument('--warm-cache', action='store_true',
+                        help="Precompute every month in 1900-2100 before serving")
+    parser.add_argument('--holiday-check-interval', type=float, default=holiday_reload.CHECK_INTERVAL,
+                        help="Seconds between checks of data/holidays.csv for changes (0 disables reloading)")
+    args = parser.parse_args()
+    if args.warm_cache:
+        warm_month_cache()
+    if args.holiday_check_interval > 0:
+        holiday_reload.start_watcher(interval=args.holiday_check_interval)
+    
     print("=" * 50)
     print("Gregorian-Lunar Calendar Web Version")
     print("=" * 50)
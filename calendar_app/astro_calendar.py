@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Astronomical lunar calendar - Lunar years computed from new moons and solar terms
+
+Used for the years outside the shipped table (data/lunar_years.csv). A lunar
+month starts on the day of a new moon in China; month 11 holds the winter
+solstice, and a solstice-to-solstice year (sui) with 13 months repeats the
+number of its first month without a principal solar term as the leap month.
+Days are reckoned in UTC+8 from 1929 and in Beijing local mean time before.
+
+New moons come from ephem and solar terms from the lunarcalendar._calc
+routines, both imported only when a year is computed. Computed years are
+appended to data/lunar_years_computed.csv and read back by every process.
+
+A new moon a few minutes from midnight can land on the other day than in
+published tables, whose ephemerides and Delta T differ from ephem's by about
+that much. Over 1900-2100 this happens in the TABLE_DIFFERENCES years.
+"""
+
+import argparse
+import datetime
+import os
+import sys
+import metrics
+import row_cache
+
+CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'lunar_years_computed.csv')
+# Same columns as data/lunar_years.csv, so lunar_calendar.load_years() reads both
+CACHE_HEADER = ['lunar_year', 'new_year', 'leap_month'] + [f'slot{i}' for i in range(1, 14)]
+
+# Offset of the civil day in China from UTC: standard time from 1929, local mean time of Beijing before
+CHINA_STANDARD_TIME = datetime.timedelta(hours=8)
+BEIJING_MEAN_TIME = datetime.timedelta(hours=7, minutes=45, seconds=40)
+STANDARD_TIME_FROM = 1929
+
+# Lunar years of the shipped table (1900-2100) computed differently: one month
+# starts a day earlier because its new moon falls less than NEAR_MIDNIGHT
+# before midnight, within the disagreement between ephemerides
+TABLE_DIFFERENCES = (1906, 2057, 2089, 2097)
+NEAR_MIDNIGHT = datetime.timedelta(minutes=10)
+
+# Index of the winter solstice (270 degrees) in the lunarcalendar._calc term numbering
+_WINTER_SOLSTICE_TERM = 21
+
+# Computed lunar years: {lunar year: (lunar year, datetime.date of its new year, leap month, 13 month lengths)}
+_years = None
+
+
+def _china_date(moment):
+    """Civil date in China of an ephem.Date"""
+    utc = moment.datetime()
+    return (utc + (CHINA_STANDARD_TIME if utc.year >= STANDARD_TIME_FROM else BEIJING_MEAN_TIME)).date()
+
+
+def _china_midnight(day):
+    """ephem.Date of the start of a civil day in China"""
+    import ephem
+    offset = CHINA_STANDARD_TIME if day.year >= STANDARD_TIME_FROM else BEIJING_MEAN_TIME
+    return ephem.Date(datetime.datetime.combine(day, datetime.time()) - offset)
+
+
+def _winter_solstice(year):
+    import ephem
+    from lunarcalendar import _calc
+    return _china_date(_calc.solar_term_finder(ephem.Date(f'{year}/12/1'), _WINTER_SOLSTICE_TERM))
+
+
+def _principal_terms(start, end):
+    """Dates of the principal solar terms (multiples of 30 degrees) from start up to end"""
+    import ephem
+    from lunarcalendar import _calc
+    dates = []
+    moment = _china_midnight(start)
+    while True:
+        _, _, term = _calc.solar_term_finder_adjacent(moment, 30.0, 0.0)
+        if _china_date(term) >= end:
+            return dates
+        dates.append(_china_date(term))
+        moment = ephem.Date(term + 1)
+
+
+def _new_moon_on_or_before(day):
+    """(date, ephem.Date) of the last new moon falling on or before a day"""
+    import ephem
+    moment = ephem.previous_new_moon(_china_midnight(day + datetime.timedelta(days=1)))
+    return _china_date(moment), moment
+
+
+@metrics.counted_lru_cache(maxsize=8)
+def _sui(year):
+    """
+    Months from month 11 of the lunar year before to the month 11 in year
+
+    Returns:
+        (list of (first day, month number, isleap), first day of the next month 11)
+    """
+    import ephem
+    first, moment = _new_moon_on_or_before(_winter_solstice(year - 1))
+    end, _ = _new_moon_on_or_before(_winter_solstice(year))
+    starts = [first]
+    while True:
+        moment = ephem.next_new_moon(ephem.Date(moment + 1))
+        day = _china_date(moment)
+        if day >= end:
+            break
+        starts.append(day)
+
+    terms = _principal_terms(first, end) if len(starts) == 13 else []
+    bounds = starts + [end]
+    months = []
+    number = 11
+    leap_found = False
+    for i, start in enumerate(starts):
+        isleap = False
+        if terms and not leap_found and i > 0:
+            isleap = leap_found = not any(start <= term < bounds[i + 1] for term in terms)
+        if i > 0 and not isleap:
+            number = number % 12 + 1
+        months.append((start, number, isleap))
+    return months, end
+
+
+def compute_year(lunar_year):
+    """
+    Compute one lunar year from the positions of the sun and moon
+
+    Returns:
+        (lunar year, datetime.date of its new year, leap month or 0,
+        13 month lengths in calendar order with 0 for a missing 13th month),
+        as lunar_calendar.compute_years()
+    """
+    this_sui, _ = _sui(lunar_year)
+    next_sui, _ = _sui(lunar_year + 1)
+    first = next(i for i, (_, number, isleap) in enumerate(this_sui) if number == 1 and not isleap)
+    last = next(i for i, (_, number, isleap) in enumerate(next_sui) if number == 1 and not isleap)
+    months = this_sui[first:] + next_sui[:last]
+    starts = [start for start, _, _ in months] + [next_sui[last][0]]
+    lengths = [(starts[i + 1] - starts[i]).days for i in range(len(months))]
+    leap = next((number for _, number, isleap in months if isleap), 0)
+    return lunar_year, starts[0], leap, lengths + [0] * (13 - len(lengths))
+
+
+def _read_cache():
+    years = {}
+    for row in row_cache.read_rows(CACHE_FILE):
+        years[int(row[0])] = (int(row[0]), datetime.date.fromisoformat(row[1]), int(row[2]),
+                              [int(v) for v in row[3:]])
+    return years
+
+
+def get_year(lunar_year):
+    """
+    Get a lunar year, computing it and adding it to the cache file the first time
+
+    Returns:
+        Lunar year record in the form of compute_year()
+    """
+    global _years
+    if _years is None or lunar_year not in _years:
+        # Another process may have computed it since the file was read
+        _years = _read_cache()
+        if lunar_year not in _years:
+            record = compute_year(lunar_year)
+            row_cache.append_rows(CACHE_FILE, CACHE_HEADER,
+                                  [[record[0], record[1].isoformat(), record[2]] + record[3]])
+            _years[lunar_year] = record
+    return _years[lunar_year]
+
+
+def main(argv=None):
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Compute lunar years into the cache file ahead of use")
+    parser.add_argument('first_year', type=int, help="First lunar year")
+    parser.add_argument('last_year', type=int, help="Last lunar year")
+    args = parser.parse_args(argv)
+
+    global _years
+    _years = _read_cache()
+    missing = [year for year in range(args.first_year, args.last_year + 1) if year not in _years]
+    rows = []
+    for year in missing:
+        record = _years[year] = compute_year(year)
+        rows.append([record[0], record[1].isoformat(), record[2]] + record[3])
+    if rows:
+        row_cache.append_rows(CACHE_FILE, CACHE_HEADER, rows)
+    print(f"Computed {len(missing)} lunar years into {CACHE_FILE}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
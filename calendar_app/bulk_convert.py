@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Bulk conversion - Convert many Gregorian or lunar dates in one call
+
+An item is a Gregorian date ("YYYY-MM-DD" or {"gregorian": "YYYY-MM-DD"})
+or a lunar one ({"lunar": "YYYY-MM-DD", "leap": true}). Results keep the
+order of the items, and an item that cannot be converted gets an error
+result in its place instead of failing the batch. Gregorian dates in
+1900-2100 are converted together through solar_to_lunar_many.
+"""
+
+import argparse
+import datetime
+import json
+import sys
+from lunar_calendar import (solar_to_lunar, solar_to_lunar_many, lunar_to_solar, lunar_month_days, format_lunar,
+                            TABLE_FIRST_YEAR, TABLE_LAST_YEAR, EXTENDED_FIRST_YEAR, EXTENDED_LAST_YEAR)
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+# Items per JSON request; NDJSON requests are streamed and unbounded
+MAX_ITEMS = 100000
+# NDJSON lines converted together, and bytes read from the input at a time
+CHUNK_SIZE = 5000
+BLOCK_SIZE = 64 * 1024
+
+KIND_GREGORIAN = 'gregorian'
+KIND_LUNAR = 'lunar'
+
+# Lunar labels do not depend on the year: [isleap][month][day]
+_LABELS = [[[format_lunar(0, month, day, isleap) if month and day else "" for day in range(31)]
+            for month in range(13)]
+           for isleap in (False, True)]
+
+_RANGE_ERROR = f"Dates are only available for {EXTENDED_FIRST_YEAR}-{EXTENDED_LAST_YEAR}"
+
+
+def _parse_date(text):
+    try:
+        return datetime.date.fromisoformat(text)
+    except (TypeError, ValueError):
+        raise ValueError("Dates must be given as YYYY-MM-DD")
+
+
+def parse_item(item):
+    """
+    Parse one request item
+
+    Args:
+        item: "YYYY-MM-DD", {"gregorian": "YYYY-MM-DD"} or
+            {"lunar": "YYYY-MM-DD", "leap": bool (optional)}
+
+    Returns:
+        (KIND_GREGORIAN, datetime.date) or (KIND_LUNAR, (year, month, day, isleap))
+
+    Raises:
+        ValueError: If the item is malformed
+    """
+    if isinstance(item, str):
+        return KIND_GREGORIAN, _parse_date(item)
+    if isinstance(item, dict):
+        if 'gregorian' in item:
+            return KIND_GREGORIAN, _parse_date(item['gregorian'])
+        if 'lunar' in item:
+            try:
+                year, month, day = (int(part) for part in item['lunar'].split('-'))
+            except (AttributeError, ValueError):
+                raise ValueError("Lunar dates must be given as YYYY-MM-DD")
+            isleap = item.get('leap', False)
+            if not isinstance(isleap, bool):
+                raise ValueError("'leap' must be true or false")
+            return KIND_LUNAR, (year, month, day, isleap)
+    raise ValueError('Expected "YYYY-MM-DD", {"gregorian": "YYYY-MM-DD"} or {"lunar": "YYYY-MM-DD", "leap": false}')
+
+
+def _result(gregorian, year, month, day, isleap, month_days):
+    return {
+        'gregorian': gregorian,
+        'lunar_year': year,
+        'lunar_month': month,
+        'lunar_day': day,
+        'lunar_leap': isleap,
+        'lunar_month_days': month_days,
+        'lunar': _LABELS[isleap][month][day],
+    }
+
+
+def convert_items(items):
+    """
+    Convert request items, keeping their order
+
+    Returns:
+        List with one dict per item: gregorian, lunar_year, lunar_month,
+        lunar_day, lunar_leap, lunar_month_days and lunar (the label), or
+        {'error': message} for an item that could not be converted
+    """
+    results = [None] * len(items)
+    batch_indexes, batch_dates = [], []
+    for index, item in enumerate(items):
+        try:
+            kind, value = parse_item(item)
+        except ValueError as e:
+            results[index] = {'error': str(e)}
+            continue
+
+        if kind == KIND_GREGORIAN:
+            if TABLE_FIRST_YEAR <= value.year <= TABLE_LAST_YEAR:
+                batch_indexes.append(index)
+                batch_dates.append(value)
+                continue
+            lunar = solar_to_lunar(value.year, value.month, value.day)
+            results[index] = {'error': _RANGE_ERROR} if lunar is None else _result(value.isoformat(), *lunar)
+        else:
+            year, month, day, isleap = value
+            solar = lunar_to_solar(year, month, day, isleap)
+            if solar is None:
+                in_range = EXTENDED_FIRST_YEAR - 1 <= year <= EXTENDED_LAST_YEAR
+                results[index] = {'error': "No such lunar date" if in_range else _RANGE_ERROR}
+                continue
+            results[index] = _result(f'{solar[0]:04d}-{solar[1]:02d}-{solar[2]:02d}', year, month, day, isleap,
+                                     lunar_month_days(year, month, isleap))
+
+    if batch_dates:
+        columns = solar_to_lunar_many(batch_dates)
+        for index, date, year, month, day, isleap, month_days in zip(
+                batch_indexes, batch_dates, *(column.tolist() for column in columns)):
+            results[index] = _result(date.isoformat(), year, month, day, bool(isleap), month_days)
+    return results
+
+
+def _parse_lines(lines):
+    """JSON values of NDJSON lines; a line that is not valid JSON becomes None (a malformed item)"""
+    # Each line is parsed on its own: joined into one array, malformed lines
+    # can combine into values that no longer line up with the input lines
+    items = []
+    for line in lines:
+        try:
+            items.append(json.loads(line))
+        except ValueError:
+            items.append(None)
+    return items
+
+
+_encode_error = json.JSONEncoder(separators=(',', ':')).encode
+
+
+def _ndjson_lines(results):
+    # Labels and ISO dates need no escaping, so results are formatted
+    # directly instead of going through the JSON encoder
+    return ''.join([
+        '{"gregorian":"%s","lunar_year":%d,"lunar_month":%d,"lunar_day":%d,"lunar_leap":%s,'
+        '"lunar_month_days":%d,"lunar":"%s"}\n' % (
+            result['gregorian'], result['lunar_year'], result['lunar_month'], result['lunar_day'],
+            'true' if result['lunar_leap'] else 'false', result['lunar_month_days'], result['lunar'])
+        if 'error' not in result else _encode_error(result) + '\n'
+        for result in results])
+
+
+def iter_lines(stream, block_size=BLOCK_SIZE):
+    """Split a binary stream into lines (without line endings), reading it in blocks"""
+    rest = b''
+    while True:
+        block = stream.read(block_size)
+        if not block:
+            break
+        lines = (rest + block).split(b'\n')
+        rest = lines.pop()
+        yield from lines
+    if rest:
+        yield rest
+
+
+def iter_ndjson(lines, chunk_size=CHUNK_SIZE):
+    """
+    Convert NDJSON items, yielding NDJSON results in chunks
+
+    Args:
+        lines: Iterable of byte strings, one JSON item each (e.g. from
+            iter_lines()); blank lines are skipped
+        chunk_size: Items converted together
+
+    Yields:
+        Text chunks of one result line per item
+    """
+    chunk = []
+    for line in lines:
+        if line.strip():
+            chunk.append(line)
+        if len(chunk) >= chunk_size:
+            yield _ndjson_lines(convert_items(_parse_lines(chunk)))
+            chunk = []
+    if chunk:
+        yield _ndjson_lines(convert_items(_parse_lines(chunk)))
+
+
+def main(argv=None):
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Convert NDJSON Gregorian or lunar dates (one item per line)")
+    parser.add_argument('input', nargs='?', help="Input file (default: standard input)")
+    parser.add_argument('-o', '--output', help="Output file (default: standard output)")
+    args = parser.parse_args(argv)
+
+    source = open(args.input, 'rb') if args.input else sys.stdin.buffer
+    out = open(args.output, 'w', encoding='utf-8', newline='') if args.output else sys.stdout
+    try:
+        for chunk in iter_ndjson(iter_lines(source)):
+            out.write(chunk)
+    finally:
+        if source is not sys.stdin.buffer:
+            source.close()
+        if out is not sys.stdout:
+            out.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
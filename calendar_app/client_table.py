@@ -0,0 +1,78 @@
+# Client table - the conversion, holiday and solar term data shipped to the browser
+#
+# static/lunar_table.js decodes this table and renders month grids and the
+# date panel without asking the server. It is built from the same tables as
+# lunar_calendar.py, solar_terms.py and holidays.py.
+import datetime
+import almanac
+import holidays
+import lunar_calendar
+from holidays import SOLAR_TERMS_CN
+from lunar_calendar import TABLE_FIRST_YEAR, TABLE_LAST_YEAR
+from month_grid import WEEKDAY_NAMES
+from solar_terms import get_solar_terms
+
+# Bumped when the layout of the table changes, so old decoders are not fed new tables
+TABLE_FORMAT = 1
+
+
+def _lunar_years():
+    """[new year offset from 1900-01-01, leap month, 30-day month bitmask] per lunar year
+
+    Bit n of the mask is set when slot n (in calendar order, the leap month
+    included) has 30 days; a year has 13 slots if it has a leap month.
+    """
+    tables = lunar_calendar.export_tables()
+    leap_months, month_starts, month_lengths = tables['leap_months'], tables['month_starts'], tables['month_lengths']
+    years = []
+    for index, leap in enumerate(leap_months):
+        slots = range(index * 13, index * 13 + (13 if leap else 12))
+        mask = sum(1 << n for n, slot in enumerate(slots) if month_lengths[slot] == 30)
+        years.append([month_starts[index * 13], leap, mask])
+    return years
+
+
+def _solar_terms():
+    """Per Gregorian year, the day of the year (0 for January 1st) each term starts, indexed like SOLAR_TERMS_CN"""
+    years = []
+    for year in range(TABLE_FIRST_YEAR, TABLE_LAST_YEAR + 1):
+        terms = get_solar_terms(year)
+        if len(terms) != len(SOLAR_TERMS_CN):
+            raise ValueError(f"Solar terms of {year} are incomplete")
+        first = datetime.date(year, 1, 1).toordinal()
+        days = [0] * len(SOLAR_TERMS_CN)
+        for date, name in terms:
+            days[SOLAR_TERMS_CN.index(name)] = date.toordinal() - first
+        years.append(days)
+    return years
+
+
+def build_client_table():
+    """
+    Build the client table
+
+    Returns:
+        JSON-ready dict: lunar years from 1899 (January 1900 is still in lunar
+        1899), solar term days per year, holidays, and the display names
+        format_lunar and the almanac use
+    """
+    data = holidays.get_holiday_data()
+    return {
+        'format': TABLE_FORMAT,
+        'first_year': TABLE_FIRST_YEAR,
+        'last_year': TABLE_LAST_YEAR,
+        'first_lunar_year': TABLE_FIRST_YEAR - 1,
+        'lunar_years': _lunar_years(),
+        'solar_terms': _solar_terms(),
+        'solar_term_names': SOLAR_TERMS_CN,
+        'gregorian_holidays': {str(year): [[month, day, name] for (month, day), name in sorted(days.items())]
+                               for year, days in sorted(data.gregorian.items())},
+        'lunar_holidays': [[month, day, name] for (month, day), name in sorted(data.lunar.items())],
+        'month_names': lunar_calendar.LUNAR_MONTH_NAMES,
+        'day_names': lunar_calendar.LUNAR_DAY_NAMES,
+        'leap_prefix': lunar_calendar.LEAP_MONTH_PREFIX,
+        'weekday_names': WEEKDAY_NAMES,
+        'ganzhi_names': almanac.GANZHI_NAMES,
+        'zodiac_animals': almanac.ZODIAC_ANIMALS,
+        'holiday_version': data.version,
+    }
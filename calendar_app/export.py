@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Calendar export - Stream the Gregorian/Lunar mapping and holidays as NDJSON or CSV
+"""
+
+import argparse
+import calendar as cal
+import csv
+import datetime
+import io
+import sys
+from json.encoder import encode_basestring
+from lunar_calendar import solar_to_lunar, format_lunar
+from holidays import get_gregorian_holiday, get_lunar_holiday
+from month_grid import WEEKDAY_NAMES
+from solar_terms import get_solar_term
+
+# Columns available for export, in output order
+EXPORT_COLUMNS = ['date', 'weekday', 'lunar_year', 'lunar_month', 'lunar_day', 'lunar_leap',
+                  'lunar', 'greg_holiday', 'lunar_holiday', 'solar_term']
+# Integer columns; every other column is a string
+INTEGER_COLUMNS = {'lunar_year', 'lunar_month', 'lunar_day', 'lunar_leap'}
+EXPORT_MIMETYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+FIRST_DATE = datetime.date(1900, 1, 1)
+LAST_DATE = datetime.date(2100, 12, 31)
+
+
+def parse_export_options(fmt='ndjson', start=None, end=None, columns=None):
+    """Validate export options given as strings
+
+    Args:
+        fmt: 'ndjson' or 'csv'
+        start: First date as YYYY-MM-DD (optional, defaults to 1900-01-01)
+        end: Last date as YYYY-MM-DD (optional, defaults to 2100-12-31)
+        columns: Comma-separated column names (optional, defaults to all)
+
+    Returns:
+        (fmt, start date, end date, column list)
+
+    Raises:
+        ValueError: If any option is invalid
+    """
+    if fmt not in EXPORT_MIMETYPES:
+        raise ValueError(f"Unknown format '{fmt}', expected one of: {', '.join(EXPORT_MIMETYPES)}")
+
+    try:
+        start = datetime.date.fromisoformat(start) if start else FIRST_DATE
+        end = datetime.date.fromisoformat(end) if end else LAST_DATE
+    except ValueError:
+        raise ValueError("Dates must be given as YYYY-MM-DD")
+    if start < FIRST_DATE or end > LAST_DATE or end < start:
+        raise ValueError(f"Date range must lie within {FIRST_DATE} to {LAST_DATE}")
+
+    if columns:
+        columns = [name.strip() for name in columns.split(',') if name.strip()]
+        unknown = [name for name in columns if name not in EXPORT_COLUMNS]
+        if unknown or not columns:
+            raise ValueError(f"Unknown columns: {', '.join(unknown)}; available: {', '.join(EXPORT_COLUMNS)}")
+    else:
+        columns = list(EXPORT_COLUMNS)
+
+    return fmt, start, end, columns
+
+
+def iter_rows(start=FIRST_DATE, end=LAST_DATE):
+    """Yield export rows one month at a time
+
+    Each item is a list of rows covering one month (clipped to the range),
+    and each row is a list of values in EXPORT_COLUMNS order.
+    """
+    year, month = start.year, start.month
+    while (year, month) <= (end.year, end.month):
+        first_weekday, days_in_month = cal.monthrange(year, month)
+        first_day = start.day if (year, month) == (start.year, start.month) else 1
+        last_day = end.day if (year, month) == (end.year, end.month) else days_in_month
+
+        rows = []
+        for day in range(first_day, last_day + 1):
+            lunar = solar_to_lunar(year, month, day)
+            rows.append([
+                f'{year}-{month:02d}-{day:02d}',
+                WEEKDAY_NAMES[(first_weekday + day - 1) % 7],
+                lunar.year,
+                lunar.month,
+                lunar.day,
+                int(lunar.isleap),
+                format_lunar(lunar.year, lunar.month, lunar.day, lunar.isleap),
+                get_gregorian_holiday(month, day, year),
+                get_lunar_holiday(lunar.month, lunar.day, lunar.isleap, lunar.month_days),
+                get_solar_term(year, month, day),
+            ])
+        yield rows
+
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def iter_export(fmt='ndjson', start=FIRST_DATE, end=LAST_DATE, columns=None):
+    """Yield the export as text chunks of about one month each
+
+    Only one month of rows is held in memory at a time, so the output can
+    be streamed to a file or an HTTP response of any length.
+    """
+    columns = columns or EXPORT_COLUMNS
+
+    if fmt == 'csv':
+        indexes = [EXPORT_COLUMNS.index(name) for name in columns]
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator='\n')
+        writer.writerow(columns)
+        for rows in iter_rows(start, end):
+            writer.writerows([[row[i] for i in indexes] for row in rows])
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    else:
+        # Encode values column by column instead of building a dict per row
+        fields = [(EXPORT_COLUMNS.index(name), encode_basestring(name) + ':',
+                   str if name in INTEGER_COLUMNS else encode_basestring)
+                  for name in columns]
+        for rows in iter_rows(start, end):
+            yield ''.join(['{' + ','.join([key + encode(row[i]) for i, key, encode in fields]) + '}\n'
+                           for row in rows])
+
+
+def main(argv=None):
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Export the Gregorian/Lunar calendar with holidays")
+    parser.add_argument('--format', dest='fmt', default='ndjson', choices=sorted(EXPORT_MIMETYPES),
+                        help="Output format (default: ndjson)")
+    parser.add_argument('--from', dest='start', help="First date, YYYY-MM-DD (default: 1900-01-01)")
+    parser.add_argument('--to', dest='end', help="Last date, YYYY-MM-DD (default: 2100-12-31)")
+    parser.add_argument('--columns', help=f"Comma-separated columns (default: {','.join(EXPORT_COLUMNS)})")
+    parser.add_argument('-o', '--output', help="Output file (default: standard output)")
+    args = parser.parse_args(argv)
+
+    try:
+        options = parse_export_options(args.fmt, args.start, args.end, args.columns)
+    except ValueError as e:
+        parser.error(str(e))
+
+    out = open(args.output, 'w', encoding='utf-8', newline='') if args.output else sys.stdout
+    try:
+        for chunk in iter_export(*options):
+            out.write(chunk)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
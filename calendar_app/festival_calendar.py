@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Festival calendar - Dates of the lunarcalendar festivals and solar terms, materialized per year
+
+lunarcalendar.festival recomputes a festival on every call (an rrule
+expansion, a Lunar round trip or an ephem solve). Here the festivals of
+data/festivals.csv (names extracted from lunarcalendar.festival and
+lunarcalendar.solarterm with `python festival_calendar.py build`) are
+dated once per year from the conversion and solar term tables, and the
+years are kept in a bounded cache. Names can be searched the way the
+lunar-find command does.
+"""
+
+import argparse
+import csv
+import datetime
+import os
+import sys
+from collections import namedtuple
+import metrics
+from holidays import SOLAR_TERMS_CN
+from lunar_calendar import lunar_to_solar, EXTENDED_FIRST_YEAR, EXTENDED_LAST_YEAR
+from solar_terms import get_solar_terms
+
+DATA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'festivals.csv')
+# Years kept in memory (every year of 1900-2100 fits)
+YEAR_CACHE_SIZE = 256
+
+KIND_FESTIVAL = 'festival'
+KIND_SOLAR_TERM = 'solarterm'
+
+# How each lunarcalendar festival is dated, by its name in lunarcalendar.festival:
+#   fixed:MM-DD            Gregorian date
+#   weekday:MM:W:N         N-th weekday W (Monday is 0) of a Gregorian month
+#   easter                 Western Easter Sunday
+#   lunar:MM-DD            lunar date in the lunar year starting in that year
+#   lunar-before:MM-DD     lunar date in the lunar year before
+#   lunar-eve              day before the lunar new year
+#   term:N                 solar term N (SOLAR_TERMS_CN index)
+FESTIVAL_RULES = {
+    'NewYear': 'fixed:01-01',
+    'Valentine': 'fixed:02-14',
+    'WomenDay': 'fixed:03-08',
+    'ArborDay': 'fixed:03-12',
+    'ChingMing': 'term:4',
+    'LabourDay': 'fixed:05-01',
+    'YouthDay': 'fixed:05-04',
+    'NurseDay': 'fixed:05-12',
+    'MotherDay': 'weekday:05:6:2',
+    'ChildrenDay': 'fixed:06-01',
+    'FatherDay': 'weekday:06:6:3',
+    'TeacherDay': 'fixed:09-10',
+    'NationDay': 'fixed:10-01',
+    'Halloween': 'fixed:10-31',
+    'Thanksgiving': 'weekday:11:3:4',
+    'ChristmasEve': 'fixed:12-24',
+    'ChristmasDay': 'fixed:12-25',
+    'Easter': 'easter',
+    'LaBa': 'lunar-before:12-08',
+    'NewYearEve': 'lunar-eve',
+    'XiaoNian': 'lunar-before:12-23',
+    'ChineseNewYear': 'lunar:01-01',
+    'PoWu': 'lunar:01-05',
+    'Lantern': 'lunar:01-15',
+    'DragonHead': 'lunar:02-02',
+    'DragonBoat': 'lunar:05-05',
+    'Qixi': 'lunar:07-07',
+    'Ghost': 'lunar:07-15',
+    'MidAutumn': 'lunar:08-15',
+    'ChongYang': 'lunar:09-09',
+    'Hanyi': 'lunar:10-01',
+    'DongJie': 'term:21',
+}
+
+# A festival or solar term; zh_hans and zh_hant are tuples of names, the first one preferred
+Festival = namedtuple('Festival', ['key', 'kind', 'rule', 'en', 'zh_hans', 'zh_hant'])
+# A festival on a date of a given year
+FestivalDay = namedtuple('FestivalDay', ['date', 'festival'])
+
+_festivals = None
+
+
+def load_festivals(path=DATA_FILE):
+    """Read a festival data file
+
+    Returns:
+        List of Festival, festivals first and then the solar terms
+    """
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        next(reader)
+        return [Festival(key, kind, rule, en, tuple(zh_hans.split(',')), tuple(zh_hant.split(',')))
+                for key, kind, rule, en, zh_hans, zh_hant in reader]
+
+
+def get_festivals():
+    """The festival definitions, loaded on first use"""
+    global _festivals
+    if _festivals is None:
+        _festivals = load_festivals()
+    return _festivals
+
+
+def build_data_file(path=DATA_FILE):
+    """Extract the festival and solar term names from lunarcalendar and write the data file"""
+    from lunarcalendar import festival, solarterm
+    rows = []
+    for name, value in vars(festival).items():
+        if value in festival.zh_festivals:
+            if name not in FESTIVAL_RULES:
+                raise ValueError(f"No rule for lunarcalendar festival {name}")
+            rows.append([name, KIND_FESTIVAL, FESTIVAL_RULES[name], value.get_lang('en'),
+                         ','.join(value.get_lang_list('zh_hans')), ','.join(value.get_lang_list('zh_hant'))])
+    for index, term in enumerate(solarterm.zh_solarterms):
+        rows.append([SOLAR_TERMS_CN[index].replace(' ', ''), KIND_SOLAR_TERM, f'term:{index}', SOLAR_TERMS_CN[index],
+                     ','.join(term.get_lang_list('zh_hans')), ','.join(term.get_lang_list('zh_hant'))])
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(['key', 'kind', 'rule', 'en', 'zh_hans', 'zh_hant'])
+        writer.writerows(rows)
+    return len(rows)
+
+
+def _easter(year):
+    # Anonymous Gregorian algorithm (Meeus/Jones/Butcher)
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = b // 4, b % 4
+    g = (b - (b + 8) // 25 + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    l = (32 + 2 * e + 2 * (c // 4) - h - c % 4) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    return datetime.date(year, (h + l - 7 * m + 114) // 31, (h + l - 7 * m + 114) % 31 + 1)
+
+
+def _lunar_date(year, month, day):
+    solar = lunar_to_solar(year, month, day)
+    return None if solar is None else datetime.date(*solar)
+
+
+def festival_date(rule, year, terms):
+    """
+    Date of a festival rule in a Gregorian year
+
+    Args:
+        rule: Rule string (see FESTIVAL_RULES)
+        year: Gregorian year
+        terms: List of the 24 solar term dates of the year, indexed like SOLAR_TERMS_CN
+
+    Returns:
+        datetime.date, or None if the date cannot be computed
+    """
+    kind, _, value = rule.partition(':')
+    if kind == 'fixed':
+        return datetime.date(year, int(value[:2]), int(value[3:]))
+    if kind == 'weekday':
+        month, weekday, nth = (int(part) for part in value.split(':'))
+        first = datetime.date(year, month, 1)
+        return first + datetime.timedelta(days=(weekday - first.weekday()) % 7 + 7 * (nth - 1))
+    if kind == 'easter':
+        return _easter(year)
+    if kind == 'lunar':
+        return _lunar_date(year, int(value[:2]), int(value[3:]))
+    if kind == 'lunar-before':
+        return _lunar_date(year - 1, int(value[:2]), int(value[3:]))
+    if kind == 'lunar-eve':
+        new_year = _lunar_date(year, 1, 1)
+        return None if new_year is None else new_year - datetime.timedelta(days=1)
+    if kind == 'term':
+        return terms[int(value)]
+    raise ValueError(f"Unknown festival rule '{rule}'")
+
+
+@metrics.counted_lru_cache(maxsize=YEAR_CACHE_SIZE)
+def get_year(year):
+    """
+    All festivals and solar terms of a Gregorian year, computed once
+
+    Returns:
+        Tuple of FestivalDay in date order (definition order within a day)
+
+    Raises:
+        ValueError: If the year is outside 1600-2400
+    """
+    if not EXTENDED_FIRST_YEAR <= year <= EXTENDED_LAST_YEAR:
+        raise ValueError(f"Festivals are only available for {EXTENDED_FIRST_YEAR}-{EXTENDED_LAST_YEAR}")
+    terms = [None] * len(SOLAR_TERMS_CN)
+    for date, name in get_solar_terms(year):
+        terms[SOLAR_TERMS_CN.index(name)] = date
+    days = []
+    for order, festival in enumerate(get_festivals()):
+        date = festival_date(festival.rule, year, terms)
+        if date is not None:
+            days.append((date, order, FestivalDay(date, festival)))
+    return tuple(day for _, _, day in sorted(days))
+
+
+def festivals_on(date):
+    """Festivals and solar terms falling on a datetime.date"""
+    return [day for day in get_year(date.year) if day.date == date]
+
+
+def festivals_between(first_year, last_year, kind=None):
+    """
+    Festivals of a range of years in date order
+
+    Args:
+        first_year: First Gregorian year
+        last_year: Last Gregorian year
+        kind: KIND_FESTIVAL or KIND_SOLAR_TERM to keep only one kind (optional)
+
+    Returns:
+        List of FestivalDay
+    """
+    days = []
+    for year in range(first_year, last_year + 1):
+        days.extend(get_year(year))
+    if kind is not None:
+        days = [day for day in days if day.festival.kind == kind]
+    return days
+
+
+def _search(festivals, names_of, name):
+    """lunar-find matching in one language: an exact name, or the festivals where name is over half of a name"""
+    partial = []
+    for festival in festivals:
+        for candidate in names_of(festival):
+            if candidate == name:
+                return [festival]
+            if name in candidate and len(name) / len(candidate) > 0.5:
+                partial.append(festival)
+                break
+    return partial
+
+
+def match_festivals(name):
+    """
+    Festivals matching a search name, as the lunar-find command does
+
+    "all", "festival" (or 节日) and "solarterm" (or 节气) select groups.
+    Otherwise the simplified Chinese names are searched, then the
+    traditional Chinese ones; an exact name gives that festival alone.
+    Unlike lunar-find, English names are searched last (any part of the
+    name, case-insensitive).
+
+    Returns:
+        List of Festival
+    """
+    festivals = get_festivals()
+    if name == 'all':
+        return list(festivals)
+    if 'festival' in name or '节日' in name:
+        return [f for f in festivals if f.kind == KIND_FESTIVAL]
+    if 'solarterm' in name or '节气' in name:
+        return [f for f in festivals if f.kind == KIND_SOLAR_TERM]
+
+    # lunar-find tries the solar terms before the festivals
+    ordered = sorted(festivals, key=lambda f: f.kind != KIND_SOLAR_TERM)
+    return (_search(ordered, lambda f: f.zh_hans, name)
+            or _search(ordered, lambda f: f.zh_hant, name)
+            or [f for f in ordered if name.lower() in f.en.lower()])
+
+
+def find(name, first_year, last_year=None):
+    """
+    Dates of the festivals matching a search name
+
+    Returns:
+        List of FestivalDay in date order
+    """
+    keys = {festival.key for festival in match_festivals(name)}
+    return [day for day in festivals_between(first_year, last_year or first_year) if day.festival.key in keys]
+
+
+def main(argv=None):
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Festival and solar term dates")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    build = subparsers.add_parser('build', help="Regenerate data/festivals.csv from lunarcalendar")
+    build.add_argument('-o', '--output', default=DATA_FILE)
+    search = subparsers.add_parser('find', help="Find festivals by name (all, festival, solarterm, or a name)")
+    search.add_argument('name')
+    search.add_argument('year', nargs='?', type=int, default=datetime.date.today().year,
+                        help="Year (default: this year)")
+    search.add_argument('--to', dest='last_year', type=int, help="Last year, to list a range of years")
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        count = build_data_file(args.output)
+        print(f"Wrote {count} festivals and solar terms to {args.output}")
+        return 0
+
+    try:
+        days = find(args.name, args.year, args.last_year)
+    except ValueError as e:
+        parser.error(str(e))
+    for day in days:
+        print(f"{day.date}  {day.festival.zh_hans[0]}  {day.festival.en}")
+    return 0 if days else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
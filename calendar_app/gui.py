@@ -2,9 +2,17 @@
 import tkinter as tk
 from tkinter import ttk
 import datetime
-import calendar
-from lunar_calendar import solar_to_lunar, lunar_to_solar, format_lunar
-from holidays import get_holiday_mark, get_gregorian_holiday, get_lunar_holiday
+import queue
+import threading
+from month_grid import get_month_grid
+from lunar_calendar import EXTENDED_FIRST_YEAR, EXTENDED_LAST_YEAR
+
+# Months on either side of the displayed one computed ahead of time
+PREFETCH_RADIUS = 2
+# How often (ms) the main loop picks up months computed by the prefetch thread
+PREFETCH_POLL_MS = 30
+# Prefetched months kept in memory; the farthest from the displayed month go first
+MONTH_CACHE_SIZE = 36
 
 
 class CalendarApp:
@@ -19,9 +27,22 @@ class CalendarApp:
         self.year = self.current_date.year
         self.month = self.current_date.month
         
+        # Month grids by (year, month); filled by the prefetch thread, which
+        # only talks to the main loop through the two queues
+        self.month_grids = {}
+        # Grid on display; the year and month controls are put back to it
+        # when they are set to a month that cannot be shown
+        self.month_grid = None
+        self.prefetch_pending = set()
+        self.prefetch_requests = queue.Queue()
+        self.prefetch_results = queue.Queue()
+        self.render_pending = False
+        threading.Thread(target=self.prefetch_worker, daemon=True).start()
+        
         # Create UI
         self.setup_ui()
         self.update_calendar()
+        self.root.after(PREFETCH_POLL_MS, self.poll_prefetch)
     
     def setup_ui(self):
         """Set up user interface"""
@@ -35,8 +56,8 @@ class CalendarApp:
         # Year and month display and selection
         ttk.Label(control_frame, text="Year:").pack(side=tk.LEFT, padx=5)
         self.year_var = tk.StringVar(value=str(self.year))
-        year_spinbox = ttk.Spinbox(control_frame, from_=1900, to=2100, textvariable=self.year_var,
-                                    width=8, command=self.on_year_changed)
+        year_spinbox = ttk.Spinbox(control_frame, from_=EXTENDED_FIRST_YEAR, to=EXTENDED_LAST_YEAR,
+                                    textvariable=self.year_var, width=8, command=self.on_year_changed)
         year_spinbox.pack(side=tk.LEFT, padx=5)
         
         ttk.Label(control_frame, text="Month:").pack(side=tk.LEFT, padx=5)
@@ -80,6 +101,10 @@ class CalendarApp:
         scrollbar = ttk.Scrollbar(right_frame, orient=tk.VERTICAL, command=self.info_text.yview)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         self.info_text.config(yscrollcommand=scrollbar.set)
+        
+        # Page Up / Page Down step through months
+        self.root.bind("<Prior>", lambda event: self.prev_month())
+        self.root.bind("<Next>", lambda event: self.next_month())
     
     def create_gregorian_calendar(self, parent):
         """Create Gregorian calendar display section"""
@@ -94,15 +119,20 @@ class CalendarApp:
                             justify=tk.CENTER, anchor=tk.CENTER)
             label.grid(row=0, column=i, sticky="nsew", padx=1, pady=1)
         
-        # Create date button grid
+        # Create date button grid; each button knows the day it shows through
+        # button_days and its last (text, state, bg) through button_content
         self.day_buttons = {}
+        self.button_days = {}
+        self.button_content = {}
         for week in range(6):
             for day in range(7):
                 btn = tk.Button(cal_frame, text="", relief=tk.RAISED, borderwidth=1,
-                              font=("Arial", 10), height=5, width=12)
+                              font=("Arial", 10), height=5, width=12,
+                              command=lambda key=(week, day): self.on_day_clicked(key))
                 btn.grid(row=week + 1, column=day, sticky="nsew", padx=1, pady=1)
                 self.day_buttons[(week, day)] = btn
-                btn.bind("<Button-1>", self.on_day_clicked)
+                self.button_days[(week, day)] = None
+                self.button_content[(week, day)] = None
         
         # Set grid weights
         for i in range(7):
@@ -114,81 +144,163 @@ class CalendarApp:
     
     def update_calendar(self):
         """Update calendar display"""
+        self.render_pending = False
         try:
             self.year = int(self.year_var.get())
             self.month = int(self.month_var.get())
         except ValueError:
+            self.restore_displayed_month()
             return
         
-        # Get calendar for the month
-        cal = calendar.monthcalendar(self.year, self.month)
+        grid = self.month_grids.get((self.year, self.month))
+        if grid is None:
+            try:
+                grid = get_month_grid(self.year, self.month)
+            except ValueError:
+                self.restore_displayed_month()
+                return
+            self.month_grids[(self.year, self.month)] = grid
+        self.month_grid = grid
+        weeks = grid.weeks()
         
-        # Clear date list
-        days_in_month = calendar.monthrange(self.year, self.month)[1]
-        day_list = []
-        
-        # Fill date buttons
-        for week_num, week in enumerate(cal):
-            for day_num, day in enumerate(week):
-                button = self.day_buttons[(week_num, day_num)]
-                if day == 0:
-                    button.config(text="", state=tk.DISABLED, bg="lightgray")
+        # Fill date buttons; rows past the last week are cleared. Only
+        # buttons whose content changed are reconfigured.
+        for week_num in range(6):
+            week = weeks[week_num] if week_num < len(weeks) else [None] * 7
+            for day_num, grid_day in enumerate(week):
+                key = (week_num, day_num)
+                if grid_day is None:
+                    self.button_days[key] = None
+                    content = ("", tk.DISABLED, "lightgray")
                 else:
-                    day_list.append(day)
-                    lunar_y, lunar_m, lunar_d = solar_to_lunar(self.year, self.month, day)
-                    lunar_str = format_lunar(lunar_y, lunar_m, lunar_d)
-                    holiday = get_holiday_mark(self.month, day, lunar_m, lunar_d, self.year)
+                    day = grid_day.day
+                    holiday = grid_day.greg_holiday or grid_day.lunar_holiday
                     
                     # Set button text
-                    text = f"{day}\n{lunar_str}"
+                    text = f"{day}\n{grid_day.lunar}"
                     if holiday:
                         text += f"\n【{holiday}】"
-                    
-                    button.config(text=text, command=lambda d=day: self.select_day(d),
-                                state=tk.NORMAL, bg="white", fg="black")
+                    if grid_day.solar_term:
+                        text += f"\n{grid_day.solar_term}"
                     
                     # Highlight today
-                    if (self.year == self.current_date.year and
-                        self.month == self.current_date.month and
-                        day == self.current_date.day):
-                        button.config(bg="yellow")
+                    is_today = (self.year == self.current_date.year and
+                                self.month == self.current_date.month and
+                                day == self.current_date.day)
+                    self.button_days[key] = day
+                    content = (text, tk.NORMAL, "yellow" if is_today else "white")
+                
+                if content != self.button_content[key]:
+                    text, state, bg = content
+                    self.day_buttons[key].config(text=text, state=state, bg=bg, fg="black")
+                    self.button_content[key] = content
         
         # Update date dropdown
-        self.day_combo.config(values=[f"{d}" for d in day_list])
-        if day_list:
-            self.day_combo.current(0)
-            self.select_day(day_list[0])
+        day_values = tuple(f"{grid_day.day}" for grid_day in grid.days)
+        if tuple(self.day_combo.cget("values")) != day_values:
+            self.day_combo.config(values=day_values)
+        self.day_combo.current(0)
+        self.select_day(1)
+        
+        self.request_prefetch()
+    
+    def restore_displayed_month(self):
+        """Set the year and month back to those of the grid on display"""
+        if self.month_grid is None:
+            return
+        self.year, self.month = self.month_grid.year, self.month_grid.month
+        self.year_var.set(str(self.year))
+        self.month_var.set(str(self.month))
+    
+    def schedule_update(self):
+        """Render once the pending events are handled
+        
+        Holding down a navigation key queues key events faster than they may
+        be drawn; coalescing them means only the latest month is rendered.
+        """
+        if not self.render_pending:
+            self.render_pending = True
+            self.root.after_idle(self.update_calendar)
+    
+    def request_prefetch(self):
+        """Queue the months around the displayed one that are not computed yet"""
+        index = self.year * 12 + self.month - 1
+        for offset in range(1, PREFETCH_RADIUS + 1):
+            for neighbour in (index + offset, index - offset):
+                key = (neighbour // 12, neighbour % 12 + 1)
+                if not EXTENDED_FIRST_YEAR <= key[0] <= EXTENDED_LAST_YEAR:
+                    continue
+                if key not in self.month_grids and key not in self.prefetch_pending:
+                    self.prefetch_pending.add(key)
+                    self.prefetch_requests.put(key)
+    
+    def prefetch_worker(self):
+        """Compute requested months off the main loop (prefetch thread)"""
+        while True:
+            year, month = self.prefetch_requests.get()
+            try:
+                grid = get_month_grid(year, month)
+            except ValueError:
+                grid = None
+            self.prefetch_results.put(((year, month), grid))
+    
+    def poll_prefetch(self):
+        """Move months computed by the prefetch thread into the month cache"""
+        while True:
+            try:
+                key, grid = self.prefetch_results.get_nowait()
+            except queue.Empty:
+                break
+            self.prefetch_pending.discard(key)
+            if grid is not None:
+                self.month_grids[key] = grid
+        
+        if len(self.month_grids) > MONTH_CACHE_SIZE:
+            index = self.year * 12 + self.month - 1
+            by_distance = sorted(self.month_grids, key=lambda key: abs(key[0] * 12 + key[1] - 1 - index))
+            for key in by_distance[MONTH_CACHE_SIZE:]:
+                del self.month_grids[key]
+        self.root.after(PREFETCH_POLL_MS, self.poll_prefetch)
     
     def select_day(self, day):
         """Select a day"""
         if day == 0:
             return
         
-        lunar_y, lunar_m, lunar_d = solar_to_lunar(self.year, self.month, day)
-        self.display_day_info(self.year, self.month, day, lunar_y, lunar_m, lunar_d)
+        self.display_day_info(self.year, self.month, self.month_grid.days[day - 1])
     
-    def display_day_info(self, g_year, g_month, g_day, l_year, l_month, l_day):
+    def display_day_info(self, g_year, g_month, grid_day):
         """Display detailed information for specified date"""
         self.info_text.config(state=tk.NORMAL)
         self.info_text.delete(1.0, tk.END)
         
         # Get weekday
-        date_obj = datetime.date(g_year, g_month, g_day)
         days_of_week = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
-        weekday = days_of_week[date_obj.weekday()]
+        weekday = days_of_week[grid_day.weekday]
         
         # Build information text
         info = f"Gregorian Date\n{'='*20}\n"
-        info += f"{g_year}-{g_month:02d}-{g_day:02d}\n"
+        info += f"{g_year}-{g_month:02d}-{grid_day.day:02d}\n"
         info += f"{weekday}\n\n"
         
         info += f"Lunar Date\n{'='*20}\n"
-        info += f"{l_year}\n"
-        info += format_lunar(l_year, l_month, l_day) + "\n\n"
+        info += f"{grid_day.lunar_year}\n"
+        info += grid_day.lunar + "\n"
+        info += f"{grid_day.lunar_month_days}-day month\n\n"
+        
+        info += f"Almanac\n{'='*20}\n"
+        info += f"{grid_day.year_ganzhi}年 {grid_day.month_ganzhi}月 {grid_day.day_ganzhi}日\n"
+        info += f"Year of the {grid_day.zodiac}\n\n"
+        
+        # Display solar term (the one starting today, else the current one)
+        if grid_day.solar_term:
+            info += f"Solar Term\n{'='*20}\n{grid_day.solar_term} begins\n\n"
+        else:
+            info += f"Solar Term\n{'='*20}\n{grid_day.current_term}\n\n"
         
         # Display holidays
-        greg_holiday = get_gregorian_holiday(g_month, g_day, g_year)
-        lunar_holiday = get_lunar_holiday(l_month, l_day)
+        greg_holiday = grid_day.greg_holiday
+        lunar_holiday = grid_day.lunar_holiday
         
         info += f"Holiday Info\n{'='*20}\n"
         if greg_holiday or lunar_holiday:
@@ -202,12 +314,10 @@ class CalendarApp:
         self.info_text.insert(tk.END, info)
         self.info_text.config(state=tk.DISABLED)
     
-    def on_day_clicked(self, event):
+    def on_day_clicked(self, key):
         """Handle date button click event"""
-        widget = event.widget
-        text = widget.cget("text")
-        if text and text.split("\n")[0].isdigit():
-            day = int(text.split("\n")[0])
+        day = self.button_days[key]
+        if day:
             self.select_day(day)
             self.day_var.set(f"{day}")
     
@@ -228,6 +338,8 @@ class CalendarApp:
     
     def prev_month(self):
         """Previous month"""
+        if (self.year, self.month) <= (EXTENDED_FIRST_YEAR, 1):
+            return
         if self.month == 1:
             self.year -= 1
             self.month = 12
@@ -235,10 +347,12 @@ class CalendarApp:
             self.month -= 1
         self.year_var.set(str(self.year))
         self.month_var.set(str(self.month))
-        self.update_calendar()
+        self.schedule_update()
     
     def next_month(self):
         """Next month"""
+        if (self.year, self.month) >= (EXTENDED_LAST_YEAR, 12):
+            return
         if self.month == 12:
             self.year += 1
             self.month = 1
@@ -246,7 +360,7 @@ class CalendarApp:
             self.month += 1
         self.year_var.set(str(self.year))
         self.month_var.set(str(self.month))
-        self.update_calendar()
+        self.schedule_update()
     
     def go_to_today(self):
         """Go to today"""
@@ -0,0 +1,203 @@
+# Holiday index - all holidays of 1900-2100 compiled into date-sorted arrays
+import datetime
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+import holidays
+from lunar_calendar import lunar_to_solar, lunar_month_days
+
+INDEX_FIRST_YEAR = 1900
+INDEX_LAST_YEAR = 2100
+
+# Holiday kinds: official Gregorian schedule, lunar festival, or computed
+# from the calendar (New Year's Eve is the last day of the lunar year)
+KIND_GREGORIAN = 'gregorian'
+KIND_LUNAR = 'lunar'
+KIND_COMPUTED = 'computed'
+
+Holiday = namedtuple('Holiday', ['date', 'name', 'kind'])
+
+# Array fields of an index, as used by fields() and from_fields()
+INDEX_FIELDS = ('ordinals', 'year_starts', 'month_start_ordinals', 'month_starts', 'month_bitmaps')
+
+_FIRST_ORDINAL = datetime.date(INDEX_FIRST_YEAR, 1, 1).toordinal()
+_LAST_ORDINAL = datetime.date(INDEX_LAST_YEAR, 12, 31).toordinal()
+
+
+class HolidayIndex:
+    """Holidays sorted by ordinal day, with per-year slices and month bitmaps"""
+
+    def __init__(self, gregorian_by_year, lunar_holidays, version=None):
+        entries = []
+
+        for year, days in gregorian_by_year.items():
+            if INDEX_FIRST_YEAR <= year <= INDEX_LAST_YEAR:
+                for (month, day), name in days.items():
+                    entries.append((datetime.date(year, month, day).toordinal(), KIND_GREGORIAN, name))
+
+        # January of the first year still belongs to the previous lunar year
+        for lunar_year in range(INDEX_FIRST_YEAR - 1, INDEX_LAST_YEAR + 1):
+            for (month, day), name in lunar_holidays.items():
+                if day <= lunar_month_days(lunar_year, month):
+                    entries.append((datetime.date(*lunar_to_solar(lunar_year, month, day)).toordinal(),
+                                    KIND_LUNAR, name))
+            new_year = lunar_to_solar(lunar_year + 1, 1, 1) if lunar_year < INDEX_LAST_YEAR else None
+            if new_year and lunar_month_days(lunar_year, 12) == 29:
+                entries.append((datetime.date(*new_year).toordinal() - 1, KIND_COMPUTED, "New Year's Eve"))
+
+        entries = sorted(entry for entry in entries if _FIRST_ORDINAL <= entry[0] <= _LAST_ORDINAL)
+        self.version = version
+        self.ordinals = array('i', [entry[0] for entry in entries])
+        self.kinds = [entry[1] for entry in entries]
+        self.names = [entry[2] for entry in entries]
+
+        # Start offset of each year's slice, plus a final end offset
+        self.year_starts = array('i', [
+            bisect_left(self.ordinals, datetime.date(year, 1, 1).toordinal())
+            for year in range(INDEX_FIRST_YEAR, INDEX_LAST_YEAR + 2)
+        ])
+
+        # Start offset of each month's slice, plus a final end offset
+        self.month_start_ordinals = array('i', [
+            datetime.date(year, month, 1).toordinal()
+            for year in range(INDEX_FIRST_YEAR, INDEX_LAST_YEAR + 1) for month in range(1, 13)
+        ] + [datetime.date(INDEX_LAST_YEAR + 1, 1, 1).toordinal()])
+        self.month_starts = array('i', [bisect_left(self.ordinals, ordinal)
+                                        for ordinal in self.month_start_ordinals])
+
+        # One bit per day of month (bit 0 is the 1st) for each month
+        self.month_bitmaps = array('I', [0]) * ((INDEX_LAST_YEAR - INDEX_FIRST_YEAR + 1) * 12)
+        for ordinal in self.ordinals:
+            date = datetime.date.fromordinal(ordinal)
+            self.month_bitmaps[(date.year - INDEX_FIRST_YEAR) * 12 + date.month - 1] |= 1 << (date.day - 1)
+
+    def fields(self):
+        """Array fields by name plus the kinds and names lists, for writing to a file"""
+        data = {name: getattr(self, name) for name in INDEX_FIELDS}
+        data['kinds'], data['names'] = self.kinds, self.names
+        return data
+
+    @classmethod
+    def from_fields(cls, fields, version=None):
+        """Create an index from prebuilt fields (e.g. memoryviews of a shared file)"""
+        index = cls.__new__(cls)
+        index.version = version
+        for name in INDEX_FIELDS + ('kinds', 'names'):
+            setattr(index, name, fields[name])
+        return index
+
+    def _holidays(self, lo, hi):
+        return [Holiday(datetime.date.fromordinal(self.ordinals[i]), self.names[i], self.kinds[i])
+                for i in range(lo, hi)]
+
+    def between(self, start, end):
+        """Holidays from start to end (inclusive), in date order"""
+        lo = bisect_left(self.ordinals, start.toordinal())
+        hi = bisect_right(self.ordinals, end.toordinal())
+        return self._holidays(lo, hi)
+
+    def in_year(self, year):
+        """Holidays of a Gregorian year, in date order"""
+        if not INDEX_FIRST_YEAR <= year <= INDEX_LAST_YEAR:
+            return []
+        index = year - INDEX_FIRST_YEAR
+        return self._holidays(self.year_starts[index], self.year_starts[index + 1])
+
+    def month_names(self, year, month):
+        """Holiday names of a month by day: ({day: Gregorian holiday}, {day: lunar or computed festival})"""
+        gregorian, lunar = {}, {}
+        if not INDEX_FIRST_YEAR <= year <= INDEX_LAST_YEAR:
+            return gregorian, lunar
+        index = (year - INDEX_FIRST_YEAR) * 12 + month - 1
+        before_first = self.month_start_ordinals[index] - 1
+        ordinals, kinds, names = self.ordinals, self.kinds, self.names
+        for i in range(self.month_starts[index], self.month_starts[index + 1]):
+            names_by_day = gregorian if kinds[i] == KIND_GREGORIAN else lunar
+            names_by_day[ordinals[i] - before_first] = names[i]
+        return gregorian, lunar
+
+    def next_after(self, date):
+        """Holidays on the first holiday date strictly after date"""
+        lo = bisect_right(self.ordinals, date.toordinal())
+        if lo == len(self.ordinals):
+            return []
+        return self._holidays(lo, bisect_right(self.ordinals, self.ordinals[lo]))
+
+    def month_bitmap(self, year, month):
+        """Bitmap of holiday days in a month (bit 0 is the 1st)"""
+        if not INDEX_FIRST_YEAR <= year <= INDEX_LAST_YEAR:
+            return 0
+        return self.month_bitmaps[(year - INDEX_FIRST_YEAR) * 12 + month - 1]
+
+
+_index = None
+
+
+def build_index(data):
+    """Compile the index of a holidays.HolidayData"""
+    return HolidayIndex(data.gregorian, data.lunar, data.version)
+
+
+def install_index(index):
+    """Use a prebuilt index; it is replaced when the holiday data version changes"""
+    global _index
+    _index = index
+
+
+def get_index():
+    """Get the holiday index, rebuilding it when the holiday data version changes"""
+    global _index
+    index = _index
+    version = holidays.HOLIDAY_DATA_VERSION
+    if index is None or index.version != version:
+        data = holidays.get_holiday_data()
+        index = HolidayIndex(data.gregorian, data.lunar, version)
+        _index = index
+    return index
+
+
+def holidays_between(start, end):
+    """
+    Get all holidays between two dates
+
+    Args:
+        start: First datetime.date
+        end: Last datetime.date (inclusive)
+
+    Returns:
+        List of Holiday(date, name, kind) in date order
+    """
+    return get_index().between(start, end)
+
+
+def holiday_names_in_month(year, month):
+    """
+    Get the holiday names of a Gregorian month by day
+
+    Args:
+        year: Gregorian year
+        month: Gregorian month
+
+    Returns:
+        ({day: Gregorian holiday name}, {day: lunar festival name})
+    """
+    return get_index().month_names(year, month)
+
+
+def next_holiday(date):
+    """
+    Get the next holiday after a date
+
+    Args:
+        date: datetime.date
+
+    Returns:
+        List of Holiday on the next holiday date (several may share a day),
+        empty if there is none before the end of 2100
+    """
+    return get_index().next_after(date)
+
+
+def holiday_month_bitmap(year, month):
+    """Get a bitmap of the days in a month that have a holiday (bit 0 is the 1st)"""
+    return get_index().month_bitmap(year, month)
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Holiday reload - Swap in edited holiday data without a restart
+
+reload_holidays() reads and validates data/holidays.csv and compiles the
+holiday index and working day table for it on the calling thread. Only then
+is the data installed, with one swap (holidays.install_holiday_data()). Month
+and response caches are keyed by HOLIDAY_DATA_VERSION, so they move to the
+new version with the swap, while a request that started before it keeps the
+tables it has already read. A file that fails validation is reported and the
+current data stays in place.
+
+Reloads are triggered by a watcher thread that polls the file's modification
+time (start_watcher(); with serve.py every worker runs its own) or by
+POST /api/admin/reload-holidays.
+
+    python holiday_reload.py check              # validate data/holidays.csv
+    python holiday_reload.py check new.csv      # validate another file
+"""
+
+import argparse
+import os
+import sys
+import threading
+from collections import namedtuple
+import holidays
+import holiday_index
+import metrics
+import workdays
+
+# Seconds between checks of the data file's modification time
+CHECK_INTERVAL = 5.0
+
+# Result of a reload: whether the data changed, and the versions after and before
+Reload = namedtuple('Reload', ['reloaded', 'version', 'previous_version'])
+
+# One reload at a time; requests never take it
+_lock = threading.Lock()
+
+
+def reload_holidays(path=None, force=False):
+    """
+    Load, validate and compile a holiday data file, then swap it in
+
+    Args:
+        path: Holiday data file (default: holidays.DATA_FILE)
+        force: Install the file even if its data version is the current one
+
+    Returns:
+        Reload(reloaded, version, previous_version)
+
+    Raises:
+        ValueError: If the file is invalid (the current data is kept)
+        OSError: If the file cannot be read
+    """
+    with _lock:
+        previous = holidays.get_holiday_data()
+        try:
+            data = holidays.load_holiday_data(path or holidays.DATA_FILE)
+        except (OSError, ValueError):
+            metrics.inc(metrics.HOLIDAY_RELOADS, (('result', 'error'),))
+            raise
+        if data.version == previous.version and not force:
+            metrics.inc(metrics.HOLIDAY_RELOADS, (('result', 'unchanged'),))
+            return Reload(False, previous.version, previous.version)
+
+        with metrics.stage('holiday_compile'):
+            index = holiday_index.build_index(data)
+            table = workdays.build_table(data)
+        holidays.install_holiday_data(data)
+        # A request between these lines finds no index for the new version
+        # and builds the same one itself
+        holiday_index.install_index(index)
+        workdays.install_table(table)
+        metrics.inc(metrics.HOLIDAY_RELOADS, (('result', 'reloaded'),))
+        return Reload(True, data.version, previous.version)
+
+
+def _file_state(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _watch(path, interval, stop, last):
+    while not stop.wait(interval):
+        state = _file_state(path)
+        if state is None or state == last:
+            continue
+        # Wait until the file has stayed the same for one interval, so a
+        # file still being written is not read half-way
+        if stop.wait(interval) or _file_state(path) != state:
+            continue
+        last = state
+        try:
+            result = reload_holidays(path)
+        except (OSError, ValueError) as e:
+            print(f"Holiday data not reloaded: {e}", file=sys.stderr, flush=True)
+        else:
+            if result.reloaded:
+                print(f"Holiday data reloaded: version {result.version}", flush=True)
+
+
+def start_watcher(path=None, interval=CHECK_INTERVAL):
+    """
+    Reload the holiday data whenever its file changes, on a daemon thread
+
+    Returns:
+        threading.Event that stops the watcher when set
+    """
+    path = path or holidays.DATA_FILE
+    stop = threading.Event()
+    thread = threading.Thread(target=_watch, args=(path, interval, stop, _file_state(path)),
+                              name='holiday-watcher', daemon=True)
+    thread.start()
+    return stop
+
+
+def main(argv=None):
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Holiday data tools")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    check = subparsers.add_parser('check', help="Validate a holiday data file")
+    check.add_argument('path', nargs='?', default=holidays.DATA_FILE)
+    args = parser.parse_args(argv)
+
+    try:
+        data = holidays.load_holiday_data(args.path)
+    except (OSError, ValueError) as e:
+        print(e, file=sys.stderr)
+        return 1
+    years = ', '.join(map(str, sorted(data.gregorian.keys() | data.adjusted.keys())))
+    print(f"{args.path}: version {data.version}, {sum(map(len, data.gregorian.values()))} holidays and "
+          f"{sum(map(len, data.adjusted.values()))} working days ({years}), {len(data.lunar)} lunar festivals")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,164 +1,115 @@
 # Chinese holidays and festivals data by year
 # Based on official China State Council holiday announcements
+#
+# The schedules are kept in data/holidays.csv, one row per day:
+#   holiday,2024-02-10,Spring Festival   official day off
+#   workday,2024-02-04,Spring Festival   make-up working day (调休)
+#   lunar,08-15,Mid-Autumn Festival      lunar festival, by lunar month and day
+# Add a newly announced year there; running servers pick it up through
+# holiday_reload.py without a restart.
+import datetime
+import hashlib
+import os
+from collections import namedtuple
 
-# Year-specific Gregorian holidays (month, day): holiday_name
-GREGORIAN_HOLIDAYS_BY_YEAR = {
-    2023: {
-        # New Year's Day holiday span: 2022-12-31 to 2023-01-02 (include Jan 1-2 in 2023)
-        (1, 1): "New Year's Day",
-        (1, 2): "New Year's Day",
-        # Spring Festival: Jan 21 - Jan 27, 2023 (7 days)
-        (1, 21): "Spring Festival",
-        (1, 22): "Spring Festival",
-        (1, 23): "Spring Festival",
-        (1, 24): "Spring Festival",
-        (1, 25): "Spring Festival",
-        (1, 26): "Spring Festival",
-        (1, 27): "Spring Festival",
-        # Qingming: Apr 5, 2023
-        (4, 5): "Qingming Festival",
-        # Labor Day: Apr 29 - May 3, 2023
-        (4, 29): "Labor Day",
-        (4, 30): "Labor Day",
-        (5, 1): "Labor Day",
-        (5, 2): "Labor Day",
-        (5, 3): "Labor Day",
-        # Dragon Boat: Jun 22 - Jun 24, 2023
-        (6, 22): "Dragon Boat Festival",
-        (6, 23): "Dragon Boat Festival",
-        (6, 24): "Dragon Boat Festival",
-        # Mid-Autumn & National Day combined: Sep 29 - Oct 6, 2023
-        (9, 29): "National Day",
-        (9, 30): "National Day",
-        (10, 1): "National Day",
-        (10, 2): "National Day",
-        (10, 3): "National Day",
-        (10, 4): "National Day",
-        (10, 5): "National Day",
-        (10, 6): "National Day",
-    },
-    2024: {
-        (1, 1): "New Year's Day",
-        (2, 10): "Spring Festival",
-        (2, 11): "Spring Festival",
-        (2, 12): "Spring Festival",
-        (2, 13): "Spring Festival",
-        (2, 14): "Spring Festival",
-        (2, 15): "Spring Festival",
-        (2, 16): "Spring Festival",
-        (2, 17): "Spring Festival",
-        (4, 4): "Qingming Festival",
-        (4, 5): "Qingming Festival",
-        (4, 6): "Qingming Festival",
-        (5, 1): "Labor Day",
-        (5, 2): "Labor Day",
-        (5, 3): "Labor Day",
-        (5, 4): "Labor Day",
-        (5, 5): "Labor Day",
-        (6, 10): "Dragon Boat Festival",
-        (9, 15): "Mid-Autumn Festival",
-        (9, 16): "Mid-Autumn Festival",
-        (9, 17): "Mid-Autumn Festival",
-        (10, 1): "National Day",
-        (10, 2): "National Day",
-        (10, 3): "National Day",
-        (10, 4): "National Day",
-        (10, 5): "National Day",
-        (10, 6): "National Day",
-        (10, 7): "National Day",
-    },
-    2025: {
-        (1, 1): "New Year's Day",
-        # Spring Festival: Jan 28 - Feb 4, 2025 (8 days)
-        (1, 28): "Spring Festival",
-        (1, 29): "Spring Festival",
-        (1, 30): "Spring Festival",
-        (1, 31): "Spring Festival",
-        (2, 1): "Spring Festival",
-        (2, 2): "Spring Festival",
-        (2, 3): "Spring Festival",
-        (2, 4): "Spring Festival",
-        (4, 4): "Qingming Festival",
-        (4, 5): "Qingming Festival",
-        (4, 6): "Qingming Festival",
-        (5, 1): "Labor Day",
-        (5, 2): "Labor Day",
-        (5, 3): "Labor Day",
-        (5, 4): "Labor Day",
-        (5, 5): "Labor Day",
-        # Dragon Boat (端午): May 31 - Jun 2, 2025
-        (5, 31): "Dragon Boat Festival",
-        (6, 1): "Dragon Boat Festival",
-        (6, 2): "Dragon Boat Festival",
-        # Mid-Autumn and National Day combined holiday: Oct 1 - Oct 8, 2025
-        (10, 1): "National Day",
-        (10, 2): "National Day",
-        (10, 3): "National Day",
-        (10, 4): "National Day",
-        (10, 5): "National Day",
-        (10, 6): "National Day",
-        (10, 7): "National Day",
-        (10, 8): "National Day",
-    },
-    2026: {
-        (1, 1): "New Year's Day",
-        (1, 2): "New Year's Day",
-        (1, 3): "New Year's Day",
-        # Spring Festival: Feb 15 - Feb 23, 2026 (9 days)
-        (2, 15): "Spring Festival",
-        (2, 16): "Spring Festival",
-        (2, 17): "Spring Festival",
-        (2, 18): "Spring Festival",
-        (2, 19): "Spring Festival",
-        (2, 20): "Spring Festival",
-        (2, 21): "Spring Festival",
-        (2, 22): "Spring Festival",
-        (2, 23): "Spring Festival",
-        (4, 4): "Qingming Festival",
-        (4, 5): "Qingming Festival",
-        (4, 6): "Qingming Festival",
-        (5, 1): "Labor Day",
-        (5, 2): "Labor Day",
-        (5, 3): "Labor Day",
-        (5, 4): "Labor Day",
-        (5, 5): "Labor Day",
-        # Dragon Boat: Jun 19 - Jun 21, 2026
-        (6, 19): "Dragon Boat Festival",
-        (6, 20): "Dragon Boat Festival",
-        (6, 21): "Dragon Boat Festival",
-        # Mid-Autumn: Sep 25 - Sep 27, 2026
-        (9, 25): "Mid-Autumn Festival",
-        (9, 26): "Mid-Autumn Festival",
-        (9, 27): "Mid-Autumn Festival",
-        (10, 1): "National Day",
-        (10, 2): "National Day",
-        (10, 3): "National Day",
-        (10, 4): "National Day",
-        (10, 5): "National Day",
-        (10, 6): "National Day",
-        (10, 7): "National Day",
-    },
-}
-
-# Lunar holidays and traditional festivals
-LUNAR_HOLIDAYS = {
-    (1, 1): "Spring Festival",
-    (1, 15): "Lantern Festival",
-    (5, 5): "Dragon Boat Festival",
-    (7, 15): "Ghost Festival",
-    (8, 15): "Mid-Autumn Festival",
-    (9, 9): "Double Ninth Festival",
-    (12, 8): "Laba Festival",
-    (12, 30): "New Year's Eve",
-}
-
-# Twenty-four Solar Terms
-SOLAR_TERMS_CN = {
+DATA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'holidays.csv')
+
+KIND_HOLIDAY = 'holiday'
+KIND_WORKDAY = 'workday'
+KIND_LUNAR = 'lunar'
+
+# One loaded holiday data file: Gregorian holidays and make-up working days
+# as {year: {(month, day): holiday_name}}, lunar festivals as
+# {(lunar_month, lunar_day): name}, the data version and the file's
+# modification time
+HolidayData = namedtuple('HolidayData', ['gregorian', 'adjusted', 'lunar', 'version', 'modified'])
+
+# Twenty-four Solar Terms, in lunarcalendar.solarterm order (starting at Spring Begins)
+SOLAR_TERMS_CN = [
     "Spring Begins", "Rain Water", "Insects Awakened", "Spring Equinox", "Pure Brightness", "Grain Rain",
     "Summer Begins", "Grain Fill", "Grain in Ear", "Summer Solstice", "Minor Heat", "Major Heat",
     "Autumn Begins", "Heat Ends", "White Dew", "Autumn Equinox", "Cold Dew", "Frost Descent",
     "Winter Begins", "Minor Snow", "Major Snow", "Winter Solstice", "Minor Cold", "Major Cold"
-}
+]
+
+def _data_version(gregorian, adjusted, lunar):
+    """Short digest of the holiday tables, used to key response caches"""
+    data = repr((sorted(gregorian.items()), sorted(adjusted.items()), sorted(lunar.items())))
+    return hashlib.sha1(data.encode('utf-8')).hexdigest()[:12]
+
+def load_holiday_data(path=DATA_FILE):
+    """Read and validate a holiday data file
+
+    Returns:
+        HolidayData
+
+    Raises:
+        ValueError: If a row is malformed, a day is listed twice, or a day
+            is both a holiday and a make-up working day
+    """
+    gregorian, adjusted, lunar = {}, {}, {}
+    modified = os.path.getmtime(path)
+    # Plain dates and names only; split by hand like lunar_calendar.load_years
+    with open(path, encoding='utf-8') as f:
+        lines = f.read().splitlines()
+    for line_number, line in enumerate(lines[1:], 2):
+        if not line.strip():
+            continue
+        kind, _, rest = line.partition(',')
+        text, _, name = rest.partition(',')
+        name = name.strip()
+        try:
+            if not name:
+                raise ValueError("missing holiday name")
+            if kind == KIND_LUNAR:
+                month, day = (int(part) for part in text.split('-'))
+                if not (1 <= month <= 12 and 1 <= day <= 30):
+                    raise ValueError(f"invalid lunar date {text!r}")
+                days = lunar
+            elif kind in (KIND_HOLIDAY, KIND_WORKDAY):
+                date = datetime.date.fromisoformat(text)
+                month, day = date.month, date.day
+                days = (gregorian if kind == KIND_HOLIDAY else adjusted).setdefault(date.year, {})
+            else:
+                raise ValueError(f"unknown kind {kind!r}")
+        except ValueError as e:
+            raise ValueError(f"{path}, line {line_number}: {e}") from None
+        if (month, day) in days:
+            raise ValueError(f"{path}, line {line_number}: {text} is listed twice")
+        days[(month, day)] = name
+
+    for year, days in adjusted.items():
+        both = sorted(days.keys() & gregorian.get(year, {}).keys())
+        if both:
+            month, day = both[0]
+            raise ValueError(f"{path}: {datetime.date(year, month, day)} is both a holiday and a working day")
+    return HolidayData(gregorian, adjusted, lunar, _data_version(gregorian, adjusted, lunar), modified)
+
+def get_holiday_data():
+    """The installed HolidayData; its tables, version and time always belong together"""
+    return _data
+
+def install_holiday_data(data):
+    """Make a loaded HolidayData the current holiday data
+
+    The snapshot is swapped in before the module-level names and the
+    version last, so code that reads HOLIDAY_DATA_VERSION and then the
+    tables never pairs a new version with old tables.
+    """
+    global _data, GREGORIAN_HOLIDAYS_BY_YEAR, ADJUSTED_WORKDAYS_BY_YEAR, LUNAR_HOLIDAYS
+    global HOLIDAY_DATA_VERSION, HOLIDAY_DATA_MODIFIED
+    _data = data
+    GREGORIAN_HOLIDAYS_BY_YEAR, ADJUSTED_WORKDAYS_BY_YEAR, LUNAR_HOLIDAYS = data.gregorian, data.adjusted, data.lunar
+    HOLIDAY_DATA_MODIFIED = data.modified
+    HOLIDAY_DATA_VERSION = data.version
+
+# Year-specific Gregorian holidays and make-up working days
+# ({year: {(month, day): holiday_name}}), lunar holidays and traditional
+# festivals, and the data version and modification time exposed for HTTP
+# caching; replaced together by install_holiday_data()
+_data = GREGORIAN_HOLIDAYS_BY_YEAR = ADJUSTED_WORKDAYS_BY_YEAR = LUNAR_HOLIDAYS = None
+HOLIDAY_DATA_VERSION = HOLIDAY_DATA_MODIFIED = None
+install_holiday_data(load_holiday_data())
 
 def get_gregorian_holiday(month, day, year=None):
     """Get Gregorian holiday for a specific date
@@ -169,21 +120,45 @@ def get_gregorian_holiday(month, day, year=None):
         year: Year (optional, defaults to current year if not provided)
     
     Returns:
-        Holiday name string or empty string if not a holiday
+        Holiday name string or empty string if not a holiday (always empty
+        for years without an announced schedule)
     """
     if year is None:
-        from datetime import date
-        year = date.today().year
+        year = datetime.date.today().year
     
-    # Get holidays for the year, default to current year's structure if year not in data
-    holidays = GREGORIAN_HOLIDAYS_BY_YEAR.get(year, GREGORIAN_HOLIDAYS_BY_YEAR.get(2026, {}))
+    # Official holiday schedules only exist for announced years
+    holidays = GREGORIAN_HOLIDAYS_BY_YEAR.get(year, {})
     return holidays.get((month, day), "")
 
-def get_lunar_holiday(lunar_month, lunar_day):
-    """Get Lunar holiday"""
+def get_adjusted_workday(month, day, year):
+    """Get the holiday a make-up working day compensates for
+    
+    Returns:
+        Holiday name string or empty string if not a make-up working day
+    """
+    return ADJUSTED_WORKDAYS_BY_YEAR.get(year, {}).get((month, day), "")
+
+def get_lunar_holiday(lunar_month, lunar_day, isleap=False, month_days=30):
+    """Get Lunar holiday
+    
+    Args:
+        lunar_month: Lunar month
+        lunar_day: Lunar day
+        isleap: Whether the date is in a leap month (festivals are never kept there)
+        month_days: Length of the Lunar month, so New Year's Eve is also found
+            on the 29th of a short 12th month
+    
+    Returns:
+        Holiday name string or empty string
+    """
+    if isleap:
+        return ""
+    # New Year's Eve is listed as (12, 30) but falls on the last day of the year
+    if lunar_month == 12 and lunar_day == month_days:
+        lunar_day = 30
     return LUNAR_HOLIDAYS.get((lunar_month, lunar_day), "")
 
-def get_holiday_mark(month, day, lunar_month, lunar_day, year=None):
+def get_holiday_mark(month, day, lunar_month, lunar_day, year=None, isleap=False, month_days=30):
     """Get holiday mark for the date
     
     Args:
@@ -192,12 +167,14 @@ def get_holiday_mark(month, day, lunar_month, lunar_day, year=None):
         lunar_month: Lunar month
         lunar_day: Lunar day
         year: Year (optional)
+        isleap: Whether the Lunar date is in a leap month
+        month_days: Length of the Lunar month
     
     Returns:
         Holiday name string or empty string
     """
     greg_holiday = get_gregorian_holiday(month, day, year)
-    lunar_holiday = get_lunar_holiday(lunar_month, lunar_day)
+    lunar_holiday = get_lunar_holiday(lunar_month, lunar_day, isleap, month_days)
     
     if greg_holiday:
         return greg_holiday
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ICS feed - Holidays, lunar festivals and solar terms as an iCalendar subscription
+
+The feed is streamed as one VEVENT block per year and category. Blocks are
+cached per holiday data version, so polls only rebuild them after the
+holiday data changes, and the ETag is known before anything is generated.
+"""
+
+import argparse
+import datetime
+import hashlib
+import sys
+import holidays
+import metrics
+from holiday_index import get_index, INDEX_FIRST_YEAR, INDEX_LAST_YEAR, KIND_GREGORIAN
+from lunar_calendar import solar_to_lunar, format_lunar
+from solar_terms import get_solar_terms
+
+# Event categories, in feed order
+FEED_CATEGORIES = ('gregorian', 'lunar', 'terms')
+CATEGORY_NAMES = {
+    'gregorian': 'Public Holiday',
+    'lunar': 'Lunar Festival',
+    'terms': 'Solar Term',
+}
+# Bumped when the generated text changes for the same data, so ETags change too
+FEED_FORMAT = 2
+# Longest content line before it is folded, in UTF-8 octets (RFC 5545 3.1)
+MAX_LINE_OCTETS = 75
+# Years around the current one included when the request does not say
+DEFAULT_YEARS_BEFORE = 1
+DEFAULT_YEARS_AFTER = 3
+# Cached blocks: every year and category
+YEAR_BLOCK_CACHE_SIZE = (INDEX_LAST_YEAR - INDEX_FIRST_YEAR + 1) * len(FEED_CATEGORIES)
+# How often subscribed clients are asked to refresh (RFC 7986 REFRESH-INTERVAL)
+REFRESH_INTERVAL = 'PT1H'
+ICS_MIMETYPE = 'text/calendar'
+
+
+def parse_feed_options(include=None, first_year=None, last_year=None, today=None):
+    """Validate feed options given as strings
+
+    Args:
+        include: Comma-separated categories (optional, defaults to all)
+        first_year: First year (optional, defaults to last year)
+        last_year: Last year (optional, defaults to three years ahead)
+        today: datetime.date the defaults are relative to (optional)
+
+    Returns:
+        (tuple of categories in feed order, first year, last year)
+
+    Raises:
+        ValueError: If any option is invalid
+    """
+    if include:
+        names = {name.strip() for name in include.split(',') if name.strip()}
+        unknown = sorted(names - set(FEED_CATEGORIES))
+        if unknown or not names:
+            raise ValueError(f"Unknown categories: {', '.join(unknown)}; available: {', '.join(FEED_CATEGORIES)}")
+        categories = tuple(name for name in FEED_CATEGORIES if name in names)
+    else:
+        categories = FEED_CATEGORIES
+
+    year = (today or datetime.date.today()).year
+    try:
+        first_year = int(first_year) if first_year else max(INDEX_FIRST_YEAR, year - DEFAULT_YEARS_BEFORE)
+        last_year = int(last_year) if last_year else min(INDEX_LAST_YEAR, year + DEFAULT_YEARS_AFTER)
+    except ValueError:
+        raise ValueError("Years must be given as YYYY")
+    if first_year < INDEX_FIRST_YEAR or last_year > INDEX_LAST_YEAR or last_year < first_year:
+        raise ValueError(f"Year range must lie within {INDEX_FIRST_YEAR} to {INDEX_LAST_YEAR}")
+
+    return categories, first_year, last_year
+
+
+def _escape(text):
+    return text.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\n', '\\n')
+
+
+def _line(text):
+    """A content line with its CRLF, folded at MAX_LINE_OCTETS without splitting a UTF-8 character"""
+    data = text.encode('utf-8')
+    if len(data) <= MAX_LINE_OCTETS:
+        return text + "\r\n"
+    parts = []
+    start, limit = 0, MAX_LINE_OCTETS
+    while len(data) - start > limit:
+        end = start + limit
+        # Back up to the first byte of a character
+        while data[end] & 0xC0 == 0x80:
+            end -= 1
+        parts.append(data[start:end].decode('utf-8'))
+        # Continuation lines start with a space, which counts towards the limit
+        start, limit = end, MAX_LINE_OCTETS - 1
+    parts.append(data[start:].decode('utf-8'))
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def _slug(text):
+    return ''.join(c if c.isalnum() else '-' for c in text.lower()).strip('-')
+
+
+def _dtstamp():
+    modified = datetime.datetime.fromtimestamp(holidays.HOLIDAY_DATA_MODIFIED, datetime.timezone.utc)
+    return modified.strftime('%Y%m%dT%H%M%SZ')
+
+
+def _event(category, name, start, days, dtstamp):
+    lunar = solar_to_lunar(start.year, start.month, start.day)
+    end = start + datetime.timedelta(days=days)
+    return (
+        "BEGIN:VEVENT\r\n"
+        + _line(f"UID:{start:%Y%m%d}-{category}-{_slug(name)}@gregorian-lunar-calendar")
+        + f"DTSTAMP:{dtstamp}\r\n"
+        f"DTSTART;VALUE=DATE:{start:%Y%m%d}\r\n"
+        f"DTEND;VALUE=DATE:{end:%Y%m%d}\r\n"
+        + _line(f"SUMMARY:{_escape(name)}")
+        + _line(f"DESCRIPTION:{_escape(f'Lunar {lunar.year} ' + format_lunar(*lunar[:3], lunar.isleap))}")
+        + _line(f"CATEGORIES:{_escape(CATEGORY_NAMES[category])}")
+        + "TRANSP:TRANSPARENT\r\n"
+        "END:VEVENT\r\n"
+    )
+
+
+def _year_events(year, category):
+    """(name, first date, number of days) for the events of a year and category"""
+    if category == 'terms':
+        return [(name, date, 1) for date, name in get_solar_terms(year)]
+
+    holidays_in_year = get_index().in_year(year)
+    if category == 'lunar':
+        return [(h.name, h.date, 1) for h in holidays_in_year if h.kind != KIND_GREGORIAN]
+
+    # Official holidays are listed per day; consecutive days of the same holiday become one event
+    events = []
+    for h in holidays_in_year:
+        if h.kind != KIND_GREGORIAN:
+            continue
+        if events and events[-1][0] == h.name and events[-1][1] + datetime.timedelta(days=events[-1][2]) == h.date:
+            events[-1] = (h.name, events[-1][1], events[-1][2] + 1)
+        else:
+            events.append((h.name, h.date, 1))
+    return events
+
+
+@metrics.counted_lru_cache(maxsize=YEAR_BLOCK_CACHE_SIZE)
+def _cached_year_block(year, category, holiday_version):
+    dtstamp = _dtstamp()
+    return ''.join(_event(category, name, start, days, dtstamp)
+                   for name, start, days in _year_events(year, category))
+
+
+def year_block(year, category, holiday_version=None):
+    """VEVENT text for one year and category, cached per holiday data version (default: the current one)"""
+    return _cached_year_block(year, category, holiday_version or holidays.HOLIDAY_DATA_VERSION)
+
+
+def feed_etag(categories, first_year, last_year, holiday_data=None):
+    """ETag of a feed, computed from its options and a holidays.HolidayData (default: current) without generating it"""
+    data = holiday_data or holidays.get_holiday_data()
+    key = repr((FEED_FORMAT, data.version, data.modified, tuple(categories), first_year, last_year))
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+def iter_feed(categories=FEED_CATEGORIES, first_year=INDEX_FIRST_YEAR, last_year=INDEX_LAST_YEAR,
+              holiday_data=None):
+    """Yield the feed as text chunks, one cached block per year and category
+
+    Pass the holidays.HolidayData the ETag was computed from, so a reload while
+    the feed streams cannot mix versions.
+    """
+    version = (holiday_data or holidays.get_holiday_data()).version
+    yield ("BEGIN:VCALENDAR\r\n"
+           "VERSION:2.0\r\n"
+           "PRODID:-//Gregorian-Lunar Calendar//Holidays and Solar Terms//EN\r\n"
+           "CALSCALE:GREGORIAN\r\n"
+           "METHOD:PUBLISH\r\n"
+           "X-WR-CALNAME:Gregorian-Lunar Calendar\r\n"
+           f"REFRESH-INTERVAL;VALUE=DURATION:{REFRESH_INTERVAL}\r\n"
+           f"X-PUBLISHED-TTL:{REFRESH_INTERVAL}\r\n")
+    for year in range(first_year, last_year + 1):
+        for category in categories:
+            yield year_block(year, category, version)
+    yield "END:VCALENDAR\r\n"
+
+
+def main(argv=None):
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Write the holiday and solar term calendar as an ICS file")
+    parser.add_argument('--include', help=f"Comma-separated categories (default: {','.join(FEED_CATEGORIES)})")
+    parser.add_argument('--from', dest='first_year', help="First year (default: last year)")
+    parser.add_argument('--to', dest='last_year', help="Last year (default: three years ahead)")
+    parser.add_argument('-o', '--output', help="Output file (default: standard output)")
+    args = parser.parse_args(argv)
+
+    try:
+        options = parse_feed_options(args.include, args.first_year, args.last_year)
+    except ValueError as e:
+        parser.error(str(e))
+
+    out = open(args.output, 'w', encoding='utf-8', newline='') if args.output else sys.stdout
+    try:
+        for chunk in iter_feed(*options):
+            out.write(chunk)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,29 +1,276 @@
 # Lunar calendar calculation module
-from lunarcalendar import Converter, Solar, Lunar
+import datetime
+import os
+import sys
+from array import array
+from collections import namedtuple
+
+# The tables are built from data/lunar_years.csv, extracted from the
+# lunarcalendar converter; lunarcalendar is only imported to regenerate it,
+# since its package also loads ephem, pytz and dateutil. Years outside the
+# tables are computed astronomically by astro_calendar and cached on disk.
+DATA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'lunar_years.csv')
+
+# Gregorian years served by the precomputed day table
+TABLE_FIRST_YEAR = 1900
+TABLE_LAST_YEAR = 2100
+
+# Gregorian years served by astronomically computed lunar years (astro_calendar)
+EXTENDED_FIRST_YEAR = 1600
+EXTENDED_LAST_YEAR = 2400
+
+# January 1900 still belongs to lunar year 1899, so the month table starts there
+_FIRST_LUNAR_YEAR = TABLE_FIRST_YEAR - 1
+_FIRST_ORDINAL = datetime.date(TABLE_FIRST_YEAR, 1, 1).toordinal()
+# Offset between numpy datetime64 day numbers and table offsets
+_EPOCH_OFFSET = datetime.date(1970, 1, 1).toordinal() - _FIRST_ORDINAL
+
+# Days before each Gregorian month (index 1-12, index 13 is the year length),
+# for common and leap years
+_DAYS_BEFORE_MONTH = (
+    (0, 0, 31, 59, 90, 120, 151, 181, 212, 243, 273, 304, 334, 365),
+    (0, 0, 31, 60, 91, 121, 152, 182, 213, 244, 274, 305, 335, 366),
+)
+
+# numpy module for the batch conversions, imported on first use:
+# None if it is not installed, False until checked
+_numpy = False
+
+# Precomputed tables, filled once by _build_tables()
+# Per Gregorian year: day offset of January 1st from _FIRST_ORDINAL
+_year_offsets = None
+# Per day: packed lunar date
+# (year << 11 | 30-day month << 10 | isleap << 9 | month << 5 | day)
+_lunar_days = None
+# Per day: packed Gregorian date (year << 9 | month << 5 | day)
+_solar_days = None
+# Per lunar year: leap month number (0 if none)
+_leap_months = None
+# Per lunar year, 13 slots in calendar order: first day offset and month length
+_month_starts = None
+_month_lengths = None
+# Lunar years outside the tables, loaded from astro_calendar on first use:
+# {lunar year: (ordinal of its new year, leap month, 13 month lengths)}
+_extended_years = {}
+
+
+def _is_leap_year(year):
+    return year % 4 == 0 and (year % 100 != 0 or year % 400 == 0)
+
+
+def _load_numpy():
+    global _numpy
+    if _numpy is False:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        _numpy = numpy
+    return _numpy
+
+
+def compute_years(first_year=_FIRST_LUNAR_YEAR, last_year=TABLE_LAST_YEAR):
+    """Read the lunar year data from the lunarcalendar converter
+
+    Returns:
+        List of (lunar year, datetime.date of its new year, leap month or 0,
+        13 month lengths in calendar order with 0 for a missing 13th month)
+    """
+    from lunarcalendar import Converter
+    base = Converter.solar_1_1[0]
+    years = []
+    for lunar_year in range(first_year, last_year + 1):
+        solar11 = Converter.solar_1_1[lunar_year - base]
+        bits = Converter.lunar_month_days[lunar_year - base]
+        leap = (bits >> 13) & 0xf
+        lengths = [30 if (bits >> (12 - slot)) & 1 else 29 for slot in range(13 if leap else 12)]
+        years.append((lunar_year, datetime.date(solar11 >> 9, (solar11 >> 5) & 0xf, solar11 & 0x1f),
+                      leap, lengths + [0] * (13 - len(lengths))))
+    return years
+
+
+def load_years(path=DATA_FILE):
+    """Read a lunar year data file
+
+    Returns:
+        List in the same form as compute_years()
+    """
+    # Plain numbers and dates only; split by hand since the csv module (and
+    # re, which it imports) would dominate the import time of this module
+    with open(path, encoding='utf-8') as f:
+        next(f)
+        rows = [line.rstrip('\n').split(',') for line in f if line.strip()]
+    return [(int(row[0]), datetime.date.fromisoformat(row[1]), int(row[2]), [int(v) for v in row[3:]])
+            for row in rows]
+
+
+def build_data_file(path=DATA_FILE):
+    """Extract the lunar year data from lunarcalendar and write the data file"""
+    import csv
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(['lunar_year', 'new_year', 'leap_month'] + [f'slot{i}' for i in range(1, 14)])
+        for lunar_year, new_year, leap, lengths in compute_years():
+            writer.writerow([lunar_year, new_year.isoformat(), leap] + lengths)
+
+
+def _build_tables():
+    """Build the day-indexed conversion tables from the lunar year data"""
+    global _year_offsets, _lunar_days, _solar_days
+    global _leap_months, _month_starts, _month_lengths
+
+    year_offsets = array('i')
+    solar_days = array('I')
+    for year in range(TABLE_FIRST_YEAR, TABLE_LAST_YEAR + 1):
+        year_offsets.append(len(solar_days))
+        before = _DAYS_BEFORE_MONTH[_is_leap_year(year)]
+        for month in range(1, 13):
+            for day in range(1, before[month + 1] - before[month] + 1):
+                solar_days.append(year << 9 | month << 5 | day)
+
+    total_days = len(solar_days)
+    lunar_days = array('I', [0]) * total_days
+    leap_months = array('B')
+    month_starts = array('i')
+    month_lengths = array('B')
+
+    years = load_years() if os.path.exists(DATA_FILE) else compute_years()
+    for lunar_year, new_year, leap, lengths in years:
+        leap_months.append(leap)
+
+        start = new_year.toordinal() - _FIRST_ORDINAL
+        for slot, length in enumerate(lengths):
+            month_starts.append(start)
+            month_lengths.append(length)
+            if not length:
+                continue
+
+            # Slots after the leap month shift down by one month number
+            if leap and slot >= leap:
+                month, isleap = slot, slot == leap
+            else:
+                month, isleap = slot + 1, False
+            packed = lunar_year << 11 | (length == 30) << 10 | isleap << 9 | month << 5
+            for day in range(1, length + 1):
+                offset = start + day - 1
+                if 0 <= offset < total_days:
+                    lunar_days[offset] = packed | day
+            start += length
+
+    _year_offsets, _solar_days, _lunar_days = year_offsets, solar_days, lunar_days
+    _leap_months, _month_starts, _month_lengths = leap_months, month_starts, month_lengths
+
+
+# Names of the conversion tables, as used by export_tables() and install_tables()
+TABLE_NAMES = ('year_offsets', 'lunar_days', 'solar_days', 'leap_months', 'month_starts', 'month_lengths')
+
+
+def export_tables():
+    """The conversion tables by name, building them if needed"""
+    if _lunar_days is None:
+        _build_tables()
+    return dict(zip(TABLE_NAMES, (_year_offsets, _lunar_days, _solar_days,
+                                  _leap_months, _month_starts, _month_lengths)))
+
+
+def install_tables(tables):
+    """
+    Use prebuilt conversion tables instead of building them
+
+    Args:
+        tables: {name: sequence} for every name in TABLE_NAMES, with the same
+            item types as export_tables() (e.g. memoryviews of a shared file)
+    """
+    global _year_offsets, _lunar_days, _solar_days
+    global _leap_months, _month_starts, _month_lengths
+    _year_offsets, _lunar_days, _solar_days, _leap_months, _month_starts, _month_lengths = \
+        (tables[name] for name in TABLE_NAMES)
+
+
+# Result of solar_to_lunar: month is 1-12 also inside a leap month, which is
+# flagged by isleap; month_days is the length of that month (29 or 30)
+LunarDate = namedtuple('LunarDate', ['year', 'month', 'day', 'isleap', 'month_days'])
+
+
+def _unpack(packed):
+    return LunarDate(packed >> 11, (packed >> 5) & 0xf, packed & 0x1f,
+                     bool(packed & 0x200), 30 if packed & 0x400 else 29)
+
+
+def _month_slot(month, isleap, leap):
+    """Slot (0-12) of a month within its lunar year, or None if there is no such leap month"""
+    if isleap:
+        return month if month == leap else None
+    return month if leap and month > leap else month - 1
+
+
+def _year_record(lunar_year):
+    """(ordinal of the new year, leap month, 13 month lengths) of a lunar year in 1599-2400"""
+    if _FIRST_LUNAR_YEAR <= lunar_year <= TABLE_LAST_YEAR:
+        slot = (lunar_year - _FIRST_LUNAR_YEAR) * 13
+        return (_FIRST_ORDINAL + _month_starts[slot], _leap_months[lunar_year - _FIRST_LUNAR_YEAR],
+                tuple(_month_lengths[slot:slot + 13]))
+    record = _extended_years.get(lunar_year)
+    if record is None:
+        import astro_calendar
+        _, new_year, leap, lengths = astro_calendar.get_year(lunar_year)
+        record = _extended_years[lunar_year] = (new_year.toordinal(), leap, tuple(lengths))
+    return record
+
+
+def _extended_solar_to_lunar(year, month, day):
+    try:
+        ordinal = datetime.date(year, month, day).toordinal()
+    except ValueError:
+        return None
+    lunar_year = year
+    new_year, leap, lengths = _year_record(lunar_year)
+    if ordinal < new_year:
+        lunar_year -= 1
+        new_year, leap, lengths = _year_record(lunar_year)
+    offset = ordinal - new_year
+    for slot, length in enumerate(lengths):
+        if offset < length:
+            if leap and slot >= leap:
+                return LunarDate(lunar_year, slot, offset + 1, slot == leap, length)
+            return LunarDate(lunar_year, slot + 1, offset + 1, False, length)
+        offset -= length
+    return None
 
 
 def solar_to_lunar(year, month, day):
     """
     Convert Gregorian calendar to Lunar calendar
     
+    Dates in 1900-2100 are answered from the precomputed day table, dates in
+    1600-1899 and 2101-2400 from lunar years computed by astro_calendar.
+    
     Args:
         year: Gregorian year
         month: Gregorian month
         day: Gregorian day
         
     Returns:
-        (Lunar year, Lunar month, Lunar day)
+        LunarDate(year, month, day, isleap, month_days), or None for an
+        invalid date or one outside 1600-2400
     """
-    try:
-        solar = Solar(year, month, day)
-        lunar = Converter.Solar2Lunar(solar)
-        return lunar.year, lunar.month, lunar.day
-    except Exception as e:
-        print(f"Conversion failed {year}-{month}-{day}: {e}")
+    if TABLE_FIRST_YEAR <= year <= TABLE_LAST_YEAR and 1 <= month <= 12:
+        if _lunar_days is None:
+            _build_tables()
+        before = _DAYS_BEFORE_MONTH[_is_leap_year(year)]
+        if 1 <= day <= before[month + 1] - before[month]:
+            return _unpack(_lunar_days[_year_offsets[year - TABLE_FIRST_YEAR] + before[month] + day - 1])
         return None
 
+    if EXTENDED_FIRST_YEAR <= year <= EXTENDED_LAST_YEAR:
+        if _lunar_days is None:
+            _build_tables()
+        return _extended_solar_to_lunar(year, month, day)
+    return None
+
 
-def lunar_to_solar(year, month, day):
+def lunar_to_solar(year, month, day, isleap=False):
     """
     Convert Lunar calendar to Gregorian calendar
     
@@ -31,31 +278,196 @@ def lunar_to_solar(year, month, day):
         year: Lunar year
         month: Lunar month  
         day: Lunar day
+        isleap: Whether the date lies in the leap month with that number
         
     Returns:
-        (Gregorian year, Gregorian month, Gregorian day)
+        (Gregorian year, Gregorian month, Gregorian day), or None for an
+        invalid date or a lunar year outside 1599-2400
     """
-    try:
-        lunar = Lunar(year, month, day)
-        solar = Converter.Lunar2Solar(lunar)
-        return solar.year, solar.month, solar.day
-    except Exception as e:
-        print(f"Conversion failed {year}-{month}-{day}: {e}")
+    if not (EXTENDED_FIRST_YEAR - 1 <= year <= EXTENDED_LAST_YEAR and 1 <= month <= 12):
+        return None
+    if _lunar_days is None:
+        _build_tables()
+
+    if _FIRST_LUNAR_YEAR <= year <= TABLE_LAST_YEAR:
+        slot = _month_slot(month, isleap, _leap_months[year - _FIRST_LUNAR_YEAR])
+        if slot is not None:
+            slot += (year - _FIRST_LUNAR_YEAR) * 13
+        if slot is not None and 1 <= day <= _month_lengths[slot]:
+            offset = _month_starts[slot] + day - 1
+            if 0 <= offset < len(_solar_days):
+                packed = _solar_days[offset]
+                return packed >> 9, (packed >> 5) & 0xf, packed & 0x1f
+            # Lunar 1899 starts in 1899 and lunar 2100 ends in 2101
+            date = datetime.date.fromordinal(_FIRST_ORDINAL + offset)
+            return date.year, date.month, date.day
+        return None
+
+    new_year, leap, lengths = _year_record(year)
+    slot = _month_slot(month, isleap, leap)
+    if slot is None or not 1 <= day <= lengths[slot]:
         return None
+    date = datetime.date.fromordinal(new_year + sum(lengths[:slot]) + day - 1)
+    return date.year, date.month, date.day
 
 
-def format_lunar(lunar_year, lunar_month, lunar_day):
-    """Format Lunar date for display"""
+def lunar_month_days(year, month, isleap=False):
+    """
+    Get the number of days in a Lunar month
+    
+    Args:
+        year: Lunar year (1599-2400)
+        month: Lunar month
+        isleap: Whether the leap month with that number is meant
+        
+    Returns:
+        29 or 30, or 0 if the month does not exist
+    """
+    if not (EXTENDED_FIRST_YEAR - 1 <= year <= EXTENDED_LAST_YEAR and 1 <= month <= 12):
+        return 0
+    if _lunar_days is None:
+        _build_tables()
+    if _FIRST_LUNAR_YEAR <= year <= TABLE_LAST_YEAR:
+        leap = _leap_months[year - _FIRST_LUNAR_YEAR]
+        if isleap:
+            return _month_lengths[(year - _FIRST_LUNAR_YEAR) * 13 + month] if month == leap else 0
+        return _month_lengths[(year - _FIRST_LUNAR_YEAR) * 13 + (month if leap and month > leap else month - 1)]
+    _, leap, lengths = _year_record(year)
+    slot = _month_slot(month, isleap, leap)
+    return 0 if slot is None else lengths[slot]
+
+
+# A month of a lunar year: first_day is the ordinal (datetime.date.toordinal()) of its first day
+LunarMonth = namedtuple('LunarMonth', ['year', 'month', 'isleap', 'first_day', 'days'])
+
+
+def lunar_year_months(year):
+    """
+    Months of a lunar year from the month start tables, without converting dates
+
+    Args:
+        year: Lunar year (1599-2400)
+
+    Returns:
+        Tuple of LunarMonth in calendar order (12 or 13 months), or () for a
+        year outside 1599-2400
+    """
+    if not EXTENDED_FIRST_YEAR - 1 <= year <= EXTENDED_LAST_YEAR:
+        return ()
+    if _lunar_days is None:
+        _build_tables()
+    new_year, leap, lengths = _year_record(year)
+    months = []
+    first_day = new_year
+    for slot, length in enumerate(lengths):
+        if not length:
+            break
+        if leap and slot >= leap:
+            months.append(LunarMonth(year, slot, slot == leap, first_day, length))
+        else:
+            months.append(LunarMonth(year, slot + 1, False, first_day, length))
+        first_day += length
+    return tuple(months)
+
+
+# Column-oriented result of the batch conversions: one array per field
+LunarColumns = namedtuple('LunarColumns', ['year', 'month', 'day', 'isleap', 'month_days'])
+
+
+def _unpack_columns(packed, numpy):
+    """Split packed lunar dates into year, month, day, leap and month length columns"""
+    if numpy is not None:
+        packed = numpy.asarray(packed, dtype=numpy.uint32)
+        return LunarColumns(
+            (packed >> 11).astype(numpy.int16),
+            ((packed >> 5) & 0xf).astype(numpy.uint8),
+            (packed & 0x1f).astype(numpy.uint8),
+            ((packed >> 9) & 1).astype(bool),
+            (29 + ((packed >> 10) & 1)).astype(numpy.uint8),
+        )
+    return LunarColumns(
+        array('h', [p >> 11 for p in packed]),
+        array('B', [(p >> 5) & 0xf for p in packed]),
+        array('B', [p & 0x1f for p in packed]),
+        array('B', [(p >> 9) & 1 for p in packed]),
+        array('B', [29 + ((p >> 10) & 1) for p in packed]),
+    )
+
+
+def _check_offsets(first, last):
+    if first < 0 or last >= len(_lunar_days):
+        raise ValueError(f"Batch conversion supports {TABLE_FIRST_YEAR}-{TABLE_LAST_YEAR} only")
+
+
+def solar_to_lunar_range(start, end):
+    """
+    Convert every Gregorian date from start to end (inclusive) to Lunar
+
+    Args:
+        start: First datetime.date
+        end: Last datetime.date
+
+    Returns:
+        LunarColumns of numpy arrays when numpy is installed, array.array otherwise
+
+    Raises:
+        ValueError: If the range leaves 1900-2100
+    """
+    if _lunar_days is None:
+        _build_tables()
+    numpy = _load_numpy()
+    first = start.toordinal() - _FIRST_ORDINAL
+    last = end.toordinal() - _FIRST_ORDINAL
+    if last < first:
+        return _unpack_columns(array('I'), numpy)
+    _check_offsets(first, last)
+
+    if numpy is not None:
+        return _unpack_columns(numpy.frombuffer(_lunar_days, dtype=numpy.uint32)[first:last + 1], numpy)
+    return _unpack_columns(_lunar_days[first:last + 1], numpy)
+
+
+def solar_to_lunar_many(dates):
+    """
+    Convert a sequence of Gregorian dates to Lunar, keeping their order
+
+    Args:
+        dates: Iterable of datetime.date, or a numpy datetime64 array
+
+    Returns:
+        LunarColumns of numpy arrays when numpy is installed, array.array otherwise
+
+    Raises:
+        ValueError: If any date is outside 1900-2100
+    """
+    if _lunar_days is None:
+        _build_tables()
+    numpy = _load_numpy()
+
+    if numpy is not None:
+        if isinstance(dates, numpy.ndarray) and dates.dtype.kind == 'M':
+            offsets = dates.astype('datetime64[D]').astype(numpy.int64) + _EPOCH_OFFSET
+        else:
+            offsets = numpy.fromiter((d.toordinal() for d in dates), dtype=numpy.int64) - _FIRST_ORDINAL
+        if len(offsets):
+            _check_offsets(int(offsets.min()), int(offsets.max()))
+        return _unpack_columns(numpy.frombuffer(_lunar_days, dtype=numpy.uint32)[offsets], numpy)
+
+    offsets = [d.toordinal() - _FIRST_ORDINAL for d in dates]
+    if offsets:
+        _check_offsets(min(offsets), max(offsets))
+    table = _lunar_days
+    return _unpack_columns(array('I', [table[o] for o in offsets]), numpy)
+
+
+# Display names used by format_lunar (month index 1-12)
+LUNAR_MONTH_NAMES = ("", "Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+LEAP_MONTH_PREFIX = "Leap "
+
+
+def _lunar_day_name(lunar_day):
     # Lunar numbers
     lunar_numbers = ["", "1", "2", "3", "4", "5", "6", "7", "8", "9", "10"]
-    lunar_months = ["", "Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
-    lunar_day_prefixes = ["", "10", "20", "30"]
-    
-    # Format month
-    if lunar_month <= 12:
-        month_str = lunar_months[lunar_month]
-    else:
-        month_str = "Leap " + lunar_months[lunar_month - 12]
     
     # Format day
     if lunar_day <= 10:
@@ -66,6 +478,37 @@ def format_lunar(lunar_year, lunar_month, lunar_day):
         day_str = "Day " + lunar_numbers[lunar_day - 20]
     else:
         day_str = "Day 30"
+    return day_str
+
+
+# Day names used by format_lunar (index 1-30)
+LUNAR_DAY_NAMES = tuple(_lunar_day_name(day) for day in range(31))
+
+
+def format_lunar(lunar_year, lunar_month, lunar_day, isleap=False):
+    """Format Lunar date for display, e.g. "Leap Apr Day 5" for a leap month"""
+    # Format month
+    if isleap:
+        month_str = LEAP_MONTH_PREFIX + LUNAR_MONTH_NAMES[lunar_month]
+    else:
+        month_str = LUNAR_MONTH_NAMES[lunar_month]
     
-    return f"{month_str} {day_str}"
+    return f"{month_str} {LUNAR_DAY_NAMES[lunar_day]}"
+
+
+def main(argv=None):
+    """Command-line entry point"""
+    import argparse
+    parser = argparse.ArgumentParser(description="Lunar year data tools")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    build = subparsers.add_parser('build', help="Regenerate data/lunar_years.csv from lunarcalendar")
+    build.add_argument('-o', '--output', default=DATA_FILE)
+    args = parser.parse_args(argv)
+
+    build_data_file(args.output)
+    print(f"Wrote lunar years {_FIRST_LUNAR_YEAR}-{TABLE_LAST_YEAR} to {args.output}")
+    return 0
+
 
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,251 @@
+# Metrics - request, stage and cache counters rendered in the Prometheus text format
+#
+# Every thread counts into its own shard, so recording a value takes no lock;
+# a lock is only taken when a thread creates or retires its shard and when
+# the shards are summed for a scrape. A thread's shard is folded into the
+# retired totals when the thread ends, so counters never go backwards.
+# Metrics are per process: with serve.py each worker reports its own.
+import bisect
+import functools
+import os
+import threading
+import time
+import weakref
+
+# Histogram bucket upper bounds in seconds (+Inf is implied)
+DURATION_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+                    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+REQUESTS = 'calendar_http_requests_total'
+REQUEST_SECONDS = 'calendar_http_request_duration_seconds'
+STAGE_SECONDS = 'calendar_stage_duration_seconds'
+HOLIDAY_RELOADS = 'calendar_holiday_reloads_total'
+
+# name: (type, help)
+METRICS = {
+    REQUESTS: ('counter', "Requests handled, by route, method and status"),
+    REQUEST_SECONDS: ('histogram', "Time to produce a response, by route (streamed bodies excluded)"),
+    STAGE_SECONDS: ('histogram', "Time spent in a processing stage, by stage"),
+    HOLIDAY_RELOADS: ('counter', "Holiday data reload attempts, by result"),
+}
+
+# Cache metrics: (name, type, help, value taken from a functools cache_info() and the eviction count)
+CACHE_METRICS = (
+    ('calendar_cache_hits_total', 'counter', "Lookups answered from the cache", lambda info, evictions: info.hits),
+    ('calendar_cache_misses_total', 'counter', "Lookups that computed the value",
+     lambda info, evictions: info.misses),
+    ('calendar_cache_evictions_total', 'counter', "Entries dropped to make room for new ones",
+     lambda info, evictions: evictions),
+    ('calendar_cache_entries', 'gauge', "Entries in the cache", lambda info, evictions: info.currsize),
+    ('calendar_cache_max_entries', 'gauge', "Cache capacity", lambda info, evictions: info.maxsize or 0),
+)
+
+
+class _Shard:
+    """Counters of one thread: {(name, labels): value} and {(name, labels): [bucket counts..., sum, count]}"""
+    __slots__ = ('counters', 'histograms')
+
+    def __init__(self):
+        self.counters = {}
+        self.histograms = {}
+
+    def merge(self, other):
+        for key, value in other.counters.copy().items():
+            self.counters[key] = self.counters.get(key, 0) + value
+        for key, values in other.histograms.copy().items():
+            values = list(values)
+            mine = self.histograms.get(key)
+            if mine is None:
+                self.histograms[key] = values
+            else:
+                for i, value in enumerate(values):
+                    mine[i] += value
+
+
+class _ShardOwner:
+    """Kept in thread-local storage; retires the shard when its thread ends"""
+    __slots__ = ('shard', '__weakref__')
+
+
+# Reentrant: a finishing thread may retire its shard while this thread holds the lock
+_lock = threading.RLock()
+_local = threading.local()
+# Shards of live threads, and the sums of the shards of finished threads
+_shards = []
+_retired = _Shard()
+# (name, lru_cache-wrapped function) reported as cache metrics
+_caches = []
+# {counted_lru_cache-wrapped function: evictions}
+_evictions = {}
+
+
+def _retire(shard):
+    with _lock:
+        _retired.merge(shard)
+        _shards.remove(shard)
+
+
+def _shard():
+    try:
+        return _local.owner.shard
+    except AttributeError:
+        owner = _ShardOwner()
+        owner.shard = _Shard()
+        with _lock:
+            _shards.append(owner.shard)
+        weakref.finalize(owner, _retire, owner.shard)
+        _local.owner = owner
+        return owner.shard
+
+
+def inc(name, labels=(), value=1):
+    """Add to a counter; labels is a tuple of (name, value) pairs"""
+    counters = _shard().counters
+    key = (name, labels)
+    counters[key] = counters.get(key, 0) + value
+
+
+def observe(name, value, labels=()):
+    """Record a value in a histogram; labels is a tuple of (name, value) pairs"""
+    histograms = _shard().histograms
+    key = (name, labels)
+    counts = histograms.get(key)
+    if counts is None:
+        counts = histograms[key] = [0] * (len(DURATION_BUCKETS) + 3)
+    counts[bisect.bisect_left(DURATION_BUCKETS, value)] += 1
+    counts[-2] += value
+    counts[-1] += 1
+
+
+def observe_request(route, method, status, seconds):
+    """Count a request and record its duration"""
+    inc(REQUESTS, (('route', route), ('method', method), ('status', str(status))))
+    observe(REQUEST_SECONDS, seconds, (('route', route),))
+
+
+class _StageTimer:
+    __slots__ = ('labels', 'start')
+
+    def __init__(self, name):
+        self.labels = (('stage', name),)
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        observe(STAGE_SECONDS, time.perf_counter() - self.start, self.labels)
+        return False
+
+
+def stage(name):
+    """Context manager timing a block into calendar_stage_duration_seconds"""
+    return _StageTimer(name)
+
+
+def counted_lru_cache(maxsize):
+    """functools.lru_cache that also counts the entries it evicts, reported by register_cache"""
+    def decorate(function):
+        @functools.wraps(function)
+        def compute(*args, **kwargs):
+            value = function(*args, **kwargs)
+            # Only misses get here; the value is then stored, evicting the
+            # oldest entry if the cache is full. Calls that raise store nothing
+            info = cached_function.cache_info()
+            if info.maxsize and info.currsize >= info.maxsize:
+                with _lock:
+                    _evictions[cached_function] = _evictions.get(cached_function, 0) + 1
+            return value
+
+        cached_function = functools.lru_cache(maxsize=maxsize)(compute)
+        return cached_function
+    return decorate
+
+
+def register_cache(name, cached_function):
+    """Report a functools.lru_cache-wrapped function as cache metrics (evictions need counted_lru_cache)"""
+    _caches.append((name, cached_function))
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels, extra=()):
+    pairs = tuple(labels) + tuple(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(str(value))}"' for name, value in pairs) + '}'
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def snapshot():
+    """Sum the shards of all threads into one"""
+    total = _Shard()
+    with _lock:
+        total.merge(_retired)
+        for shard in list(_shards):
+            total.merge(shard)
+    return total
+
+
+def _cache_lines():
+    if not _caches:
+        return []
+    with _lock:
+        infos = [(_labels((('cache', name),)), cached_function.cache_info(), _evictions.get(cached_function, 0))
+                 for name, cached_function in _caches]
+    lines = []
+    for name, metric_type, help_text, value in CACHE_METRICS:
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {metric_type}']
+        lines += [f'{name}{labels} {value(info, evictions)}' for labels, info, evictions in infos]
+    return lines
+
+
+def _process_lines():
+    lines = []
+    cpu = os.times()
+    lines += ['# HELP process_cpu_seconds_total User and system CPU time',
+              '# TYPE process_cpu_seconds_total counter',
+              f'process_cpu_seconds_total {cpu.user + cpu.system!r}']
+    try:
+        with open('/proc/self/statm') as f:
+            virtual_pages, resident_pages = (int(value) for value in f.read().split()[:2])
+    except (OSError, ValueError):
+        return lines
+    page_size = os.sysconf('SC_PAGE_SIZE')
+    lines += ['# HELP process_resident_memory_bytes Resident memory size',
+              '# TYPE process_resident_memory_bytes gauge',
+              f'process_resident_memory_bytes {resident_pages * page_size}',
+              '# HELP process_virtual_memory_bytes Virtual memory size',
+              '# TYPE process_virtual_memory_bytes gauge',
+              f'process_virtual_memory_bytes {virtual_pages * page_size}']
+    return lines
+
+
+def render():
+    """All metrics in the Prometheus text exposition format"""
+    total = snapshot()
+    lines = []
+    for name, (metric_type, help_text) in METRICS.items():
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {metric_type}']
+        if metric_type == 'counter':
+            for (metric, labels), value in sorted(total.counters.items()):
+                if metric == name:
+                    lines.append(f'{name}{_labels(labels)} {_number(value)}')
+            continue
+        for (metric, labels), counts in sorted(total.histograms.items()):
+            if metric != name:
+                continue
+            cumulative = 0
+            for bound, count in zip(DURATION_BUCKETS + ('+Inf',), counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{_labels(labels, (("le", bound),))} {cumulative}')
+            lines.append(f'{name}_sum{_labels(labels)} {_number(counts[-2])}')
+            lines.append(f'{name}_count{_labels(labels)} {counts[-1]}')
+    lines += _cache_lines()
+    lines += _process_lines()
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,118 @@
+# Month grid engine - one calendar month with lunar dates, holidays, solar terms and almanac attributes
+import calendar as cal
+from collections import namedtuple
+import almanac
+import holidays
+import metrics
+from holiday_index import holiday_names_in_month, INDEX_FIRST_YEAR, INDEX_LAST_YEAR
+from lunar_calendar import solar_to_lunar, lunar_month_days, format_lunar, EXTENDED_FIRST_YEAR, EXTENDED_LAST_YEAR
+from solar_terms import get_month_solar_terms
+from almanac import GANZHI_NAMES
+from holidays import SOLAR_TERMS_CN
+
+# Grids kept by get_month_grid (a few years of browsing)
+MONTH_GRID_CACHE_SIZE = 240
+
+# Names for GridDay.weekday
+WEEKDAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+# One day of a grid; weekday is 0 for Monday. solar_term is the term starting
+# that day, current_term the one the day falls in; the ganzhi and zodiac
+# fields are those of almanac.get_almanac
+GridDay = namedtuple('GridDay', ['day', 'weekday', 'lunar_year', 'lunar_month', 'lunar_day', 'lunar_leap',
+                                 'lunar', 'greg_holiday', 'lunar_holiday', 'solar_term', 'lunar_month_days',
+                                 'year_ganzhi', 'month_ganzhi', 'day_ganzhi', 'zodiac', 'current_term'])
+
+
+class MonthGrid(namedtuple('MonthGrid', ['year', 'month', 'first_weekday', 'days'])):
+    """A Gregorian month: days is a tuple of GridDay, one per day of the month"""
+    __slots__ = ()
+
+    def weeks(self):
+        """Days in rows of 7 (Monday first), padded with None"""
+        cells = [None] * self.first_weekday + list(self.days)
+        cells.extend([None] * (-len(cells) % 7))
+        return [cells[i:i + 7] for i in range(0, len(cells), 7)]
+
+    def holiday(self, day):
+        """Holiday mark of a day: the Gregorian holiday, else the lunar one"""
+        grid_day = self.days[day - 1]
+        return grid_day.greg_holiday or grid_day.lunar_holiday
+
+
+# Lunar labels do not depend on the year: [isleap][month][day]
+_LABELS = [[[format_lunar(0, month, day, isleap) if month and day else "" for day in range(31)]
+            for month in range(13)]
+           for isleap in (False, True)]
+
+
+def _next_lunar_month(year, month, isleap):
+    if not isleap and lunar_month_days(year, month, True):
+        return year, month, True
+    if month == 12:
+        return year + 1, 1, False
+    return year, month + 1, False
+
+
+def build_month_grid(year, month):
+    """
+    Build the grid of a month in a single pass
+
+    Only the 1st is converted to a lunar date; the following days are
+    counted on using the lunar month lengths. Holidays and solar terms are
+    taken from per-month slices, and the almanac attributes from the
+    almanac columns of the month; outside the holiday index (1900-2100) the
+    lunar festivals are looked up day by day.
+
+    Args:
+        year: Gregorian year (1600-2400)
+        month: Gregorian month
+
+    Returns:
+        MonthGrid
+
+    Raises:
+        ValueError: If the month is outside 1600-2400
+    """
+    if not (EXTENDED_FIRST_YEAR <= year <= EXTENDED_LAST_YEAR and 1 <= month <= 12):
+        raise ValueError(f"Month grids are only available for {EXTENDED_FIRST_YEAR}-{EXTENDED_LAST_YEAR}")
+    first_weekday, days_in_month = cal.monthrange(year, month)
+    lunar_y, lunar_m, lunar_d, isleap, length = solar_to_lunar(year, month, 1)
+
+    greg_holidays, lunar_holidays = holiday_names_in_month(year, month)
+    solar_terms = get_month_solar_terms(year, month)
+    year_column, month_column, day_column, term_column = almanac.month_columns(year, month)
+    zodiac = almanac.zodiac(lunar_y)
+    indexed = INDEX_FIRST_YEAR <= year <= INDEX_LAST_YEAR
+
+    days = []
+    labels = _LABELS[isleap][lunar_m]
+    for day, year_index, month_index, day_index, term_index in zip(
+            range(1, days_in_month + 1), year_column, month_column, day_column, term_column, strict=True):
+        days.append(GridDay._make((day, (first_weekday + day - 1) % 7, lunar_y, lunar_m, lunar_d, isleap,
+                                      labels[lunar_d], greg_holidays.get(day, ""),
+                                      lunar_holidays.get(day, "") if indexed
+                                      else holidays.get_lunar_holiday(lunar_m, lunar_d, isleap, length),
+                                      solar_terms.get(day, ""), length, GANZHI_NAMES[year_index],
+                                      GANZHI_NAMES[month_index], GANZHI_NAMES[day_index], zodiac,
+                                      SOLAR_TERMS_CN[term_index])))
+        if lunar_d == length:
+            lunar_y, lunar_m, isleap = _next_lunar_month(lunar_y, lunar_m, isleap)
+            zodiac = almanac.zodiac(lunar_y)
+            length = lunar_month_days(lunar_y, lunar_m, isleap)
+            labels = _LABELS[isleap][lunar_m]
+            lunar_d = 1
+        else:
+            lunar_d += 1
+
+    return MonthGrid(year, month, first_weekday, tuple(days))
+
+
+@metrics.counted_lru_cache(maxsize=MONTH_GRID_CACHE_SIZE)
+def _cached_month_grid(year, month, holiday_version):
+    return build_month_grid(year, month)
+
+
+def get_month_grid(year, month):
+    """Get the grid of a month, cached per holiday data version"""
+    return _cached_month_grid(year, month, holidays.HOLIDAY_DATA_VERSION)
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Request profiling - Opt-in per-request profiles of Flask views, dumped to a directory
+
+install() wraps every view of the app in a profiler that runs for requests
+that ask for it with an X-Profile header (honoured only when the app's
+authorize check accepts the request) and for a sampled share of all
+requests. Each profiled request writes one dump:
+- pstats (.prof): a cProfile dump, for pstats, snakeviz and the report below
+- collapsed (.collapsed): one "frame;frame;frame nanoseconds" line per call
+  stack (self time), the input of flamegraph.pl and speedscope
+
+Nothing is wrapped until install() is called, so a server without profiling
+configured runs the original views. Only the view call is profiled: the
+body of a streamed response (exports, the ICS feed) is produced after it.
+
+    python profiling.py report /tmp/profiles --top 20       # slowest functions over all dumps
+    python profiling.py merge /tmp/profiles > stacks.txt    # one collapsed file for flamegraph.pl
+"""
+
+import argparse
+import cProfile
+import functools
+import glob
+import itertools
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+
+# Environment variables read by app.py: dump directory (profiling is off
+# while it is unset) and the share of requests sampled (0-1)
+DIR_ENV = 'CALENDAR_PROFILE_DIR'
+RATE_ENV = 'CALENDAR_PROFILE_RATE'
+# Request header asking for a profile; its value is a format or 1 for the default
+HEADER = 'X-Profile'
+
+FORMAT_PSTATS = 'pstats'
+FORMAT_COLLAPSED = 'collapsed'
+FORMATS = (FORMAT_PSTATS, FORMAT_COLLAPSED)
+EXTENSIONS = {FORMAT_PSTATS: '.prof', FORMAT_COLLAPSED: '.collapsed'}
+# Dumps a process writes at most, so sampling cannot fill the disk
+MAX_DUMPS = 1000
+
+# Number of the next dump of this process, for unique file names
+_dump_numbers = itertools.count(1)
+
+
+class StackProfiler:
+    """Self time per call stack of the calls made on this thread while enabled"""
+
+    def __init__(self):
+        # {"frame;frame": nanoseconds}
+        self.stacks = {}
+        self._keys = ['']
+        self._last = None
+
+    def _event(self, frame, event, arg):
+        now = time.perf_counter_ns()
+        keys = self._keys
+        key = keys[-1]
+        if key:
+            self.stacks[key] = self.stacks.get(key, 0) + now - self._last
+        if event == 'call':
+            code = frame.f_code
+            label = f"{frame.f_globals.get('__name__', '?')}.{getattr(code, 'co_qualname', code.co_name)}"
+            keys.append(f'{key};{label}' if key else label)
+        elif event == 'c_call':
+            label = f"{getattr(arg, '__module__', None) or 'builtins'}.{getattr(arg, '__qualname__', arg)}"
+            keys.append(f'{key};{label}' if key else label)
+        # Returns from frames entered before enable() have nothing to pop
+        elif len(keys) > 1:
+            keys.pop()
+        self._last = time.perf_counter_ns()
+
+    def enable(self):
+        self._last = time.perf_counter_ns()
+        sys.setprofile(self._event)
+
+    def disable(self):
+        sys.setprofile(None)
+        # Leave out the call to this method
+        own = f'{__name__}.{type(self).__qualname__}.disable'
+        self.stacks = {stack: nanoseconds for stack, nanoseconds in self.stacks.items() if not stack.startswith(own)}
+
+    def collapsed(self):
+        """The stacks as collapsed lines, in nanoseconds"""
+        return ''.join(f'{stack} {nanoseconds}\n' for stack, nanoseconds in sorted(self.stacks.items()))
+
+
+def _write(directory, endpoint, profile_format, profiler):
+    """Write a dump, renamed into place so readers never see a partial file"""
+    name = (f"{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}-{next(_dump_numbers)}-{endpoint}"
+            f"{EXTENSIONS[profile_format]}")
+    path = os.path.join(directory, name)
+    if profile_format == FORMAT_PSTATS:
+        profiler.dump_stats(path + '.tmp')
+    else:
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            f.write(profiler.collapsed())
+    os.replace(path + '.tmp', path)
+    return name
+
+
+class _Settings:
+    __slots__ = ('directory', 'rate', 'default_format', 'authorize', 'dumps', 'lock')
+
+    def __init__(self, directory, rate, default_format, authorize):
+        self.directory = directory
+        self.rate = rate
+        self.default_format = default_format
+        self.authorize = authorize
+        self.dumps = 0
+        self.lock = threading.Lock()
+
+
+def _requested_format(settings, request):
+    """(format to profile the request in or None, whether an authorized X-Profile header asked for it)"""
+    asked = request.headers.get(HEADER)
+    if asked and settings.authorize(request):
+        return asked if asked in FORMATS else settings.default_format, True
+    if settings.rate and random.random() < settings.rate:
+        return settings.default_format, False
+    return None, False
+
+
+def _wrap(view, endpoint, settings, request):
+    @functools.wraps(view)
+    def profiled_view(*args, **kwargs):
+        profile_format, authorized = _requested_format(settings, request)
+        if profile_format is None:
+            return view(*args, **kwargs)
+        with settings.lock:
+            if settings.dumps >= MAX_DUMPS:
+                return view(*args, **kwargs)
+            settings.dumps += 1
+
+        profiler = cProfile.Profile() if profile_format == FORMAT_PSTATS else StackProfiler()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is already active on this thread
+            return view(*args, **kwargs)
+        try:
+            result = view(*args, **kwargs)
+        finally:
+            profiler.disable()
+        name = _write(settings.directory, endpoint, profile_format, profiler)
+        if authorized:
+            # Lets the caller find its dump; sampled requests are not told
+            from flask import make_response
+            result = make_response(result)
+            result.headers['X-Profile-File'] = name
+        return result
+    return profiled_view
+
+
+def install(app, directory, rate=0.0, default_format=FORMAT_PSTATS, authorize=lambda request: False):
+    """
+    Profile the views of a Flask app on request
+
+    Args:
+        app: Flask app, with all its routes registered
+        directory: Directory the dumps are written to (created if missing)
+        rate: Share of all requests profiled (0-1)
+        default_format: Format of sampled profiles and of X-Profile: 1
+        authorize: Called with the request; X-Profile is ignored unless it
+            returns true
+
+    Raises:
+        ValueError: If the rate or format is invalid
+    """
+    if not 0 <= rate <= 1:
+        raise ValueError("The profile rate must be between 0 and 1")
+    if default_format not in FORMATS:
+        raise ValueError(f"Unknown profile format; available: {', '.join(FORMATS)}")
+    from flask import request
+    os.makedirs(directory, exist_ok=True)
+    uninstall(app)
+    settings = _Settings(directory, rate, default_format, authorize)
+    originals = app.extensions['profiling'] = dict(app.view_functions)
+    for endpoint, view in originals.items():
+        app.view_functions[endpoint] = _wrap(view, endpoint, settings, request)
+
+
+def uninstall(app):
+    """Restore the views install() wrapped"""
+    originals = app.extensions.pop('profiling', None)
+    if originals:
+        app.view_functions.update(originals)
+
+
+def _dumps(paths, extension):
+    files = []
+    for path in paths:
+        files += sorted(glob.glob(os.path.join(path, '*' + extension))) if os.path.isdir(path) else \
+            [path] if path.endswith(extension) else []
+    return files
+
+
+def merge_collapsed(files):
+    """Sum collapsed dumps: {stack: nanoseconds}"""
+    stacks = {}
+    for path in files:
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                stack, _, value = line.rstrip('\n').rpartition(' ')
+                if stack:
+                    stacks[stack] = stacks.get(stack, 0) + int(value)
+    return stacks
+
+
+def main(argv=None):
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Aggregate request profiles")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    report = subparsers.add_parser('report', help="Print the top functions over all dumps")
+    report.add_argument('paths', nargs='+', help="Dump files or directories")
+    report.add_argument('--top', type=int, default=20)
+    report.add_argument('--sort', choices=('cumulative', 'tottime', 'ncalls'), default='cumulative',
+                        help="Order of the pstats report (default: cumulative)")
+    merge = subparsers.add_parser('merge', help="Sum collapsed dumps into one collapsed file on stdout")
+    merge.add_argument('paths', nargs='+', help="Dump files or directories")
+    args = parser.parse_args(argv)
+
+    profiles = _dumps(args.paths, EXTENSIONS[FORMAT_PSTATS])
+    collapsed = _dumps(args.paths, EXTENSIONS[FORMAT_COLLAPSED])
+    if args.command == 'merge':
+        for stack, nanoseconds in sorted(merge_collapsed(collapsed).items()):
+            print(f'{stack} {nanoseconds}')
+        return 0
+
+    if not profiles and not collapsed:
+        parser.error("No .prof or .collapsed dumps found")
+    if profiles:
+        print(f"{len(profiles)} pstats dumps")
+        pstats.Stats(*profiles, stream=sys.stdout).strip_dirs().sort_stats(args.sort).print_stats(args.top)
+    if collapsed:
+        # Self time of the innermost frame of each stack
+        self_times = {}
+        for stack, nanoseconds in merge_collapsed(collapsed).items():
+            frame = stack.rpartition(';')[2]
+            self_times[frame] = self_times.get(frame, 0) + nanoseconds
+        total = sum(self_times.values()) or 1
+        print(f"{len(collapsed)} collapsed dumps, {total / 1000:,.0f} us in total")
+        print(f"{'self us':>10} {'%':>6}  function")
+        for frame, nanoseconds in sorted(self_times.items(), key=lambda item: -item[1])[:args.top]:
+            print(f"{nanoseconds / 1000:>10,.1f} {100 * nanoseconds / total:>6.1f}  {frame}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Lunar recurrence - Expand recurring lunar dates (anniversaries, lunar birthdays, monthly days)
+
+Rules are expanded over the month start tables of lunar_calendar, one
+lunar month at a time, instead of converting each occurrence:
+- yearly: a lunar month and day every lunar year (e.g. a lunar birthday)
+- monthly: a day of every lunar month (e.g. the 1st and 15th)
+
+A day that a month does not have (day 30 of a 29-day month) follows the
+missing-day policy, and leap months follow the leap policy.
+"""
+
+import argparse
+import datetime
+import sys
+from collections import namedtuple
+import metrics
+from lunar_calendar import lunar_year_months, EXTENDED_FIRST_YEAR, EXTENDED_LAST_YEAR
+
+RULE_YEARLY = 'yearly'
+RULE_MONTHLY = 'monthly'
+RULES = (RULE_YEARLY, RULE_MONTHLY)
+
+# Day 30 in a 29-day month: observed on day 29 ('last'), on the 1st of the
+# next month ('next'), or not at all that month ('skip')
+MISSING_LAST = 'last'
+MISSING_NEXT = 'next'
+MISSING_SKIP = 'skip'
+MISSING_POLICIES = (MISSING_LAST, MISSING_NEXT, MISSING_SKIP)
+
+# Leap months: only the regular month ('regular'), the leap month in years
+# that have one and the regular month otherwise ('leap', for dates that fell
+# in a leap month), or both months ('both')
+LEAP_REGULAR = 'regular'
+LEAP_LEAP = 'leap'
+LEAP_BOTH = 'both'
+LEAP_POLICIES = (LEAP_REGULAR, LEAP_LEAP, LEAP_BOTH)
+
+# Lunar years whose months are kept (1599-2400)
+MONTH_CACHE_SIZE = EXTENDED_LAST_YEAR - EXTENDED_FIRST_YEAR + 2
+
+# An occurrence: its Gregorian date and the lunar date it is observed on
+Occurrence = namedtuple('Occurrence', ['date', 'lunar_year', 'lunar_month', 'lunar_day', 'isleap'])
+# Occurrences as columns (lists), with Gregorian dates as ordinals (datetime.date.toordinal())
+OccurrenceColumns = namedtuple('OccurrenceColumns', ['ordinal', 'lunar_year', 'lunar_month', 'lunar_day', 'isleap'])
+
+_RANGE_ERROR = f"Dates are only available for {EXTENDED_FIRST_YEAR}-{EXTENDED_LAST_YEAR}"
+_FIRST_ORDINAL = datetime.date(EXTENDED_FIRST_YEAR, 1, 1).toordinal()
+_LAST_ORDINAL = datetime.date(EXTENDED_LAST_YEAR, 12, 31).toordinal()
+
+_year_months = metrics.counted_lru_cache(maxsize=MONTH_CACHE_SIZE)(lunar_year_months)
+
+
+def _months(first_ordinal, last_ordinal, following):
+    """
+    Lunar months of the lunar years overlapping a range of ordinals
+
+    Returns:
+        (months, count): the months to expand are months[:count]; with
+        following, months also ends with the month after them (for the
+        'next' policy)
+    """
+    first_year = max(datetime.date.fromordinal(first_ordinal).year - 1, EXTENDED_FIRST_YEAR - 1)
+    last_year = datetime.date.fromordinal(last_ordinal).year
+    months = []
+    for year in range(first_year, last_year + 1):
+        months.extend(_year_months(year))
+    count = len(months)
+    if following:
+        months.extend(_year_months(last_year + 1)[:1])
+    return months, count
+
+
+def _check(day, first, last, missing, leap):
+    if not 1 <= day <= 30:
+        raise ValueError("Lunar day must be 1-30")
+    if missing not in MISSING_POLICIES:
+        raise ValueError(f"Unknown missing-day policy; available: {', '.join(MISSING_POLICIES)}")
+    if leap not in LEAP_POLICIES:
+        raise ValueError(f"Unknown leap month policy; available: {', '.join(LEAP_POLICIES)}")
+    first_ordinal, last_ordinal = first.toordinal(), last.toordinal()
+    if first_ordinal < _FIRST_ORDINAL or last_ordinal > _LAST_ORDINAL:
+        raise ValueError(_RANGE_ERROR)
+    return first_ordinal, last_ordinal
+
+
+def expand_columns(rule, first, last, month=None, day=1, missing=MISSING_LAST, leap=None):
+    """
+    Occurrences of a lunar rule between two Gregorian dates, as columns
+
+    Args:
+        rule: RULE_YEARLY or RULE_MONTHLY
+        first: First Gregorian date (datetime.date, 1600-2400)
+        last: Last Gregorian date, included
+        month: Lunar month (1-12), for yearly rules
+        day: Lunar day (1-30)
+        missing: Missing-day policy (MISSING_POLICIES)
+        leap: Leap month policy (LEAP_POLICIES); defaults to 'regular' for
+            yearly rules and 'both' for monthly rules
+
+    Returns:
+        OccurrenceColumns in date order
+
+    Raises:
+        ValueError: If the rule or its options are invalid or the dates are
+            outside 1600-2400
+    """
+    if rule not in RULES:
+        raise ValueError(f"Unknown rule; available: {', '.join(RULES)}")
+    if leap is None:
+        leap = LEAP_REGULAR if rule == RULE_YEARLY else LEAP_BOTH
+    first_ordinal, last_ordinal = _check(day, first, last, missing, leap)
+    if rule == RULE_YEARLY and not (isinstance(month, int) and 1 <= month <= 12):
+        raise ValueError("Lunar month must be 1-12")
+    if rule == RULE_MONTHLY and leap == LEAP_LEAP:
+        raise ValueError("Monthly rules take the 'regular' or 'both' leap month policy")
+    if last_ordinal < first_ordinal:
+        return OccurrenceColumns([], [], [], [], [])
+
+    months, count = _months(first_ordinal, last_ordinal, missing == MISSING_NEXT)
+    months.append(None)
+    ordinals, years, lunar_months, lunar_days, leaps = columns = OccurrenceColumns([], [], [], [], [])
+    for index in range(count):
+        lunar_year, lunar_month, isleap, first_day, days = months[index]
+        if rule == RULE_YEARLY:
+            if lunar_month != month:
+                continue
+            if isleap:
+                if leap == LEAP_REGULAR:
+                    continue
+            elif leap == LEAP_LEAP:
+                # The regular month stands in for years without the leap month
+                following = months[index + 1]
+                if following is not None and following.isleap and following.month == month:
+                    continue
+        elif isleap and leap == LEAP_REGULAR:
+            continue
+
+        observed_day = day
+        if day > days:
+            if missing == MISSING_LAST:
+                observed_day = days
+            elif missing == MISSING_NEXT and months[index + 1] is not None:
+                lunar_year, lunar_month, isleap, first_day, _ = months[index + 1]
+                observed_day = 1
+            else:
+                continue
+        ordinal = first_day + observed_day - 1
+        if first_ordinal <= ordinal <= last_ordinal:
+            ordinals.append(ordinal)
+            years.append(lunar_year)
+            lunar_months.append(lunar_month)
+            lunar_days.append(observed_day)
+            leaps.append(isleap)
+    return columns
+
+
+def expand(rule, first, last, month=None, day=1, missing=MISSING_LAST, leap=None):
+    """
+    Occurrences of a lunar rule between two Gregorian dates
+
+    Takes the same arguments as expand_columns().
+
+    Returns:
+        List of Occurrence in date order
+    """
+    columns = expand_columns(rule, first, last, month, day, missing, leap)
+    fromordinal = datetime.date.fromordinal
+    return [Occurrence(fromordinal(ordinal), *lunar) for ordinal, *lunar in zip(*columns)]
+
+
+def main(argv=None):
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Expand a recurring lunar date")
+    parser.add_argument('rule', choices=RULES)
+    parser.add_argument('--month', type=int, help="Lunar month (yearly rules)")
+    parser.add_argument('--day', type=int, default=1, help="Lunar day (default: 1)")
+    parser.add_argument('--from', dest='first', type=datetime.date.fromisoformat, default=datetime.date.today(),
+                        help="First date, YYYY-MM-DD (default: today)")
+    parser.add_argument('--to', dest='last', type=datetime.date.fromisoformat,
+                        help="Last date, YYYY-MM-DD (default: 365 days after the first)")
+    parser.add_argument('--missing', choices=MISSING_POLICIES, default=MISSING_LAST,
+                        help="Day 30 in a 29-day month (default: last)")
+    parser.add_argument('--leap', choices=LEAP_POLICIES, help="Leap months (default: regular for yearly, "
+                                                              "both for monthly)")
+    args = parser.parse_args(argv)
+
+    last = args.last or args.first + datetime.timedelta(days=365)
+    try:
+        occurrences = expand(args.rule, args.first, last, args.month, args.day, args.missing, args.leap)
+    except ValueError as e:
+        parser.error(str(e))
+    for item in occurrences:
+        leap_mark = ' (leap month)' if item.isleap else ''
+        print(f"{item.date}  lunar {item.lunar_year}-{item.lunar_month:02d}-{item.lunar_day:02d}{leap_mark}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,56 @@
+# Row cache - append-only CSV files of computed table rows, shared by processes
+#
+# Rows computed on demand (lunar years and solar terms outside the shipped
+# tables) are appended to a file next to the shipped data, so other
+# processes and later runs read them instead of repeating the astronomy.
+# Appends are serialized with an advisory lock where fcntl is available;
+# a row still being written by another process (no newline yet) is skipped.
+import os
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+def read_rows(path):
+    """
+    Read the rows of a cache file
+
+    Returns:
+        List of rows as lists of strings, without the header; [] if the file does not exist
+    """
+    try:
+        with open(path, encoding='utf-8') as f:
+            next(f, None)
+            return [line.rstrip('\n').split(',') for line in f if line.endswith('\n') and line.strip()]
+    except FileNotFoundError:
+        return []
+
+
+def append_rows(path, header, rows):
+    """
+    Append rows to a cache file, starting a new file with the header
+
+    Args:
+        path: Cache file
+        header: Column names
+        rows: Sequences of values without commas
+
+    Returns:
+        True if the rows were written, False if the file is not writable
+        (the values are then only kept by the caller)
+    """
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'a', encoding='utf-8') as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            # Checked under the lock: another process may have started the file
+            text = ''.join(','.join(str(value) for value in row) + '\n' for row in rows)
+            if os.fstat(f.fileno()).st_size == 0:
+                text = ','.join(header) + '\n' + text
+            f.write(text)
+        return True
+    except OSError:
+        return False
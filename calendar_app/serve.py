@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Production server - pre-fork workers sharing memory-mapped calendar tables
+
+The parent process makes sure the shared table file is current, maps it,
+binds the listening socket and then forks the workers. Every worker accepts
+connections on the inherited socket and reads the tables from the same
+read-only mapping, so table memory does not grow with the worker count.
+Workers that exit unexpectedly are replaced; workers that keep exiting soon
+after starting are restarted with a growing delay, and the server gives up
+after MAX_EARLY_EXITS of them in a row.
+
+    python serve.py --workers 4 --port 8000
+
+Requires a POSIX system (os.fork); use `python app.py` for development.
+"""
+
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+from werkzeug.serving import make_server
+import holiday_reload
+import shared_tables
+
+# A worker exiting within this many seconds of starting counts as an early exit
+MIN_UPTIME = 10.0
+# Delay before restarting after an early exit, doubled per consecutive one
+RESTART_DELAY = 0.5
+MAX_RESTART_DELAY = 30.0
+# Consecutive early exits after which the server stops
+MAX_EARLY_EXITS = 10
+
+
+def restart_delay(early_exits):
+    """Seconds to wait before restarting a worker after this many consecutive early exits"""
+    if early_exits <= 0:
+        return 0.0
+    return min(RESTART_DELAY * 2 ** (early_exits - 1), MAX_RESTART_DELAY)
+
+
+def run_worker(sock, threaded, holiday_check_interval=0):
+    """Serve requests on an inherited listening socket until terminated"""
+    from app import app
+    # Threads do not survive fork, so each worker watches the holiday data itself
+    if holiday_check_interval > 0:
+        holiday_reload.start_watcher(interval=holiday_check_interval)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    host, port = sock.getsockname()[:2]
+    server = make_server(host, port, app, threaded=threaded, fd=sock.fileno())
+    server.serve_forever()
+
+
+def main(argv=None):
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Serve the calendar with pre-forked worker processes")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5000, help="Port to listen on (0 picks a free port)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="Number of worker processes (default: one per CPU)")
+    parser.add_argument('--threads', action='store_true', help="Handle requests on threads within each worker")
+    parser.add_argument('--table-file', default=shared_tables.TABLE_FILE,
+                        help="Shared table file; generated if missing or out of date")
+    parser.add_argument('--warm-cache', action='store_true',
+                        help="Precompute month responses for 1900-2100 before forking")
+    parser.add_argument('--holiday-check-interval', type=float, default=holiday_reload.CHECK_INTERVAL,
+                        help="Seconds between checks of data/holidays.csv for changes (0 disables reloading)")
+    args = parser.parse_args(argv)
+    if not hasattr(os, 'fork'):
+        parser.error("Pre-fork serving needs os.fork; run app.py instead on this platform")
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+
+    if not shared_tables.is_current(args.table_file):
+        version = shared_tables.build_table_file(args.table_file)
+        print(f"Generated table file version {version}", flush=True)
+    header = shared_tables.map_table_file(args.table_file)
+
+    import app
+    if args.warm_cache:
+        app.warm_month_cache()
+    # Keep objects created so far out of the collector, so workers do not
+    # write to (and copy) the pages they share with the parent
+    gc.freeze()
+
+    sock = socket.create_server((args.host, args.port), backlog=128)
+    sock.set_inheritable(True)
+    host, port = sock.getsockname()[:2]
+    print(f"Listening on http://{host}:{port} with {args.workers} workers "
+          f"(table version {header['version']})", flush=True)
+
+    # {pid: time.monotonic() at start}
+    workers = {}
+    stopping = False
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            try:
+                run_worker(sock, args.threads, args.holiday_check_interval)
+            finally:
+                os._exit(0)
+        workers[pid] = time.monotonic()
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for _ in range(args.workers):
+        spawn()
+
+    early_exits = 0
+    result = 0
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        started = workers.pop(pid, None)
+        if stopping or started is None:
+            continue
+        early_exits = early_exits + 1 if time.monotonic() - started < MIN_UPTIME else 0
+        if early_exits >= MAX_EARLY_EXITS:
+            print(f"Worker {pid} exited with status {status}; {early_exits} workers in a row exited "
+                  f"within {MIN_UPTIME:g}s of starting, stopping", file=sys.stderr, flush=True)
+            result = 1
+            stop(None, None)
+            continue
+        delay = restart_delay(early_exits)
+        print(f"Worker {pid} exited with status {status}, restarting"
+              + (f" in {delay:g}s" if delay else ""), file=sys.stderr, flush=True)
+        time.sleep(delay)
+        if not stopping:
+            spawn()
+    sock.close()
+    return result
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Shared table file - conversion, holiday and solar term tables in one file
+
+The file is generated once (`python shared_tables.py build`) and mapped
+read-only with mmap by every server process, so the tables live in the
+page cache once no matter how many workers run.
+
+Layout: MAGIC, a 4-byte little-endian header length, a JSON header, then
+the tables as raw native arrays, each aligned to 8 bytes. The header lists
+every section as [offset from the data start, array typecode, item count].
+A file is current while both the holiday data version and the digest of
+the files the other tables are built from (source_version()) match.
+"""
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import sys
+from array import array
+import holidays
+import holiday_index
+import lunar_calendar
+import solar_terms
+
+TABLE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'calendar_tables.bin')
+MAGIC = b'LUNARTB1'
+_ALIGN = 8
+
+# Mapped file: (mmap object, header, path); kept so the memoryviews stay valid
+_mapped = None
+
+
+def _aligned(offset):
+    return (offset + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def source_version():
+    """Digest of the data files and modules the tables are built from"""
+    digest = hashlib.sha1()
+    for path in (lunar_calendar.DATA_FILE, solar_terms.DATA_FILE, lunar_calendar.__file__, solar_terms.__file__,
+                 holiday_index.__file__, __file__):
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:12]
+
+
+def _sections():
+    """(name, buffer) for every table to write, plus the extra header fields"""
+    sections = [('lunar.' + name, table) for name, table in lunar_calendar.export_tables().items()]
+
+    fields = holiday_index.get_index().fields()
+    sections += [('holidays.' + name, fields[name]) for name in holiday_index.INDEX_FIELDS]
+    kinds = sorted(set(fields['kinds']))
+    names = sorted(set(fields['names']))
+    kind_ids = {kind: i for i, kind in enumerate(kinds)}
+    name_ids = {name: i for i, name in enumerate(names)}
+    sections.append(('holidays.kind_ids', array('B', [kind_ids[kind] for kind in fields['kinds']])))
+    sections.append(('holidays.name_ids', array('H', [name_ids[name] for name in fields['names']])))
+
+    day_terms, table_years = solar_terms.export_day_terms()
+    sections.append(('solar_terms.day_terms', day_terms))
+
+    return sections, {
+        'holiday_version': holidays.HOLIDAY_DATA_VERSION,
+        'source_version': source_version(),
+        'holiday_kinds': kinds,
+        'holiday_names': names,
+        'solar_term_years': list(table_years),
+    }
+
+
+def build_table_file(path=TABLE_FILE):
+    """
+    Write the current tables to a shared table file
+
+    The file is written next to its destination and renamed into place, so
+    processes that already mapped the old file keep a consistent view.
+
+    Returns:
+        Version of the written file (digest of its tables)
+    """
+    sections, header = _sections()
+    layout = {}
+    buffers = []
+    offset = 0
+    for name, table in sections:
+        view = memoryview(table)
+        offset = _aligned(offset)
+        layout[name] = [offset, view.format, len(view)]
+        buffers.append((offset, view.tobytes()))
+        offset += view.nbytes
+
+    body = bytearray(offset)
+    for start, data in buffers:
+        body[start:start + len(data)] = data
+    header['version'] = hashlib.sha1(body).hexdigest()[:12]
+    header['sections'] = layout
+
+    header_bytes = json.dumps(header, ensure_ascii=False).encode('utf-8')
+    prefix = MAGIC + len(header_bytes).to_bytes(4, 'little') + header_bytes
+    prefix += b'\0' * (_aligned(len(prefix)) - len(prefix))
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    temp_path = f'{path}.{os.getpid()}.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(prefix)
+        f.write(body)
+    os.replace(temp_path, path)
+    return header['version']
+
+
+def _parse_header(data):
+    if bytes(data[:len(MAGIC)]) != MAGIC:
+        raise ValueError("Not a calendar table file")
+    length = int.from_bytes(data[len(MAGIC):len(MAGIC) + 4], 'little')
+    start = len(MAGIC) + 4
+    return json.loads(bytes(data[start:start + length]).decode('utf-8')), _aligned(start + length)
+
+
+def read_header(path=TABLE_FILE):
+    """Read the header of a table file without mapping it
+
+    Raises:
+        ValueError: If the file is not a calendar table file
+    """
+    with open(path, 'rb') as f:
+        prefix = f.read(len(MAGIC) + 4)
+        length = int.from_bytes(prefix[len(MAGIC):], 'little') if len(prefix) == len(MAGIC) + 4 else 0
+        return _parse_header(prefix + f.read(length))[0]
+
+
+def is_current(path=TABLE_FILE):
+    """Whether a table file exists and was built from the current holiday data, table data and code"""
+    try:
+        header = read_header(path)
+    except (OSError, ValueError):
+        return False
+    return (header['holiday_version'] == holidays.HOLIDAY_DATA_VERSION
+            and header.get('source_version') == source_version())
+
+
+def map_table_file(path=TABLE_FILE):
+    """
+    Map a table file read-only and serve all lookups from it
+
+    The holiday section is only used when it matches the current holiday
+    data; otherwise the holiday index is rebuilt in this process as usual.
+
+    Returns:
+        The file header
+
+    Raises:
+        OSError: If the file cannot be opened
+        ValueError: If the file is not a calendar table file
+    """
+    global _mapped
+    with open(path, 'rb') as f:
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    header, data_start = _parse_header(mapping)
+    view = memoryview(mapping)
+
+    def section(name):
+        offset, typecode, count = header['sections'][name]
+        start = data_start + offset
+        return view[start:start + count * array(typecode).itemsize].cast(typecode)
+
+    lunar_calendar.install_tables({name: section('lunar.' + name) for name in lunar_calendar.TABLE_NAMES})
+    solar_terms.install_day_terms(section('solar_terms.day_terms'), header['solar_term_years'])
+    if header['holiday_version'] == holidays.HOLIDAY_DATA_VERSION:
+        fields = {name: section('holidays.' + name) for name in holiday_index.INDEX_FIELDS}
+        fields['kinds'] = [header['holiday_kinds'][i] for i in section('holidays.kind_ids')]
+        fields['names'] = [header['holiday_names'][i] for i in section('holidays.name_ids')]
+        holiday_index.install_index(holiday_index.HolidayIndex.from_fields(fields, header['holiday_version']))
+
+    _mapped = (mapping, header, os.path.abspath(path))
+    return header
+
+
+def mapped_table_info():
+    """Version, holiday data version and path of the mapped table file, or None"""
+    if _mapped is None:
+        return None
+    _, header, path = _mapped
+    return {'version': header['version'], 'holiday_version': header['holiday_version'], 'path': path}
+
+
+def main(argv=None):
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Shared calendar table file tools")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    build = subparsers.add_parser('build', help="Generate the table file")
+    build.add_argument('-o', '--output', default=TABLE_FILE)
+    show = subparsers.add_parser('show', help="Print the header of a table file")
+    show.add_argument('path', nargs='?', default=TABLE_FILE)
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        version = build_table_file(args.output)
+        print(f"Wrote table file version {version} to {args.output}")
+    else:
+        header = read_header(args.path)
+        print(f"version          {header['version']}")
+        print(f"holiday version  {header['holiday_version']}")
+        print(f"source version   {header.get('source_version')}")
+        for name, (offset, typecode, count) in header['sections'].items():
+            print(f"{name:<36} {typecode} x {count}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
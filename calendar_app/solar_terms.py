@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Solar term service - 24 solar terms from a precomputed table
+
+Dates for 1900-2100 are read from data/solar_terms.csv, generated with
+`python solar_terms.py build`. Other years are computed with the ephem
+based lunarcalendar.solarterm module, memoized, and appended to
+data/solar_terms_computed.csv so other processes and later runs reuse them.
+"""
+
+import argparse
+import calendar as cal
+import csv
+import datetime
+import os
+import sys
+from array import array
+import metrics
+import row_cache
+from holidays import SOLAR_TERMS_CN
+
+DATA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'solar_terms.csv')
+# Computed years outside the table, in the same format
+CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'solar_terms_computed.csv')
+TABLE_FIRST_YEAR = 1900
+TABLE_LAST_YEAR = 2100
+# Number of computed (out-of-table) years kept in memory
+COMPUTED_CACHE_SIZE = 64
+
+_FIRST_ORDINAL = datetime.date(TABLE_FIRST_YEAR, 1, 1).toordinal()
+_DAY_COUNT = datetime.date(TABLE_LAST_YEAR + 1, 1, 1).toordinal() - _FIRST_ORDINAL
+
+# Loaded table: per day of 1900-2100, the term index + 1 (0 if no term
+# starts that day), and the (first, last) years it covers
+_day_terms = None
+_table_years = None
+
+
+def compute_year(year):
+    """Compute the solar term dates of a Gregorian year with ephem (slow)
+
+    Returns:
+        List of 24 datetime.date, indexed like SOLAR_TERMS_CN
+    """
+    from lunarcalendar.solarterm import solarterms
+    return [term(year) for term in solarterms]
+
+
+def _index_year(dates):
+    return {(date.month, date.day): index for index, date in enumerate(dates)}
+
+
+def load_table(path=DATA_FILE):
+    """Read a solar term table file
+
+    Returns:
+        {year: list of 24 datetime.date indexed like SOLAR_TERMS_CN}
+    """
+    table = {}
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        next(reader)
+        for row in reader:
+            year = int(row[0])
+            table[year] = [datetime.date(year, int(value[:2]), int(value[3:])) for value in row[1:]]
+    return table
+
+
+def build_day_terms(table):
+    """Flatten a loaded table into the per-day array used for lookups
+
+    Returns:
+        (array of term index + 1 per day of 1900-2100, (first year, last year) covered)
+    """
+    day_terms = array('B', [0]) * _DAY_COUNT
+    years = sorted(year for year in table if TABLE_FIRST_YEAR <= year <= TABLE_LAST_YEAR)
+    for year in years:
+        for index, date in enumerate(table[year]):
+            day_terms[date.toordinal() - _FIRST_ORDINAL] = index + 1
+    return day_terms, (years[0], years[-1]) if years else (0, -1)
+
+
+def install_day_terms(day_terms, table_years):
+    """Use a prebuilt per-day term array, e.g. one mapped from a shared table file"""
+    global _day_terms, _table_years
+    _day_terms, _table_years = day_terms, tuple(table_years)
+
+
+def export_day_terms():
+    """The per-day term array and the years it covers, loading the table if needed"""
+    if _day_terms is None:
+        _load()
+    return _day_terms, _table_years
+
+
+def _load():
+    table = load_table() if os.path.exists(DATA_FILE) else {}
+    install_day_terms(*build_day_terms(table))
+
+
+def _format_dates(dates):
+    return [f'{date.month:02d}-{date.day:02d}' for date in dates]
+
+
+@metrics.counted_lru_cache(maxsize=COMPUTED_CACHE_SIZE)
+def _computed_year(year):
+    for row in row_cache.read_rows(CACHE_FILE):
+        if int(row[0]) == year:
+            return _index_year([datetime.date(year, int(value[:2]), int(value[3:])) for value in row[1:]])
+    dates = compute_year(year)
+    row_cache.append_rows(CACHE_FILE, ['year'] + list(SOLAR_TERMS_CN), [[year] + _format_dates(dates)])
+    return _index_year(dates)
+
+
+def _in_table(year):
+    if _day_terms is None:
+        _load()
+    return _table_years[0] <= year <= _table_years[1]
+
+
+def get_solar_term(year, month, day):
+    """Get the solar term starting on a date
+
+    Returns:
+        Solar term name or empty string if no term starts that day
+    """
+    if _in_table(year):
+        index = _day_terms[datetime.date(year, month, day).toordinal() - _FIRST_ORDINAL] - 1
+    else:
+        index = _computed_year(year).get((month, day), -1)
+    return "" if index < 0 else SOLAR_TERMS_CN[index]
+
+
+def get_month_solar_terms(year, month):
+    """Get the solar terms of a month
+
+    Returns:
+        {day: name} for the days on which a term starts
+    """
+    if _in_table(year):
+        start = datetime.date(year, month, 1).toordinal() - _FIRST_ORDINAL
+        days = _day_terms[start:start + cal.monthrange(year, month)[1]]
+        return {day: SOLAR_TERMS_CN[index - 1] for day, index in enumerate(days, 1) if index}
+    return {day: SOLAR_TERMS_CN[index] for (term_month, day), index in _computed_year(year).items()
+            if term_month == month}
+
+
+def get_solar_terms(year):
+    """Get all solar terms of a year
+
+    Returns:
+        List of (datetime.date, name) in date order
+    """
+    return [(datetime.date(year, month, day), name)
+            for month in range(1, 13) for day, name in sorted(get_month_solar_terms(year, month).items())]
+
+
+def build_table(first_year=TABLE_FIRST_YEAR, last_year=TABLE_LAST_YEAR, path=DATA_FILE):
+    """Compute the solar terms for a range of years and write the table file"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(['year'] + list(SOLAR_TERMS_CN))
+        for year in range(first_year, last_year + 1):
+            writer.writerow([year] + _format_dates(compute_year(year)))
+
+
+def main(argv=None):
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Solar term table tools")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    build = subparsers.add_parser('build', help="Regenerate the precomputed solar term table")
+    build.add_argument('--from', dest='first_year', type=int, default=TABLE_FIRST_YEAR)
+    build.add_argument('--to', dest='last_year', type=int, default=TABLE_LAST_YEAR)
+    build.add_argument('-o', '--output', default=DATA_FILE)
+    show = subparsers.add_parser('show', help="Print the solar terms of a year")
+    show.add_argument('year', type=int)
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        build_table(args.first_year, args.last_year, args.output)
+        print(f"Wrote solar terms {args.first_year}-{args.last_year} to {args.output}")
+    else:
+        for date, name in get_solar_terms(args.year):
+            print(f"{date}  {name}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,218 @@
+// Lunar table decoder - month grids and lunar dates from the table served at /api/table
+//
+// Mirrors month_grid.build_month_grid: the grids it returns have the same
+// shape as the /api/calendar month payload, so the page can render either.
+(function (root) {
+    const DAY_MS = 86400000;
+    const DAYS_IN_MONTH = [0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31];
+    // 1984 was a 甲子 year, and the table's first day (1900-01-01) a 甲戌 day
+    const GANZHI_EPOCH_YEAR = 1984;
+    const FIRST_DAY_GANZHI = 10;
+
+    function mod(value, divisor) {
+        return ((value % divisor) + divisor) % divisor;
+    }
+
+    function isLeapYear(year) {
+        return year % 4 === 0 && (year % 100 !== 0 || year % 400 === 0);
+    }
+
+    function daysInMonth(year, month) {
+        return month === 2 && isLeapYear(year) ? 29 : DAYS_IN_MONTH[month];
+    }
+
+    function LunarTable(data) {
+        if (data.format !== 1) {
+            throw new Error(`Unsupported lunar table format ${data.format}`);
+        }
+        this.data = data;
+        this.firstYear = data.first_year;
+        this.lastYear = data.last_year;
+        this.epoch = Date.UTC(data.first_year, 0, 1);
+
+        // Per lunar month in calendar order: first day offset, length,
+        // lunar year, month number and leap flag
+        this.monthStarts = [];
+        this.months = [];
+        data.lunar_years.forEach(([newYear, leap, mask], index) => {
+            const lunarYear = data.first_lunar_year + index;
+            let start = newYear;
+            for (let slot = 0; slot < (leap ? 13 : 12); slot++) {
+                const length = mask & (1 << slot) ? 30 : 29;
+                // Slots after the leap month shift down by one month number
+                const month = leap && slot >= leap ? slot : slot + 1;
+                this.monthStarts.push(start);
+                this.months.push({year: lunarYear, month: month, isleap: leap > 0 && slot === leap, days: length});
+                start += length;
+            }
+        });
+
+        // Per Gregorian year: {"month-day": name}
+        this.gregorianHolidays = {};
+        Object.entries(data.gregorian_holidays).forEach(([year, days]) => {
+            const names = {};
+            days.forEach(([month, day, name]) => { names[`${month}-${day}`] = name; });
+            this.gregorianHolidays[year] = names;
+        });
+        this.lunarHolidays = {};
+        data.lunar_holidays.forEach(([month, day, name]) => { this.lunarHolidays[`${month}-${day}`] = name; });
+    }
+
+    // Whether a Gregorian year is covered by the table
+    LunarTable.prototype.covers = function (year) {
+        return year >= this.firstYear && year <= this.lastYear;
+    };
+
+    LunarTable.prototype.dayOffset = function (year, month, day) {
+        return Math.round((Date.UTC(year, month - 1, day) - this.epoch) / DAY_MS);
+    };
+
+    // Index of the lunar month containing a day offset (binary search)
+    LunarTable.prototype.monthIndex = function (offset) {
+        let low = 0;
+        let high = this.monthStarts.length - 1;
+        while (low < high) {
+            const middle = (low + high + 1) >> 1;
+            if (this.monthStarts[middle] <= offset) {
+                low = middle;
+            } else {
+                high = middle - 1;
+            }
+        }
+        return low;
+    };
+
+    // Gregorian to lunar, like lunar_calendar.solar_to_lunar
+    LunarTable.prototype.solarToLunar = function (year, month, day) {
+        if (!this.covers(year)) {
+            throw new RangeError(`Year ${year} is outside ${this.firstYear}-${this.lastYear}`);
+        }
+        const offset = this.dayOffset(year, month, day);
+        const index = this.monthIndex(offset);
+        const lunarMonth = this.months[index];
+        return {
+            year: lunarMonth.year,
+            month: lunarMonth.month,
+            day: offset - this.monthStarts[index] + 1,
+            isleap: lunarMonth.isleap,
+            month_days: lunarMonth.days
+        };
+    };
+
+    // Like lunar_calendar.format_lunar
+    LunarTable.prototype.formatLunar = function (month, day, isleap) {
+        const monthName = (isleap ? this.data.leap_prefix : '') + this.data.month_names[month];
+        return `${monthName} ${this.data.day_names[day]}`;
+    };
+
+    // Like holidays.get_lunar_holiday
+    LunarTable.prototype.lunarHoliday = function (lunar) {
+        if (lunar.isleap) {
+            return '';
+        }
+        // New Year's Eve is listed as (12, 30) but falls on the last day of the year
+        const day = lunar.month === 12 && lunar.day === lunar.month_days ? 30 : lunar.day;
+        return this.lunarHolidays[`${lunar.month}-${day}`] || '';
+    };
+
+    LunarTable.prototype.gregorianHoliday = function (year, month, day) {
+        const names = this.gregorianHolidays[year];
+        return (names && names[`${month}-${day}`]) || '';
+    };
+
+    // Solar terms of a month: {day: name}
+    LunarTable.prototype.monthSolarTerms = function (year, month) {
+        const terms = {};
+        const yearStart = this.dayOffset(year, 1, 1);
+        const monthStart = this.dayOffset(year, month, 1) - yearStart;
+        const length = daysInMonth(year, month);
+        this.data.solar_terms[year - this.firstYear].forEach((dayOfYear, index) => {
+            if (dayOfYear >= monthStart && dayOfYear < monthStart + length) {
+                terms[dayOfYear - monthStart + 1] = this.data.solar_term_names[index];
+            }
+        });
+        return terms;
+    };
+
+    // Almanac names of a day, like almanac.get_almanac: the ganzhi year
+    // starts at Spring Begins and the ganzhi months at the sectional terms
+    // (even indices)
+    LunarTable.prototype.almanac = function (year, month, day, lunarYear) {
+        const offset = this.dayOffset(year, month, day);
+        const dayOfYear = offset - this.dayOffset(year, 1, 1);
+        // Before Minor Cold the day is in Winter Solstice, in the Major Snow month
+        let term = 21;
+        let sectional = 20;
+        let termStart = -1;
+        let sectionalStart = -1;
+        this.data.solar_terms[year - this.firstYear].forEach((start, index) => {
+            if (start <= dayOfYear && start > termStart) {
+                term = index;
+                termStart = start;
+            }
+            if (index % 2 === 0 && start <= dayOfYear && start > sectionalStart) {
+                sectional = index;
+                sectionalStart = start;
+            }
+        });
+        const names = this.data.ganzhi_names;
+        const ganzhiYear = month <= 2 && sectional >= 20 ? year - 1 : year;
+        const yearIndex = mod(ganzhiYear - GANZHI_EPOCH_YEAR, 60);
+        const monthNumber = sectional / 2;
+        const monthStem = (yearIndex % 5 * 2 + 2 + monthNumber) % 10;
+        return {
+            year_ganzhi: names[yearIndex],
+            month_ganzhi: names[mod(6 * monthStem - 5 * ((2 + monthNumber) % 12), 60)],
+            day_ganzhi: names[mod(offset + FIRST_DAY_GANZHI, 60)],
+            zodiac: this.data.zodiac_animals[mod(lunarYear - GANZHI_EPOCH_YEAR, 12)],
+            current_term: this.data.solar_term_names[term]
+        };
+    };
+
+    // Month grid in the /api/calendar/<year>/<month> payload shape
+    LunarTable.prototype.monthGrid = function (year, month) {
+        const firstOffset = this.dayOffset(year, month, 1);
+        // 1900-01-01 was a Monday, so offsets count weekdays from Monday
+        const firstWeekday = ((firstOffset % 7) + 7) % 7;
+        const terms = this.monthSolarTerms(year, month);
+
+        const cells = new Array(firstWeekday).fill(null);
+        for (let day = 1; day <= daysInMonth(year, month); day++) {
+            const lunar = this.solarToLunar(year, month, day);
+            const almanac = this.almanac(year, month, day, lunar.year);
+            cells.push({
+                day: day,
+                weekday: this.data.weekday_names[(firstWeekday + day - 1) % 7],
+                lunar: this.formatLunar(lunar.month, lunar.day, lunar.isleap),
+                lunar_year: lunar.year,
+                lunar_month: lunar.month,
+                lunar_day: lunar.day,
+                lunar_leap: lunar.isleap,
+                greg_holiday: this.gregorianHoliday(year, month, day),
+                lunar_holiday: this.lunarHoliday(lunar),
+                solar_term: terms[day] || '',
+                lunar_month_days: lunar.month_days,
+                year_ganzhi: almanac.year_ganzhi,
+                month_ganzhi: almanac.month_ganzhi,
+                day_ganzhi: almanac.day_ganzhi,
+                zodiac: almanac.zodiac,
+                current_term: almanac.current_term
+            });
+        }
+        while (cells.length % 7) {
+            cells.push(null);
+        }
+
+        const weeks = [];
+        for (let i = 0; i < cells.length; i += 7) {
+            weeks.push(cells.slice(i, i + 7));
+        }
+        return {year: year, month: month, days: weeks};
+    };
+
+    if (typeof module !== 'undefined' && module.exports) {
+        module.exports = LunarTable;
+    } else {
+        root.LunarTable = LunarTable;
+    }
+})(this);
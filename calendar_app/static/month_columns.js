@@ -0,0 +1,59 @@
+// Columnar month decoder - expands /api/calendar?format=columnar months
+//
+// The result has the same shape as the default month payload (weeks of day
+// objects padded with null), so the page renders either.
+(function (root) {
+    // month_grid.WEEKDAY_NAMES, Monday first
+    const WEEKDAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday'];
+
+    function expandMonth(data) {
+        if (data.format !== 'columnar') {
+            throw new Error(`Unsupported month format ${data.format}`);
+        }
+        const strings = data.strings;
+        const cells = new Array(data.first_weekday).fill(null);
+        let lunarYear = data.lunar_year;
+        data.lunar_day.forEach((lunarDay, index) => {
+            const lunarMonth = data.lunar_month[index];
+            const isleap = data.lunar_leap[index] === 1;
+            // lunar_year is that of the 1st; a new one starts on the 1st of month 1
+            if (index > 0 && lunarMonth === 1 && lunarDay === 1 && !isleap) {
+                lunarYear++;
+            }
+            cells.push({
+                day: index + 1,
+                weekday: WEEKDAY_NAMES[(data.first_weekday + index) % 7],
+                lunar: strings[data.lunar[index]],
+                lunar_year: lunarYear,
+                lunar_month: lunarMonth,
+                lunar_day: lunarDay,
+                lunar_leap: isleap,
+                greg_holiday: strings[data.greg_holiday[index]],
+                lunar_holiday: strings[data.lunar_holiday[index]],
+                solar_term: strings[data.solar_term[index]],
+                lunar_month_days: data.lunar_month_days[index],
+                year_ganzhi: strings[data.year_ganzhi[index]],
+                month_ganzhi: strings[data.month_ganzhi[index]],
+                day_ganzhi: strings[data.day_ganzhi[index]],
+                zodiac: strings[data.zodiac[index]],
+                current_term: strings[data.current_term[index]]
+            });
+        });
+        while (cells.length % 7) {
+            cells.push(null);
+        }
+
+        const weeks = [];
+        for (let i = 0; i < cells.length; i += 7) {
+            weeks.push(cells.slice(i, i + 7));
+        }
+        return {year: data.year, month: data.month, days: weeks};
+    }
+
+    const MonthColumns = {expandMonth: expandMonth};
+    if (typeof module !== 'undefined' && module.exports) {
+        module.exports = MonthColumns;
+    } else {
+        root.MonthColumns = MonthColumns;
+    }
+})(this);
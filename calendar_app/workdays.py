@@ -0,0 +1,121 @@
+# Working day calculator - Chinese State Council holidays and make-up workdays
+import datetime
+from array import array
+from bisect import bisect_left, bisect_right
+import holidays
+
+TABLE_FIRST_YEAR = 1900
+TABLE_LAST_YEAR = 2100
+
+_FIRST_ORDINAL = datetime.date(TABLE_FIRST_YEAR, 1, 1).toordinal()
+_END_ORDINAL = datetime.date(TABLE_LAST_YEAR + 1, 1, 1).toordinal()
+
+# (holiday data version, cumulative working days): cumulative[i] is the
+# number of working days in the i days starting 1900-01-01; rebuilt when the
+# holiday data changes
+_table = None
+
+
+def build_table(data):
+    """Compile the working day table of a holidays.HolidayData, for install_table()"""
+    off_days = set()
+    for year, days in data.gregorian.items():
+        off_days.update(datetime.date(year, month, day).toordinal() for month, day in days)
+    extra_days = set()
+    for year, days in data.adjusted.items():
+        extra_days.update(datetime.date(year, month, day).toordinal() for month, day in days)
+
+    cumulative = array('i', [0])
+    count = 0
+    # weekday() 5 and 6 are Saturday and Sunday
+    weekday = datetime.date(TABLE_FIRST_YEAR, 1, 1).weekday()
+    for ordinal in range(_FIRST_ORDINAL, _END_ORDINAL):
+        if ordinal in extra_days or (weekday < 5 and ordinal not in off_days):
+            count += 1
+        cumulative.append(count)
+        weekday = (weekday + 1) % 7
+    return data.version, cumulative
+
+
+def install_table(table):
+    """Use a prebuilt table; it is replaced when the holiday data version changes"""
+    global _table
+    _table = table
+
+
+def _get_cumulative():
+    global _table
+    table = _table
+    version = holidays.HOLIDAY_DATA_VERSION
+    if table is None or table[0] != version:
+        table = _table = (version, build_table(holidays.get_holiday_data())[1])
+    return table[1]
+
+
+def _offset(date):
+    offset = date.toordinal() - _FIRST_ORDINAL
+    if not 0 <= offset <= _END_ORDINAL - _FIRST_ORDINAL:
+        raise ValueError(f"Working days are only known for {TABLE_FIRST_YEAR}-{TABLE_LAST_YEAR}")
+    return offset
+
+
+def is_workday(date):
+    """Check whether a date is a working day
+
+    Weekdays are working days unless they are official holidays; weekend days
+    are rest days unless they are make-up working days. Years without an
+    announced schedule only follow the weekly rule.
+    """
+    cumulative = _get_cumulative()
+    offset = _offset(date)
+    if offset == len(cumulative) - 1:
+        raise ValueError(f"Working days are only known for {TABLE_FIRST_YEAR}-{TABLE_LAST_YEAR}")
+    return cumulative[offset + 1] > cumulative[offset]
+
+
+def workdays_between(start, end):
+    """
+    Count working days from start (inclusive) to end (exclusive)
+
+    Args:
+        start: datetime.date
+        end: datetime.date
+
+    Returns:
+        Number of working days, negative if end is before start
+
+    Raises:
+        ValueError: If a date is outside 1900-2100
+    """
+    cumulative = _get_cumulative()
+    return cumulative[_offset(end)] - cumulative[_offset(start)]
+
+
+def add_workdays(date, n):
+    """
+    Get the date n working days after date (or before it if n is negative)
+
+    Args:
+        date: datetime.date to count from (not counted itself)
+        n: Number of working days
+
+    Returns:
+        datetime.date, or date itself if n is 0
+
+    Raises:
+        ValueError: If the result would fall outside 1900-2100
+    """
+    cumulative = _get_cumulative()
+    offset = _offset(date)
+    if n > 0:
+        target = cumulative[min(offset + 1, len(cumulative) - 1)] + n
+        index = bisect_left(cumulative, target)
+        if index == len(cumulative):
+            raise ValueError(f"Working days are only known for {TABLE_FIRST_YEAR}-{TABLE_LAST_YEAR}")
+        return datetime.date.fromordinal(_FIRST_ORDINAL + index - 1)
+    if n < 0:
+        target = cumulative[offset] + n
+        if target < 0:
+            raise ValueError(f"Working days are only known for {TABLE_FIRST_YEAR}-{TABLE_LAST_YEAR}")
+        return datetime.date.fromordinal(_FIRST_ORDINAL + bisect_right(cumulative, target) - 1)
+    return date
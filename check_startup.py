@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cold-start check - Import time budgets for the conversion, export and grid paths
+
+Each scenario runs in a fresh interpreter under `python -X importtime`. The
+check fails if a scenario imports a module it must not load (the astronomy
+stack behind lunarcalendar's festival and solar term modules, or numpy), or
+if its imports take longer than the budget. Interpreter startup modules are
+not counted, and the app is byte-compiled first so compiling sources (as with
+PYTHONDONTWRITEBYTECODE) does not count either.
+
+    python check_startup.py              # check all scenarios
+    python check_startup.py --scale 2    # double the budgets on a slow machine
+"""
+
+import argparse
+import compileall
+import os
+import subprocess
+import sys
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'calendar_app')
+
+# Modules no scenario may import
+FORBIDDEN_MODULES = ('ephem', 'pytz', 'dateutil', 'lunarcalendar', 'numpy')
+
+# name: (code run after the imports it needs, import budget in milliseconds)
+SCENARIOS = {
+    'convert': ("import lunar_calendar\n"
+                "lunar_calendar.solar_to_lunar(2026, 2, 17)\n"
+                "lunar_calendar.lunar_to_solar(2026, 1, 1)", 10),
+    'export': ("import datetime, export\n"
+               "list(export.iter_export('csv', datetime.date(2026, 1, 1), datetime.date(2026, 12, 31)))", 45),
+    'month_grid': ("import month_grid\n"
+                   "month_grid.build_month_grid(2026, 2)", 45),
+}
+
+
+def import_times(code):
+    """Run code under -X importtime in a fresh interpreter
+
+    Returns:
+        {top-level module name: cumulative import time in microseconds},
+        plus the set of every module imported at any depth
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=APP_DIR,
+                            capture_output=True, text=True, check=True)
+    top_level, imported = {}, set()
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        imported.add(name.strip())
+        if not name.startswith('  ', 1):
+            top_level[name.strip()] = int(cumulative)
+    return top_level, imported
+
+
+def check(scale=1.0, out=sys.stdout):
+    """Check every scenario, printing a line each
+
+    Returns:
+        List of failure messages
+    """
+    compileall.compile_dir(APP_DIR, quiet=1)
+    startup, _ = import_times('pass')
+    failures = []
+    for name, (code, budget_ms) in SCENARIOS.items():
+        top_level, imported = import_times(code)
+        counted = {module: us for module, us in top_level.items() if module not in startup}
+        total_ms = sum(counted.values()) / 1000
+        heaviest = sorted(counted.items(), key=lambda item: -item[1])[:3]
+        print(f"{name:<12} {total_ms:8.1f} ms (budget {budget_ms * scale:.0f} ms)  heaviest: "
+              + ", ".join(f"{module} {us / 1000:.1f} ms" for module, us in heaviest), file=out)
+
+        forbidden = sorted(module for module in imported if module.split('.')[0] in FORBIDDEN_MODULES)
+        if forbidden:
+            failures.append(f"{name}: imports {', '.join(forbidden)}")
+        if total_ms > budget_ms * scale:
+            failures.append(f"{name}: imports took {total_ms:.1f} ms, budget is {budget_ms * scale:.0f} ms")
+    return failures
+
+
+def main(argv=None):
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Check cold-start import budgets")
+    parser.add_argument('--scale', type=float, default=1.0, help="Multiply every budget (default: 1)")
+    args = parser.parse_args(argv)
+
+    failures = check(args.scale)
+    for failure in failures:
+        print(f"FAIL {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Load generator - Hammer a running calendar server with month requests
+
+    cd calendar_app && python serve.py --workers 4 --port 8000
+    python load_test.py --url http://127.0.0.1:8000 --concurrency 16 --duration 10
+
+Reports requests/sec and p50/p99 latency, then asks /ready which workers
+answered and which table version each has mapped. For a local server the
+resident (RSS) and proportional (PSS) memory of each worker is read from
+/proc, which shows how much of it is shared.
+"""
+
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def _get(url):
+    with urllib.request.urlopen(url, timeout=30) as response:
+        return response.read()
+
+
+def run_load(base_url, concurrency, duration):
+    """Request random months from concurrency threads for duration seconds
+
+    Returns:
+        (list of latencies in seconds, error count)
+    """
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def client(seed):
+        rng = random.Random(seed)
+        local, failed = [], 0
+        while time.perf_counter() < deadline:
+            url = f'{base_url}/api/calendar/{rng.randint(1900, 2100)}/{rng.randint(1, 12)}'
+            start = time.perf_counter()
+            try:
+                _get(url)
+            except (OSError, urllib.error.URLError):
+                failed += 1
+                continue
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors[0]
+
+
+def _memory_kb(pid):
+    """(RSS, PSS) in kB from /proc, or None if not readable"""
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as f:
+            values = dict(line.split()[:2] for line in f if line.startswith(('Rss:', 'Pss:')))
+        return int(values['Rss:']), int(values['Pss:'])
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def survey_workers(base_url, probes):
+    """Ask /ready repeatedly; returns {pid: readiness document}"""
+    workers = {}
+    for _ in range(probes):
+        info = json.loads(_get(f'{base_url}/ready'))
+        workers[info['pid']] = info
+    return workers
+
+
+def main(argv=None):
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Load test a running calendar server")
+    parser.add_argument('--url', default='http://127.0.0.1:5000', help="Server base URL")
+    parser.add_argument('--concurrency', type=int, default=8, help="Concurrent clients (default: 8)")
+    parser.add_argument('--duration', type=float, default=10.0, help="Seconds to run (default: 10)")
+    parser.add_argument('--probes', type=int, default=50, help="/ready requests used to find workers")
+    args = parser.parse_args(argv)
+    base_url = args.url.rstrip('/')
+
+    latencies, errors = run_load(base_url, args.concurrency, args.duration)
+    print(f"{len(latencies):,} requests in {args.duration:.0f} s with {args.concurrency} clients, {errors} errors")
+    if latencies:
+        print(f"{len(latencies) / args.duration:,.0f} requests/sec, "
+              f"p50 {_percentile(latencies, 0.50) * 1000:.2f} ms, p99 {_percentile(latencies, 0.99) * 1000:.2f} ms")
+
+    print(f"\n{'worker':>8} {'table version':>14} {'RSS (kB)':>10} {'PSS (kB)':>10}")
+    for pid, info in sorted(survey_workers(base_url, args.probes).items()):
+        memory = _memory_kb(pid)
+        rss, pss = memory if memory else ('-', '-')
+        print(f"{pid:>8} {info['table_version'] or 'not mapped':>14} {rss:>10} {pss:>10}")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
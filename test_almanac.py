@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for almanac - ganzhi, zodiac and current solar term column store
+"""
+
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'calendar_app'))
+
+import datetime
+import pytest
+import almanac
+import app
+import astro_calendar
+import lunar_calendar
+import solar_terms
+from almanac import get_almanac
+
+
+@pytest.fixture
+def cache_files(tmp_path, monkeypatch):
+    """Keep computed rows out of the shipped data directory"""
+    monkeypatch.setattr(astro_calendar, 'CACHE_FILE', str(tmp_path / 'lunar_years.csv'))
+    monkeypatch.setattr(astro_calendar, '_years', None)
+    monkeypatch.setattr(solar_terms, 'CACHE_FILE', str(tmp_path / 'solar_terms.csv'))
+    monkeypatch.setattr(lunar_calendar, '_extended_years', {})
+    solar_terms._computed_year.cache_clear()
+    almanac._computed_year.cache_clear()
+    yield
+    solar_terms._computed_year.cache_clear()
+    almanac._computed_year.cache_clear()
+
+
+@pytest.mark.parametrize('date, lunar_year, expected', [
+    ((1900, 1, 1), 1899, ('己亥', '丙子', '甲戌', 'Pig', 'Winter Solstice')),
+    ((2000, 1, 1), 1999, ('己卯', '丙子', '戊午', 'Rabbit', 'Winter Solstice')),
+    # Spring Begins on 2024-02-04 starts the 甲辰 year and its 丙寅 month
+    ((2024, 2, 3), 2023, ('癸卯', '乙丑', '丁酉', 'Rabbit', 'Major Cold')),
+    ((2024, 2, 4), 2023, ('甲辰', '丙寅', '戊戌', 'Rabbit', 'Spring Begins')),
+    ((2024, 2, 10), 2024, ('甲辰', '丙寅', '甲辰', 'Dragon', 'Spring Begins')),
+    ((2024, 12, 31), 2024, ('甲辰', '丙子', '己巳', 'Dragon', 'Winter Solstice')),
+])
+def test_known_days(date, lunar_year, expected):
+    assert get_almanac(*date, lunar_year) == expected
+
+
+def test_data_file_matches_computed_columns(tmp_path, cache_files):
+    path = str(tmp_path / 'almanac.bin')
+    almanac.build_data_file(path)
+    with open(path, 'rb') as f:
+        assert f.read() == open(almanac.DATA_FILE, 'rb').read()
+
+    first_ordinal, columns = almanac._block(2024)
+    assert first_ordinal == datetime.date(2020, 1, 1).toordinal()
+    assert columns == tuple(bytes(column) for column in almanac.compute_columns(2020, 2029))
+
+
+def test_decades_are_loaded_on_first_use(monkeypatch):
+    monkeypatch.setattr(almanac, '_decades', {})
+    get_almanac(2024, 6, 1, 2024)
+    get_almanac(2029, 12, 31, 2029)
+    assert list(almanac._decades) == [12]
+
+
+def test_month_columns_match_days():
+    year_ganzhi, month_ganzhi, day_ganzhi, terms = almanac.month_columns(2023, 3)
+    assert len(day_ganzhi) == 31
+    for day in range(1, 32):
+        expected = get_almanac(2023, 3, day, 2023)
+        assert almanac.GANZHI_NAMES[month_ganzhi[day - 1]] == expected.month_ganzhi
+        assert almanac.GANZHI_NAMES[day_ganzhi[day - 1]] == expected.day_ganzhi
+        assert almanac.SOLAR_TERMS_CN[terms[day - 1]] == expected.solar_term
+
+
+def test_years_outside_the_file_are_computed(cache_files):
+    # 1700-02-04 was Spring Begins
+    assert get_almanac(1700, 2, 3, 1699).year_ganzhi == '己卯'
+    assert get_almanac(1700, 2, 4, 1699).year_ganzhi == '庚辰'
+    with pytest.raises(ValueError):
+        get_almanac(1599, 12, 31, 1599)
+
+
+def test_date_info_and_grid_fields():
+    client = app.app.test_client()
+    info = client.get('/api/date/2024/2/10').get_json()
+    assert (info['year_ganzhi'], info['month_ganzhi'], info['day_ganzhi']) == ('甲辰', '丙寅', '甲辰')
+    assert info['zodiac'] == 'Dragon'
+    assert info['current_term'] == 'Spring Begins'
+
+    month = client.get('/api/calendar/2024/2').get_json()
+    cell = next(cell for week in month['days'] for cell in week if cell and cell['day'] == 10)
+    assert {key: cell[key] for key in ('year_ganzhi', 'month_ganzhi', 'day_ganzhi', 'zodiac', 'current_term')} == \
+        {key: info[key] for key in ('year_ganzhi', 'month_ganzhi', 'day_ganzhi', 'zodiac', 'current_term')}
+    assert cell['lunar_month_days'] == info['lunar_month_days']
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for the Flask web application API
+"""
+
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'calendar_app'))
+
+import gzip
+import json
+import shutil
+import subprocess
+import pytest
+import holidays
+from app import app
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'calendar_app')
+
+
+@pytest.fixture
+def client():
+    return app.test_client()
+
+
+def test_calendar_month_grid(client):
+    response = client.get('/api/calendar/2026/2')
+    assert response.status_code == 200
+    data = response.get_json()
+    assert (data['year'], data['month']) == (2026, 2)
+    days = [day for week in data['days'] for day in week if day]
+    assert len(days) == 28
+    assert days[16]['lunar_holiday'] == 'Spring Festival'
+    assert days[3]['solar_term'] == 'Spring Begins'
+    # Today is marked by the client so the cached body never goes stale
+    assert 'is_today' not in days[0]
+
+
+def test_calendar_month_conditional_requests(client):
+    response = client.get('/api/calendar/2024/2')
+    assert response.headers['ETag']
+    assert 'max-age' in response.headers['Cache-Control']
+
+    cached = client.get('/api/calendar/2024/2', headers={'If-None-Match': response.headers['ETag']})
+    assert cached.status_code == 304
+    assert cached.data == b''
+
+    other = client.get('/api/calendar/2024/3', headers={'If-None-Match': response.headers['ETag']})
+    assert other.status_code == 200
+
+    # Revalidation goes by the ETag only, which changes with the body
+    assert 'Last-Modified' not in response.headers
+    since = client.get('/api/calendar/2024/2', headers={'If-Modified-Since': 'Fri, 01 Jan 2100 00:00:00 GMT'})
+    assert since.status_code == 200
+
+
+def test_calendar_columnar_format(client):
+    data = client.get('/api/calendar/2026/2?format=columnar').get_json()
+    assert (data['format'], data['first_weekday'], data['lunar_year']) == ('columnar', 6, 2025)
+    assert len(data['lunar_day']) == len(data['solar_term']) == 28
+    assert data['strings'][0] == ''
+    assert data['strings'][data['lunar_holiday'][16]] == 'Spring Festival'
+    assert data['strings'][data['solar_term'][3]] == 'Spring Begins'
+    assert (data['lunar_month'][16], data['lunar_day'][16]) == (1, 1)
+
+    year = client.get('/api/calendar/2026?format=columnar').get_json()
+    assert year['months'][1] == data
+    assert client.get('/api/calendar/2026/2?format=xml').status_code == 400
+    assert client.get('/api/calendar/2026?format=xml').status_code == 400
+
+
+def test_columnar_format_is_gzipped_when_accepted(client):
+    plain = client.get('/api/calendar/2026/2?format=columnar')
+    assert 'Accept-Encoding' in plain.headers['Vary']
+    assert 'Content-Encoding' not in plain.headers
+
+    compressed = client.get('/api/calendar/2026/2?format=columnar', headers={'Accept-Encoding': 'gzip'})
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(compressed.data) == plain.data
+    assert compressed.headers['ETag'] != plain.headers['ETag']
+    assert len(compressed.data) < len(plain.data) < len(client.get('/api/calendar/2026/2').data)
+
+    cached = client.get('/api/calendar/2026/2?format=columnar',
+                        headers={'Accept-Encoding': 'gzip', 'If-None-Match': compressed.headers['ETag']})
+    assert cached.status_code == 304
+
+
+@pytest.mark.skipif(shutil.which('node') is None, reason="node is not installed")
+def test_js_columnar_decoder_matches_month_payload(client, tmp_path):
+    months = [(2026, 2), (2023, 3), (2020, 5), (1900, 1), (2100, 12)]
+    path = tmp_path / 'months.json'
+    path.write_text(json.dumps([client.get(f'/api/calendar/{year}/{month}?format=columnar').get_json()
+                                for year, month in months]), encoding='utf-8')
+    script = ("const MonthColumns = require(process.argv[1]);"
+              "const months = JSON.parse(require('fs').readFileSync(process.argv[2], 'utf8'));"
+              "process.stdout.write(JSON.stringify(months.map(MonthColumns.expandMonth)));")
+    result = subprocess.run(['node', '-e', script, os.path.join(APP_DIR, 'static', 'month_columns.js'), str(path)],
+                            capture_output=True, text=True, check=True)
+    expected = [client.get(f'/api/calendar/{year}/{month}').get_json() for year, month in months]
+    assert json.loads(result.stdout) == expected
+
+
+def test_calendar_month_rejects_invalid_month(client):
+    assert client.get('/api/calendar/2026/13').status_code == 400
+    assert client.get('/api/calendar/1599/12').status_code == 400
+    assert client.get('/api/calendar/2401').status_code == 400
+
+
+def test_calendar_year_matches_months(client):
+    data = client.get('/api/calendar/2025').get_json()
+    assert [month['month'] for month in data['months']] == list(range(1, 13))
+    assert data['months'][5] == client.get('/api/calendar/2025/6').get_json()
+
+
+def test_calendar_range_includes_date_info_fields(client):
+    data = client.get('/api/calendar/range?from=2025-12&to=2026-02').get_json()
+    assert [(m['year'], m['month']) for m in data['months']] == [(2025, 12), (2026, 1), (2026, 2)]
+    spring_festival = data['months'][2]['days'][3][1]
+    assert spring_festival['day'] == 17
+    info = client.get('/api/date/2026/2/17').get_json()
+    assert spring_festival['weekday'] == info['weekday']
+    assert f"{spring_festival['lunar_year']} {spring_festival['lunar']}" == info['lunar_full']
+
+
+@pytest.mark.parametrize('query', [
+    'from=2026-02&to=2025-11',
+    'from=2020-01&to=2026-02',
+    'from=2026-13&to=2026-12',
+    'to=2026-01',
+])
+def test_calendar_range_rejects_bad_ranges(client, query):
+    assert client.get(f'/api/calendar/range?{query}').status_code == 400
+
+
+def test_date_info(client):
+    data = client.get('/api/date/2026/2/17').get_json()
+    assert data['gregorian'] == '2026-02-17'
+    assert data['weekday'] == 'Tuesday'
+    assert data['lunar_holiday'] == 'Spring Festival'
+
+
+def test_export_ndjson_stream(client):
+    response = client.get('/api/export?from=2026-02-16&to=2026-02-17&columns=date,lunar,lunar_holiday')
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    assert response.is_streamed
+    lines = response.get_data(as_text=True).splitlines()
+    assert lines == [
+        '{"date":"2026-02-16","lunar":"Dec Day 9","lunar_holiday":"New Year\'s Eve"}',
+        '{"date":"2026-02-17","lunar":"Jan Day 1","lunar_holiday":"Spring Festival"}',
+    ]
+
+
+def test_export_csv_spans_months(client):
+    response = client.get('/api/export?format=csv&from=2025-12-30&to=2026-01-02')
+    lines = response.get_data(as_text=True).splitlines()
+    assert lines[0].split(',') == ['date', 'weekday', 'lunar_year', 'lunar_month', 'lunar_day',
+                                   'lunar_leap', 'lunar', 'greg_holiday', 'lunar_holiday', 'solar_term']
+    assert [line.split(',')[0] for line in lines[1:]] == ['2025-12-30', '2025-12-31', '2026-01-01', '2026-01-02']
+
+
+@pytest.mark.parametrize('query', ['format=xml', 'from=2026-13-01', 'from=1899-12-31', 'columns=date,nope'])
+def test_export_rejects_bad_options(client, query):
+    assert client.get(f'/api/export?{query}').status_code == 400
+
+
+def test_workdays_count_and_add(client):
+    # 2026 Spring Festival: Feb 15-23 off, Saturday Feb 14 is a make-up workday
+    data = client.get('/api/workdays?from=2026-02-09&to=2026-03-02').get_json()
+    assert data['workdays'] == 11
+    data = client.get('/api/workdays?date=2026-02-13&add=2').get_json()
+    assert data['result'] == '2026-02-24'
+
+
+@pytest.mark.parametrize('query', ['from=2026-02-09', 'date=2026-02-30&add=1', 'date=2026-02-13&add=x',
+                                   'from=1899-01-01&to=2026-01-01'])
+def test_workdays_rejects_bad_queries(client, query):
+    assert client.get(f'/api/workdays?{query}').status_code == 400
+
+
+def test_ready(client):
+    data = client.get('/ready').get_json()
+    assert data['status'] == 'ready'
+    assert data['holiday_version'] == holidays.HOLIDAY_DATA_VERSION
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for astro_calendar - computed lunar years and conversion in 1600-2400
+"""
+
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'calendar_app'))
+
+import datetime
+import itertools
+import pytest
+import app
+import astro_calendar
+import lunar_calendar
+import solar_terms
+from lunar_calendar import solar_to_lunar, lunar_to_solar, lunar_month_days
+from month_grid import build_month_grid
+
+
+@pytest.fixture(autouse=True)
+def cache_files(tmp_path, monkeypatch):
+    """Keep computed rows out of the shipped data directory"""
+    monkeypatch.setattr(astro_calendar, 'CACHE_FILE', str(tmp_path / 'lunar_years.csv'))
+    monkeypatch.setattr(astro_calendar, '_years', None)
+    monkeypatch.setattr(solar_terms, 'CACHE_FILE', str(tmp_path / 'solar_terms.csv'))
+    monkeypatch.setattr(lunar_calendar, '_extended_years', {})
+    solar_terms._computed_year.cache_clear()
+    yield
+    solar_terms._computed_year.cache_clear()
+
+
+def test_computed_years_match_table():
+    table = {row[0]: row for row in lunar_calendar.load_years()}
+    differences = []
+    for lunar_year in range(1900, 2101):
+        record = astro_calendar.compute_year(lunar_year)
+        if record == table[lunar_year]:
+            continue
+        differences.append(lunar_year)
+        # Only a month start moved, by a day, for a new moon just before midnight
+        computed, expected = (list(itertools.accumulate(r[3])) for r in (record, table[lunar_year]))
+        assert record[:3] == table[lunar_year][:3] and computed[-1] == expected[-1]
+        for end, table_end in zip(computed, expected):
+            if end != table_end:
+                start = table[lunar_year][1] + datetime.timedelta(days=table_end)
+                day, moment = astro_calendar._new_moon_on_or_before(start)
+                assert day == start - datetime.timedelta(days=1)
+                assert astro_calendar._china_midnight(start) - moment < \
+                    astro_calendar.NEAR_MIDNIGHT / datetime.timedelta(days=1)
+    assert tuple(differences) == astro_calendar.TABLE_DIFFERENCES
+
+
+def test_years_are_computed_once_and_shared(monkeypatch):
+    record = astro_calendar.get_year(1700)
+    assert record[1] == datetime.date(1700, 2, 19)
+    assert lunar_calendar.load_years(astro_calendar.CACHE_FILE) == [record]
+
+    # A new process finds the year in the cache file
+    monkeypatch.setattr(astro_calendar, '_years', None)
+    monkeypatch.setattr(astro_calendar, 'compute_year', None)
+    assert astro_calendar.get_year(1700) == record
+
+
+@pytest.mark.parametrize('start, end', [
+    (datetime.date(1600, 1, 1), datetime.date(1600, 12, 31)),
+    (datetime.date(1899, 11, 1), datetime.date(1900, 3, 1)),
+    (datetime.date(2100, 11, 1), datetime.date(2101, 3, 1)),
+    (datetime.date(2400, 1, 1), datetime.date(2400, 12, 31)),
+])
+def test_conversion_is_continuous_and_round_trips(start, end):
+    previous = None
+    date = start
+    while date <= end:
+        lunar = solar_to_lunar(date.year, date.month, date.day)
+        assert lunar_to_solar(lunar.year, lunar.month, lunar.day, lunar.isleap) == (date.year, date.month, date.day)
+        assert lunar.month_days == lunar_month_days(lunar.year, lunar.month, lunar.isleap)
+        if previous is not None:
+            assert (lunar.day == 1) == (previous.day == previous.month_days), date
+        previous = lunar
+        date += datetime.timedelta(days=1)
+
+
+def test_dates_outside_extended_range():
+    assert solar_to_lunar(1599, 12, 31) is None
+    assert solar_to_lunar(2401, 1, 1) is None
+    assert solar_to_lunar(1700, 2, 30) is None
+    assert lunar_to_solar(1598, 1, 1) is None
+    assert lunar_month_days(2401, 1) == 0
+
+
+def test_extended_month_grid_and_api():
+    grid = build_month_grid(1700, 2)
+    assert grid.holiday(19) == 'Spring Festival'
+    assert grid.days[17].lunar_holiday == "New Year's Eve"
+    assert grid.days[3].solar_term == 'Spring Begins'
+
+    client = app.app.test_client()
+    data = client.get('/api/calendar/1700/2').get_json()
+    days = {cell['day']: cell for week in data['days'] for cell in week if cell}
+    assert days[19]['lunar'] == 'Jan Day 1'
+    assert client.get('/api/date/2400/6/1').get_json()['lunar_full'].startswith('2400 ')
+    assert client.get('/api/date/1500/2/17').status_code == 400
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for bench_suite - timing statistics and baseline comparison
+"""
+
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'calendar_app'))
+
+import bench_suite
+from bench_suite import Case, run_case, compare
+
+
+def test_run_case_reports_stats():
+    stats = run_case(Case('noop', lambda x: x, [(1,), (2,), (3,)], 2), duration=0)
+    assert stats['ops'] == bench_suite.MIN_ROUNDS * 2
+    assert stats['ops_per_sec'] > 0
+    assert 0 < stats['p50_us'] <= stats['p99_us']
+
+
+def test_compare_flags_slow_cases_only():
+    baseline = {'results': {'fast': {'ops_per_sec': 1000}, 'slow': {'ops_per_sec': 1000},
+                            'removed': {'ops_per_sec': 1000}}}
+    results = {'results': {'fast': {'ops_per_sec': 800}, 'slow': {'ops_per_sec': 500},
+                           'new': {'ops_per_sec': 1}}}
+    assert compare(results, baseline, tolerance=0.3) == [('slow', 1000, 500)]
+
+
+def test_baseline_from_another_setup_is_not_compared():
+    results = {'python': '3.11.7', 'machine': 'x86_64', 'host': 'ci'}
+    assert bench_suite.environment_mismatch(results, {'python': '3.11.7', 'machine': 'x86_64'}) == []
+    assert bench_suite.environment_mismatch(results, {'python': '3.12.1', 'machine': 'x86_64', 'host': 'dev'}) == \
+        [('host', 'dev', 'ci'), ('python', '3.12.1', '3.11.7')]
+
+
+def test_all_cases_run():
+    names = [case.name for case in bench_suite.build_cases()]
+    assert {'solar_to_lunar', 'lunar_to_solar', 'format_lunar', 'api_calendar_month',
+            'build_year_grids'} <= set(names)
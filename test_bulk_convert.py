@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for bulk_convert - batched conversion of many dates with per-item errors
+"""
+
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'calendar_app'))
+
+import datetime
+import io
+import json
+import random
+import app
+import bulk_convert
+from lunar_calendar import solar_to_lunar, format_lunar
+
+
+def test_batch_matches_single_conversions():
+    random.seed(1)
+    first = datetime.date(1900, 1, 1).toordinal()
+    dates = [datetime.date.fromordinal(first + random.randrange(73000)) for _ in range(2000)]
+    results = bulk_convert.convert_items([d.isoformat() for d in dates])
+    for date, result in zip(dates, results):
+        lunar = solar_to_lunar(date.year, date.month, date.day)
+        assert result == {
+            'gregorian': date.isoformat(),
+            'lunar_year': lunar.year,
+            'lunar_month': lunar.month,
+            'lunar_day': lunar.day,
+            'lunar_leap': lunar.isleap,
+            'lunar_month_days': lunar.month_days,
+            'lunar': format_lunar(*lunar[:4]),
+        }
+
+
+def test_items_keep_order_and_fail_alone():
+    results = bulk_convert.convert_items([
+        {'lunar': '2023-02-01', 'leap': True},
+        '2026-02-30',
+        {'gregorian': '2026-02-17'},
+        {'lunar': '2026-02-01', 'leap': True},
+        42,
+        '1500-01-01',
+        {'lunar': '2026-01-01', 'leap': 'yes'},
+    ])
+    assert results[0]['gregorian'] == '2023-03-22' and results[0]['lunar'] == 'Leap Feb Day 1'
+    assert results[2]['lunar'] == 'Jan Day 1'
+    assert [i for i, result in enumerate(results) if 'error' in result] == [1, 3, 4, 5, 6]
+    assert results[3] == {'error': 'No such lunar date'}
+
+
+def test_ndjson_stream():
+    body = b'"2026-02-17"\r\n\n{"lunar": "2026-01-01"}\nnot json\n"2026-02-18"'
+    # A tiny block size splits lines across reads
+    chunks = list(bulk_convert.iter_ndjson(bulk_convert.iter_lines(io.BytesIO(body), block_size=5), chunk_size=2))
+    assert len(chunks) == 2
+    lines = [json.loads(line) for line in ''.join(chunks).splitlines()]
+    assert [line.get('gregorian') for line in lines] == ['2026-02-17', '2026-02-17', None, '2026-02-18']
+    assert lines[0] == bulk_convert.convert_items(['2026-02-17'])[0]
+
+
+def test_ndjson_comma_joined_line_is_one_bad_item():
+    body = b'"2026-02-17"\n"2024-01-01","2024-02-01"\n"2026-02-18"\n'
+    chunks = bulk_convert.iter_ndjson(bulk_convert.iter_lines(io.BytesIO(body)))
+    lines = [json.loads(line) for line in ''.join(chunks).splitlines()]
+    assert [line.get('gregorian') for line in lines] == ['2026-02-17', None, '2026-02-18']
+    assert 'error' in lines[1]
+
+
+def test_ndjson_malformed_lines_keep_their_positions():
+    # Joined with commas these lines still make three values, shifted by one
+    body = b'"2024-01-01","2024-02-01"\n{"gregorian": "2024-03-01"\n"leap": false}\n"2026-02-18"\n'
+    chunks = bulk_convert.iter_ndjson(bulk_convert.iter_lines(io.BytesIO(body)))
+    lines = [json.loads(line) for line in ''.join(chunks).splitlines()]
+    assert len(lines) == 4 and all('error' in line for line in lines[:3])
+    assert lines[3]['gregorian'] == '2026-02-18'
+
+
+def test_convert_endpoint():
+    client = app.app.test_client()
+    data = client.post('/api/convert', json=['2026-02-17', {'lunar': '2026-01-01'}, 'bad']).get_json()
+    assert [r.get('gregorian') for r in data['results']] == ['2026-02-17', '2026-02-17', None]
+
+    response = client.post('/api/convert', data='"2026-02-17"\n"2026-02-18"\n',
+                           content_type=bulk_convert.NDJSON_MIMETYPE)
+    assert response.mimetype == bulk_convert.NDJSON_MIMETYPE
+    assert [json.loads(line)['lunar_day'] for line in response.data.splitlines()] == [1, 2]
+
+    assert client.post('/api/convert', json={'dates': []}).status_code == 400
+    assert client.post('/api/convert', data='nope', content_type='application/json').status_code == 400
+    assert client.get('/api/convert').status_code == 405
@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for check_startup - cold-start paths must not load the astronomy stack
+"""
+
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'calendar_app'))
+
+import io
+import check_startup
+
+
+def test_scenarios_avoid_forbidden_modules():
+    # Budgets are machine dependent, so only the forbidden imports are checked strictly
+    assert check_startup.check(scale=100, out=io.StringIO()) == []
+
+
+def test_import_times_sees_lazy_imports():
+    _, imported = check_startup.import_times("import lunar_calendar\nlunar_calendar.compute_years(1900, 1900)")
+    assert 'lunarcalendar.converter' in imported
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for client_table - the table shipped to the browser and its JS decoder
+"""
+
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'calendar_app'))
+
+import datetime
+import json
+import shutil
+import subprocess
+import pytest
+import app
+import client_table
+from month_grid import build_month_grid
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'calendar_app')
+DECODER = os.path.join(APP_DIR, 'static', 'lunar_table.js')
+
+# Prints the grid of every month the table covers, one JSON document per line
+NODE_SCRIPT = """
+const fs = require('fs');
+const LunarTable = require(process.argv[1]);
+const table = new LunarTable(JSON.parse(fs.readFileSync(process.argv[2], 'utf8')));
+const lines = [];
+for (let year = table.firstYear; year <= table.lastYear; year++) {
+    for (let month = 1; month <= 12; month++) {
+        lines.push(JSON.stringify(table.monthGrid(year, month)));
+    }
+}
+process.stdout.write(lines.join('\\n'));
+"""
+
+
+def test_table_covers_all_lunar_years():
+    table = client_table.build_client_table()
+    assert table['first_lunar_year'] == 1899
+    assert len(table['lunar_years']) == 2100 - 1899 + 1
+    assert len(table['solar_terms']) == 201
+    # Lunar 2026 starts on 2026-02-17 and has no leap month
+    new_year, leap, mask = table['lunar_years'][2026 - 1899]
+    assert new_year == datetime.date(2026, 2, 17).toordinal() - datetime.date(1900, 1, 1).toordinal()
+    assert leap == 0
+    assert mask < 1 << 12
+
+
+@pytest.mark.skipif(shutil.which('node') is None, reason="node is not installed")
+def test_js_decoder_matches_python(tmp_path):
+    """Every day of 1900-2100 decodes to the same grid cell as the server builds"""
+    table_path = tmp_path / 'table.json'
+    table_path.write_text(json.dumps(client_table.build_client_table()), encoding='utf-8')
+    result = subprocess.run(['node', '-e', NODE_SCRIPT, DECODER, str(table_path)],
+                            capture_output=True, text=True, check=True)
+    js_months = result.stdout.splitlines()
+    assert len(js_months) == 201 * 12
+
+    for index, line in enumerate(js_months):
+        year, month = 1900 + index // 12, index % 12 + 1
+        expected = json.loads(json.dumps(app.month_payload(build_month_grid(year, month))))
+        assert json.loads(line) == expected, f"{year}-{month:02d}"
+
+
+def test_table_endpoints():
+    client = app.app.test_client()
+    version = app.table_version()
+    assert f'/api/table/{version}'.encode() in client.get('/').data
+
+    response = client.get(f'/api/table/{version}')
+    assert response.status_code == 200
+    assert 'immutable' in response.headers['Cache-Control']
+    assert response.get_json()['holiday_version'] == app.holidays.HOLIDAY_DATA_VERSION
+
+    current = client.get('/api/table')
+    assert current.data == response.data
+    assert client.get('/api/table', headers={'If-None-Match': current.headers['ETag']}).status_code == 304
+    assert client.get('/api/table/000000000000').status_code == 404
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for festival_calendar - materialized festival and solar term dates
+"""
+
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'calendar_app'))
+
+import datetime
+import time
+import pytest
+from lunarcalendar import festival, solarterm
+import app
+import festival_calendar
+from festival_calendar import KIND_FESTIVAL, KIND_SOLAR_TERM
+
+
+def test_data_file_matches_lunarcalendar(tmp_path):
+    path = str(tmp_path / 'festivals.csv')
+    assert festival_calendar.build_data_file(path) == len(festival.zh_festivals) + len(solarterm.zh_solarterms)
+    assert festival_calendar.load_festivals(path) == festival_calendar.get_festivals()
+
+
+@pytest.mark.parametrize('year', [1901, 1950, 2000, 2024, 2057, 2099])
+def test_dates_match_lunarcalendar(year):
+    dates = {day.festival.key: day.date for day in festival_calendar.get_year(year)}
+    for entry in festival_calendar.get_festivals():
+        if entry.kind == KIND_FESTIVAL:
+            expected = getattr(festival, entry.key)(year)
+        else:
+            expected = solarterm.zh_solarterms[int(entry.rule.partition(':')[2])](year)
+        assert dates[entry.key] == expected, entry.key
+
+
+def test_days_are_in_date_order():
+    days = festival_calendar.get_year(2025)
+    assert [day.date for day in days] == sorted(day.date for day in days)
+    assert [day.festival.en for day in festival_calendar.festivals_on(datetime.date(2025, 1, 29))] == \
+        ['Chinese New Year']
+    with pytest.raises(ValueError):
+        festival_calendar.get_year(1599)
+
+
+def test_find_like_lunar_find():
+    assert [day.date for day in festival_calendar.find('中秋', 2024, 2026)] == [
+        datetime.date(2024, 9, 17), datetime.date(2025, 10, 6), datetime.date(2026, 9, 25)]
+    # An exact name wins, and solar terms are searched first
+    assert [f.key for f in festival_calendar.match_festivals('冬至')] == ['WinterSolstice']
+    assert [f.key for f in festival_calendar.match_festivals('端午節')] == ['DragonBoat']
+    assert [f.key for f in festival_calendar.match_festivals('lantern')] == ['Lantern']
+    assert {f.kind for f in festival_calendar.match_festivals('节气')} == {KIND_SOLAR_TERM}
+    assert len(festival_calendar.match_festivals('all')) == len(festival_calendar.get_festivals())
+    assert festival_calendar.match_festivals('no such day') == []
+
+
+def test_listing_two_centuries_is_fast():
+    festival_calendar.festivals_between(1900, 2100)
+    start = time.perf_counter()
+    days = festival_calendar.festivals_between(1900, 2100, KIND_FESTIVAL)
+    assert time.perf_counter() - start < 0.1
+    assert len(days) == 201 * len(festival.zh_festivals)
+
+
+def test_festivals_api():
+    client = app.app.test_client()
+    response = client.get('/api/festivals?year=2025&name=中秋')
+    assert response.status_code == 200 and response.headers['ETag']
+    assert response.get_json()['festivals'] == [{
+        'date': '2025-10-06', 'key': 'MidAutumn', 'kind': 'festival', 'name': 'Mid-Autumn Festival',
+        'zh_hans': '中秋节', 'zh_hant': '中秋節'}]
+
+    terms = client.get('/api/festivals?from=2024&to=2025&kind=solarterm').get_json()['festivals']
+    assert len(terms) == 48 and terms[0]['date'] == '2024-01-06'
+    assert client.get('/api/festivals?year=1599').status_code == 400
+    assert client.get('/api/festivals?from=1900&to=2200').status_code == 400
+    assert client.get('/api/festivals?year=2025&kind=holiday').status_code == 400
+
+    info = client.get('/api/date/2025/10/6').get_json()
+    assert [entry['name'] for entry in info['festivals']] == ['Mid-Autumn Festival']
+    assert client.get('/api/date/2025/10/7').get_json()['festivals'] == []
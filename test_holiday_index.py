@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for holiday_index - compiled holiday index and range queries
+"""
+
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'calendar_app'))
+
+import datetime
+import holiday_index
+from holiday_index import holidays_between, next_holiday, holiday_month_bitmap, get_index
+from holidays import get_gregorian_holiday, get_lunar_holiday
+from lunar_calendar import solar_to_lunar
+
+
+def test_holidays_between_matches_per_day_lookups():
+    start = datetime.date(2024, 1, 1)
+    found = {(h.date, h.name) for h in holidays_between(start, datetime.date(2024, 12, 31))
+             if h.kind == holiday_index.KIND_GREGORIAN}
+    expected = set()
+    for i in range(366):
+        date = start + datetime.timedelta(days=i)
+        name = get_gregorian_holiday(date.month, date.day, date.year)
+        if name:
+            expected.add((date, name))
+    assert found == expected
+
+
+def test_lunar_and_computed_festivals():
+    # Lunar 2025 ends with a 29-day 12th month, so New Year's Eve is computed
+    eve = [h for h in holidays_between(datetime.date(2026, 2, 16), datetime.date(2026, 2, 16))
+           if h.name == "New Year's Eve"]
+    assert eve == [(datetime.date(2026, 2, 16), "New Year's Eve", holiday_index.KIND_COMPUTED)]
+    mid_autumn = [h for h in get_index().in_year(2050) if h.name == 'Mid-Autumn Festival']
+    assert [h.kind for h in mid_autumn] == [holiday_index.KIND_LUNAR]
+
+
+def test_next_holiday():
+    assert next_holiday(datetime.date(2026, 9, 30))[0].date == datetime.date(2026, 10, 1)
+    # Strictly after the given date
+    assert next_holiday(datetime.date(2026, 10, 1))[0].date == datetime.date(2026, 10, 2)
+    assert next_holiday(datetime.date(2100, 12, 31)) == []
+
+
+def test_month_bitmap():
+    bitmap = holiday_month_bitmap(2026, 10)
+    expected = {h.date.day for h in holidays_between(datetime.date(2026, 10, 1), datetime.date(2026, 10, 31))}
+    assert {day for day in range(1, 32) if bitmap >> (day - 1) & 1} == expected
+    assert set(range(1, 8)) <= expected
+
+
+def test_years_without_schedule_have_no_gregorian_holidays():
+    assert get_gregorian_holiday(10, 1, 2030) == ""
+    assert all(h.kind != holiday_index.KIND_GREGORIAN for h in get_index().in_year(2030))
+
+
+def test_lunar_festivals_match_per_day_lookups():
+    start, end = datetime.date(1900, 1, 1), datetime.date(2100, 12, 31)
+    found = {(h.date, h.name) for h in holidays_between(start, end) if h.kind != holiday_index.KIND_GREGORIAN}
+    expected = set()
+    for i in range(end.toordinal() - start.toordinal() + 1):
+        date = start + datetime.timedelta(days=i)
+        lunar = solar_to_lunar(date.year, date.month, date.day)
+        name = get_lunar_holiday(lunar.month, lunar.day, lunar.isleap, lunar.month_days)
+        if name:
+            expected.add((date, name))
+    assert found == expected
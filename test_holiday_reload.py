@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for holiday_reload - validated holiday data files swapped in without a restart
+"""
+
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'calendar_app'))
+
+import datetime
+import shutil
+import time
+import pytest
+import app
+import holiday_index
+import holiday_reload
+import holidays
+import workdays
+from holidays import get_gregorian_holiday
+
+NEW_YEAR_2027 = "holiday,2027-01-01,New Year's Day\nworkday,2027-01-04,New Year's Day\n"
+
+
+@pytest.fixture
+def data_file(tmp_path, monkeypatch):
+    """A copy of the holiday data file; the shipped data is reinstalled afterwards"""
+    path = str(tmp_path / 'holidays.csv')
+    shutil.copy(holidays.DATA_FILE, path)
+    monkeypatch.setattr(holidays, 'DATA_FILE', path)
+    previous = holidays.get_holiday_data()
+    yield path
+    holidays.install_holiday_data(previous)
+    holiday_index.install_index(holiday_index.build_index(previous))
+    workdays.install_table(workdays.build_table(previous))
+
+
+def append(path, text):
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(text)
+
+
+def test_data_file_matches_installed_data():
+    data = holidays.load_holiday_data()
+    assert data == holidays.get_holiday_data()
+    assert data.version == holidays.HOLIDAY_DATA_VERSION
+    assert holidays.GREGORIAN_HOLIDAYS_BY_YEAR[2025][(10, 1)] == "National Day"
+    assert holidays.LUNAR_HOLIDAYS[(8, 15)] == "Mid-Autumn Festival"
+
+
+@pytest.mark.parametrize('row', [
+    "holiday,2027-02-30,Spring Festival",
+    "vacation,2027-01-01,New Year's Day",
+    "lunar,13-01,Spring Festival",
+    "holiday,2027-01-01,",
+    "holiday,2025-10-01,National Day",
+    "workday,2025-10-01,National Day",
+])
+def test_invalid_files_are_rejected(data_file, row):
+    append(data_file, row + "\n")
+    with pytest.raises(ValueError, match='holidays.csv'):
+        holidays.load_holiday_data(data_file)
+
+    version = holidays.HOLIDAY_DATA_VERSION
+    with pytest.raises(ValueError):
+        holiday_reload.reload_holidays()
+    assert holidays.HOLIDAY_DATA_VERSION == version
+
+
+def test_reload_swaps_tables_and_caches(data_file):
+    client = app.app.test_client()
+    before = client.get('/api/calendar/2027/1')
+    assert get_gregorian_holiday(1, 1, 2027) == ""
+
+    append(data_file, NEW_YEAR_2027)
+    result = holiday_reload.reload_holidays()
+    assert result.reloaded and result.previous_version != result.version == holidays.HOLIDAY_DATA_VERSION
+    # The index and working day table were compiled before the swap
+    assert holiday_index._index.version == result.version
+    assert workdays._table[0] == result.version
+
+    assert get_gregorian_holiday(1, 1, 2027) == "New Year's Day"
+    assert not workdays.is_workday(datetime.date(2027, 1, 1))
+    assert workdays.is_workday(datetime.date(2027, 1, 4))
+    after = client.get('/api/calendar/2027/1')
+    assert after.headers['ETag'] != before.headers['ETag']
+    assert after.get_json()['days'][0][4]['greg_holiday'] == "New Year's Day"
+    assert client.get('/api/table').get_json()['holiday_version'] == result.version
+
+    assert holiday_reload.reload_holidays() == (False, result.version, result.version)
+
+
+def test_watcher_reloads_changed_file(data_file):
+    stop = holiday_reload.start_watcher(interval=0.02)
+    try:
+        append(data_file, NEW_YEAR_2027)
+        deadline = time.monotonic() + 5
+        while get_gregorian_holiday(1, 1, 2027) == "" and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert get_gregorian_holiday(1, 1, 2027) == "New Year's Day"
+    finally:
+        stop.set()
+
+
+def test_admin_endpoint(data_file, monkeypatch):
+    client = app.app.test_client()
+    url = '/api/admin/reload-holidays'
+    monkeypatch.delenv(app.ADMIN_TOKEN_ENV, raising=False)
+    assert client.post(url).status_code == 403
+
+    monkeypatch.setenv(app.ADMIN_TOKEN_ENV, 'secret')
+    assert client.post(url, headers={'Authorization': 'Bearer wrong'}).status_code == 403
+    headers = {'Authorization': 'Bearer secret'}
+    assert client.post(url, headers=headers).get_json()['reloaded'] is False
+
+    append(data_file, NEW_YEAR_2027)
+    data = client.post(url, headers=headers).get_json()
+    assert data['reloaded'] and data['holiday_version'] == client.get('/ready').get_json()['holiday_version']
+
+    append(data_file, "holiday,2027-13-01,New Year's Day\n")
+    response = client.post(url, headers=headers)
+    assert response.status_code == 400 and 'line' in response.get_json()['error']
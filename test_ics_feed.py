@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for ics_feed - the iCalendar subscription feed
+"""
+
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'calendar_app'))
+
+import datetime
+import pytest
+import app
+import holidays
+import ics_feed
+
+
+def _events(text):
+    """Unfold and parse VEVENT blocks into dicts of property name (without parameters) to value"""
+    events = []
+    text = text.replace('\r\n ', '')
+    for block in text.split('BEGIN:VEVENT\r\n')[1:]:
+        lines = block.split('END:VEVENT\r\n')[0].split('\r\n')
+        events.append({line.split(':', 1)[0].split(';')[0]: line.split(':', 1)[1] for line in lines if line})
+    return events
+
+
+def test_parse_feed_options():
+    today = datetime.date(2026, 5, 1)
+    assert ics_feed.parse_feed_options(today=today) == (ics_feed.FEED_CATEGORIES, 2025, 2029)
+    assert ics_feed.parse_feed_options('terms, gregorian', '2000', '2001') == (('gregorian', 'terms'), 2000, 2001)
+    for args in (('moon',), (None, '1899'), (None, '2030', '2029'), (None, 'abc')):
+        with pytest.raises(ValueError):
+            ics_feed.parse_feed_options(*args)
+
+
+def test_long_lines_are_folded_at_75_octets():
+    text = 'SUMMARY:' + '春节' * 40 + 'a' * 30
+    folded = ics_feed._line(text)
+    lines = folded.split('\r\n')
+    assert lines[-1] == '' and len(lines) > 2
+    assert all(len(line.encode('utf-8')) <= 75 for line in lines)
+    assert all(line.startswith(' ') for line in lines[1:-1])
+    assert folded.replace('\r\n ', '') == text + '\r\n'
+    assert ics_feed._line('SUMMARY:Spring Festival') == 'SUMMARY:Spring Festival\r\n'
+
+
+def test_year_events():
+    text = ''.join(ics_feed.iter_feed(ics_feed.FEED_CATEGORIES, 2026, 2026))
+    assert text.startswith('BEGIN:VCALENDAR\r\n') and text.endswith('END:VCALENDAR\r\n')
+    events = _events(text)
+
+    # Official holidays listed day by day become one event per holiday
+    spring = [e for e in events if e['SUMMARY'] == 'Spring Festival' and e['CATEGORIES'] == 'Public Holiday']
+    assert [(e['DTSTART'], e['DTEND']) for e in spring] == [('20260215', '20260224')]
+
+    # Lunar festivals and the computed New Year's Eve (lunar 2025 ends on the 29th)
+    lunar = {e['SUMMARY']: e['DTSTART'] for e in events if e['CATEGORIES'] == 'Lunar Festival'}
+    assert lunar["New Year's Eve"] == '20260216'
+    assert lunar['Mid-Autumn Festival'] == '20260925'
+
+    assert len([e for e in events if e['CATEGORIES'] == 'Solar Term']) == 24
+    assert len({e['UID'] for e in events}) == len(events)
+
+
+def test_year_blocks_are_cached_per_holiday_version(monkeypatch):
+    ics_feed._cached_year_block.cache_clear()
+    first = ics_feed.year_block(2024, 'gregorian')
+    assert ics_feed.year_block(2024, 'gregorian') is first
+    assert ics_feed._cached_year_block.cache_info().hits == 1
+
+    monkeypatch.setattr(holidays, 'HOLIDAY_DATA_VERSION', 'changed')
+    ics_feed.year_block(2024, 'gregorian')
+    assert ics_feed._cached_year_block.cache_info().misses == 2
+
+
+def test_feed_keeps_the_holiday_data_of_its_etag(monkeypatch):
+    data = holidays.get_holiday_data()
+    etag = ics_feed.feed_etag(('gregorian',), 2024, 2024, data)
+    first = ics_feed.year_block(2024, 'gregorian')
+    # A reload lands after the ETag was computed
+    monkeypatch.setattr(holidays, 'HOLIDAY_DATA_VERSION', 'changed')
+    misses = ics_feed._cached_year_block.cache_info().misses
+    assert first in ''.join(ics_feed.iter_feed(('gregorian',), 2024, 2024, data))
+    assert ics_feed._cached_year_block.cache_info().misses == misses
+    assert ics_feed.feed_etag(('gregorian',), 2024, 2024, data) == etag
+
+
+def test_feed_endpoint():
+    client = app.app.test_client()
+    response = client.get('/calendar.ics?include=lunar&from=2026&to=2027')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/calendar'
+    assert 'CATEGORIES:Solar Term' not in response.get_data(as_text=True)
+
+    etag = response.headers['ETag']
+    cached = client.get('/calendar.ics?include=lunar&from=2026&to=2027', headers={'If-None-Match': etag})
+    assert cached.status_code == 304
+    assert cached.data == b''
+    assert client.get('/calendar.ics?include=lunar&from=2026&to=2028').headers['ETag'] != etag
+
+    assert client.get('/calendar.ics?from=1800').status_code == 400
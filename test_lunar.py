@@ -4,8 +4,9 @@
 Test script - Verify Lunar calendar calculation functionality
 """
 
+import os
 import sys
-sys.path.insert(0, '/workspaces/1stTest')
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from calendar_app.lunar_calendar import solar_to_lunar, format_lunar
 from calendar_app.holidays import get_gregorian_holiday, get_lunar_holiday
@@ -16,8 +17,8 @@ today = datetime.date.today()
 print(f"Test date: {today.year}-{today.month:02d}-{today.day:02d}")
 print()
 
-lunar_y, lunar_m, lunar_d = solar_to_lunar(today.year, today.month, today.day)
-lunar_str = format_lunar(lunar_y, lunar_m, lunar_d)
+lunar = solar_to_lunar(today.year, today.month, today.day)
+lunar_str = format_lunar(lunar.year, lunar.month, lunar.day, lunar.isleap)
 print(f"Lunar date: {lunar_str}")
 print()
 
@@ -34,8 +35,8 @@ print("Special Date Tests:")
 print("="*50)
 
 for year, month, day in test_dates:
-    lunar_y, lunar_m, lunar_d = solar_to_lunar(year, month, day)
-    lunar_str = format_lunar(lunar_y, lunar_m, lunar_d)
+    lunar = solar_to_lunar(year, month, day)
+    lunar_str = format_lunar(lunar.year, lunar.month, lunar.day, lunar.isleap)
     holiday = get_gregorian_holiday(month, day)
     
     print(f"\nGregorian: {year}-{month:02d}-{day:02d}")
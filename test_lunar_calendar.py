@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for lunar_calendar - table-based conversion must match lunarcalendar
+"""
+
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'calendar_app'))
+
+import datetime
+import pytest
+from lunarcalendar import Converter, Solar, Lunar
+import lunar_calendar
+from lunar_calendar import (solar_to_lunar, lunar_to_solar, lunar_month_days, format_lunar,
+                            solar_to_lunar_range, solar_to_lunar_many)
+from holidays import get_lunar_holiday
+
+
+def _library_solar_to_lunar(year, month, day):
+    lunar = Converter.Solar2Lunar(Solar(year, month, day))
+    return lunar.year, lunar.month, lunar.day, bool(lunar.isleap)
+
+
+def _library_lunar_to_solar(year, month, day, isleap=False):
+    try:
+        solar = Converter.Lunar2Solar(Lunar(year, month, day, isleap))
+    except Exception:
+        return None
+    return solar.year, solar.month, solar.day
+
+
+def test_solar_to_lunar_matches_library_for_every_day():
+    date = datetime.date(1900, 1, 1)
+    end = datetime.date(2100, 12, 31)
+    one_day = datetime.timedelta(days=1)
+    previous = None
+    while date <= end:
+        expected = _library_solar_to_lunar(date.year, date.month, date.day)
+        lunar = solar_to_lunar(date.year, date.month, date.day)
+        assert lunar[:4] == expected, date
+        assert lunar.day <= lunar.month_days, date
+        # A month ends exactly on its month_days-th day
+        if previous is not None:
+            assert (lunar.day == 1) == (previous.day == previous.month_days), date
+        previous = lunar
+        date += one_day
+
+
+def test_lunar_to_solar_matches_library_for_every_month():
+    for year in range(1899, 2101):
+        for month in range(1, 13):
+            for day in (1, 15, 29, 30):
+                expected = _library_lunar_to_solar(year, month, day)
+                assert lunar_to_solar(year, month, day) == expected, (year, month, day)
+                expected = _library_lunar_to_solar(year, month, day, True)
+                if not lunar_month_days(year, month, True):
+                    expected = None
+                assert lunar_to_solar(year, month, day, True) == expected, (year, month, day, True)
+
+
+def test_data_file_matches_library():
+    assert lunar_calendar.load_years() == lunar_calendar.compute_years()
+
+
+def test_invalid_dates_return_none():
+    assert solar_to_lunar(2023, 2, 29) is None
+    assert solar_to_lunar(2026, 13, 1) is None
+    # Lunar 2026 month 2 has 29 days
+    assert lunar_to_solar(2026, 2, 30) is None
+    assert lunar_to_solar(2026, 0, 1) is None
+    # 2026 has no leap month
+    assert lunar_to_solar(2026, 3, 1, True) is None
+
+
+def test_leap_month_dates():
+    # 2025 has a leap 6th month starting on July 25th
+    lunar = solar_to_lunar(2025, 7, 25)
+    assert lunar == (2025, 6, 1, True, 29)
+    assert format_lunar(lunar.year, lunar.month, lunar.day, lunar.isleap) == "Leap Jun Day 1"
+    assert lunar_to_solar(2025, 6, 1, True) == (2025, 7, 25)
+    assert lunar_to_solar(2025, 6, 1) == (2025, 6, 25)
+    # Festivals are only kept in the regular month: 2023 has a leap 2nd month
+    lunar = solar_to_lunar(2023, 4, 5)
+    assert lunar[:4] == (2023, 2, 15, True)
+    assert get_lunar_holiday(2, 15) == ""
+    assert get_lunar_holiday(1, 15, True) == ""
+    assert get_lunar_holiday(1, 15) == "Lantern Festival"
+
+
+def test_new_years_eve_in_short_twelfth_month():
+    # Lunar 2025 month 12 has 29 days, so New Year's Eve is 2026-02-16
+    lunar = solar_to_lunar(2026, 2, 16)
+    assert lunar == (2025, 12, 29, False, 29)
+    assert get_lunar_holiday(lunar.month, lunar.day, lunar.isleap, lunar.month_days) == "New Year's Eve"
+    # The 29th of a 30-day 12th month is not
+    assert get_lunar_holiday(12, 29, False, 30) == ""
+    assert get_lunar_holiday(12, 30, False, 30) == "New Year's Eve"
+
+
+@pytest.fixture(params=['numpy', 'array'])
+def batch_backend(request, monkeypatch):
+    if request.param == 'array':
+        monkeypatch.setattr(lunar_calendar, '_load_numpy', lambda: None)
+    elif lunar_calendar._load_numpy() is None:
+        pytest.skip("numpy not installed")
+
+
+def _rows(columns):
+    return [(int(y), int(m), int(d), bool(leap), int(length)) for y, m, d, leap, length in zip(*columns)]
+
+
+def test_batch_conversion_matches_per_call(batch_backend):
+    start = datetime.date(2023, 1, 1)
+    dates = [start + datetime.timedelta(days=i) for i in range(365)]
+    expected = [solar_to_lunar(d.year, d.month, d.day) for d in dates]
+    assert _rows(solar_to_lunar_range(start, dates[-1])) == expected
+    assert _rows(solar_to_lunar_many(dates[::-1])) == expected[::-1]
+    # 2023 has a leap 2nd month from March 22nd to April 19th
+    columns = solar_to_lunar_range(datetime.date(2023, 3, 21), datetime.date(2023, 4, 20))
+    assert [bool(v) for v in columns.isleap] == [False] + [True] * 29 + [False]
+
+
+def test_batch_conversion_rejects_dates_outside_table(batch_backend):
+    with pytest.raises(ValueError):
+        solar_to_lunar_range(datetime.date(1899, 12, 31), datetime.date(1900, 1, 1))
+    with pytest.raises(ValueError):
+        solar_to_lunar_many([datetime.date(2101, 1, 1)])
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for metrics - per-thread counters and the /metrics endpoint
+"""
+
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'calendar_app'))
+
+import gc
+import threading
+import app
+import metrics
+
+
+def _samples(text):
+    """{sample name with labels: value} of a Prometheus text document"""
+    return {line.rsplit(' ', 1)[0]: float(line.rsplit(' ', 1)[1])
+            for line in text.splitlines() if line and not line.startswith('#')}
+
+
+def test_counters_of_finished_threads_are_kept():
+    before = metrics.snapshot().counters.get(('test_thread_total', ()), 0)
+
+    def work():
+        for _ in range(1000):
+            metrics.inc('test_thread_total')
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    del threads
+    gc.collect()
+
+    assert metrics.snapshot().counters[('test_thread_total', ())] == before + 8000
+    # Shards of finished threads are folded into the retired totals
+    assert len(metrics._shards) <= 2
+
+
+def test_histogram_buckets():
+    labels = (('route', '/histogram-test'),)
+    for seconds in (0.00001, 0.003, 0.003, 10.0):
+        metrics.observe(metrics.REQUEST_SECONDS, seconds, labels)
+
+    samples = _samples(metrics.render())
+    name = metrics.REQUEST_SECONDS
+    assert samples[f'{name}_bucket{{route="/histogram-test",le="1e-05"}}'] == 1
+    assert samples[f'{name}_bucket{{route="/histogram-test",le="0.0025"}}'] == 1
+    assert samples[f'{name}_bucket{{route="/histogram-test",le="0.005"}}'] == 3
+    assert samples[f'{name}_bucket{{route="/histogram-test",le="+Inf"}}'] == 4
+    assert samples[f'{name}_count{{route="/histogram-test"}}'] == 4
+    assert abs(samples[f'{name}_sum{{route="/histogram-test"}}'] - 10.00601) < 1e-9
+
+
+def test_cache_evictions_are_counted():
+    @metrics.counted_lru_cache(maxsize=2)
+    def square(x):
+        if x < 0:
+            raise ValueError(x)
+        return x * x
+
+    metrics.register_cache('test_square', square)
+    try:
+        for x in (1, 2, 1, 3, 4, 4, -1, 5):
+            try:
+                square(x)
+            except ValueError:
+                pass
+        samples = _samples(metrics.render())
+    finally:
+        metrics._caches.remove(('test_square', square))
+    # 3, 4 and 5 each evict one entry; the hit on 4 and the call that raised do not
+    assert samples['calendar_cache_evictions_total{cache="test_square"}'] == 3
+    assert samples['calendar_cache_misses_total{cache="test_square"}'] == 6
+    assert samples['calendar_cache_entries{cache="test_square"}'] == 2
+
+
+def test_metrics_endpoint():
+    client = app.app.test_client()
+    client.get('/api/calendar/2026/3')
+    client.get('/api/calendar/2026/3')
+    client.get('/api/date/2026/3/3')
+
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    samples = _samples(response.get_data(as_text=True))
+
+    route = '/api/calendar/<int:year>/<int:month>'
+    assert samples[f'calendar_http_requests_total{{route="{route}",method="GET",status="200"}}'] >= 2
+    assert samples[f'calendar_http_request_duration_seconds_count{{route="{route}"}}'] >= 2
+    for stage in ('conversion', 'holidays', 'solar_terms'):
+        assert samples[f'calendar_stage_duration_seconds_count{{stage="{stage}"}}'] >= 1
+    assert samples['calendar_cache_hits_total{cache="month_payload"}'] >= 1
+    assert samples['calendar_cache_max_entries{cache="month_payload"}'] == app.MONTH_CACHE_SIZE
+    assert samples['calendar_cache_evictions_total{cache="month_payload"}'] >= 0
+    if os.path.exists('/proc/self/statm'):
+        assert samples['process_resident_memory_bytes'] > 0
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for month_grid - single-pass month grids must match per-day lookups
+"""
+
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'calendar_app'))
+
+import calendar
+import pytest
+from month_grid import build_month_grid, get_month_grid
+from lunar_calendar import solar_to_lunar, format_lunar
+from holidays import get_gregorian_holiday, get_lunar_holiday
+from solar_terms import get_solar_term
+from almanac import get_almanac
+
+
+def test_grid_matches_per_day_lookups_for_every_month():
+    for year in range(1900, 2101):
+        for month in range(1, 13):
+            grid = build_month_grid(year, month)
+            assert len(grid.days) == calendar.monthrange(year, month)[1]
+            for grid_day in grid.days:
+                day = grid_day.day
+                lunar = solar_to_lunar(year, month, day)
+                almanac = get_almanac(year, month, day, lunar.year)
+                assert grid_day[2:] == (
+                    lunar.year, lunar.month, lunar.day, lunar.isleap,
+                    format_lunar(lunar.year, lunar.month, lunar.day, lunar.isleap),
+                    get_gregorian_holiday(month, day, year),
+                    get_lunar_holiday(lunar.month, lunar.day, lunar.isleap, lunar.month_days),
+                    get_solar_term(year, month, day),
+                    lunar.month_days,
+                    almanac.year_ganzhi, almanac.month_ganzhi, almanac.day_ganzhi, almanac.zodiac,
+                    almanac.solar_term,
+                ), (year, month, day)
+
+
+def test_weeks_match_monthcalendar():
+    grid = build_month_grid(2026, 3)
+    weeks = [[0 if day is None else day.day for day in week] for week in grid.weeks()]
+    assert weeks == calendar.monthcalendar(2026, 3)
+    assert grid.days[0].weekday == 6
+    assert grid.holiday(3) == "Lantern Festival"
+
+
+def test_grid_is_immutable_and_cached():
+    grid = get_month_grid(2026, 2)
+    assert get_month_grid(2026, 2) is grid
+    assert grid.holiday(17) == 'Spring Festival'
+    with pytest.raises(AttributeError):
+        grid.year = 2027
+    with pytest.raises(TypeError):
+        grid.days[0] = None
+
+
+def test_grid_rejects_months_outside_table():
+    with pytest.raises(ValueError):
+        build_month_grid(1599, 12)
+    with pytest.raises(ValueError):
+        build_month_grid(2401, 1)
+    with pytest.raises(ValueError):
+        build_month_grid(2026, 13)
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for profiling - opt-in per-request profiles and the report CLI
+"""
+
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'calendar_app'))
+
+import pstats
+import pytest
+import app
+import profiling
+
+ADMIN = {'Authorization': 'Bearer secret'}
+
+
+@pytest.fixture
+def profiled(tmp_path, monkeypatch):
+    """The app with profiling installed into a temporary directory"""
+    monkeypatch.setenv(app.ADMIN_TOKEN_ENV, 'secret')
+    profiling.install(app.app, str(tmp_path), authorize=app.is_admin_request)
+    yield tmp_path
+    profiling.uninstall(app.app)
+
+
+def test_views_are_untouched_unless_installed(tmp_path):
+    assert app.app.view_functions['get_calendar'] is app.get_calendar
+    profiling.install(app.app, str(tmp_path))
+    assert app.app.view_functions['get_calendar'] is not app.get_calendar
+    profiling.uninstall(app.app)
+    assert app.app.view_functions['get_calendar'] is app.get_calendar
+
+
+def test_header_profile_needs_authorization(profiled):
+    client = app.app.test_client()
+    response = client.get('/api/date/2024/2/10', headers={profiling.HEADER: '1'})
+    assert response.status_code == 200 and 'X-Profile-File' not in response.headers
+    assert os.listdir(profiled) == []
+
+    response = client.get('/api/date/2024/2/10', headers={profiling.HEADER: '1', **ADMIN})
+    assert response.get_json()['zodiac'] == 'Dragon'
+    name = response.headers['X-Profile-File']
+    assert os.listdir(profiled) == [name] and name.endswith('-get_date_info.prof')
+    functions = {function for _, _, function in pstats.Stats(str(profiled / name)).stats}
+    assert {'get_date_info', 'format_lunar', 'get_almanac'} <= functions
+
+
+def test_collapsed_stacks(profiled):
+    client = app.app.test_client()
+    response = client.get('/api/date/2024/2/10', headers={profiling.HEADER: 'collapsed', **ADMIN})
+    stacks = profiling.merge_collapsed([str(profiled / response.headers['X-Profile-File'])])
+    assert stacks and all(stack.startswith('app.get_date_info') for stack in stacks)
+    assert any(stack.endswith(';lunar_calendar.format_lunar') for stack in stacks)
+
+
+def test_sampling_and_report(tmp_path, capsys):
+    profiling.install(app.app, str(tmp_path), rate=1.0, default_format=profiling.FORMAT_COLLAPSED)
+    try:
+        client = app.app.test_client()
+        for day in range(1, 4):
+            client.get(f'/api/date/2024/3/{day}')
+    finally:
+        profiling.uninstall(app.app)
+    assert len(os.listdir(tmp_path)) == 3
+
+    assert profiling.main(['report', str(tmp_path), '--top', '5']) == 0
+    assert '3 collapsed dumps' in capsys.readouterr().out
+    assert profiling.main(['merge', str(tmp_path)]) == 0
+    lines = capsys.readouterr().out.splitlines()
+    assert sum(int(line.rpartition(' ')[2]) for line in lines) == \
+        sum(profiling.merge_collapsed([str(tmp_path / name) for name in os.listdir(tmp_path)]).values())
+
+    with pytest.raises(ValueError):
+        profiling.install(app.app, str(tmp_path), rate=2)
+
+
+def test_sampled_requests_do_not_name_their_dump(tmp_path, monkeypatch):
+    monkeypatch.setenv(app.ADMIN_TOKEN_ENV, 'secret')
+    profiling.install(app.app, str(tmp_path), rate=1.0, authorize=app.is_admin_request)
+    try:
+        response = app.app.test_client().get('/api/date/2024/2/10', headers={profiling.HEADER: '1'})
+    finally:
+        profiling.uninstall(app.app)
+    assert len(os.listdir(tmp_path)) == 1
+    assert 'X-Profile-File' not in response.headers
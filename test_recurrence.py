@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for recurrence - lunar anniversaries and monthly lunar days
+"""
+
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'calendar_app'))
+
+import datetime
+import time
+import pytest
+import app
+import astro_calendar
+import lunar_calendar
+import recurrence
+from lunar_calendar import solar_to_lunar, lunar_to_solar
+
+FIRST = datetime.date(2000, 1, 1)
+LAST = datetime.date(2039, 12, 31)
+
+
+def lunar_days(first, last):
+    """Every day of a range with its lunar date, converted one by one"""
+    date = first
+    while date <= last:
+        yield date, solar_to_lunar(date.year, date.month, date.day)
+        date += datetime.timedelta(days=1)
+
+
+def test_monthly_matches_day_by_day_conversion():
+    expected = [date for date, lunar in lunar_days(FIRST, LAST) if lunar.day == 15]
+    assert [item.date for item in recurrence.expand('monthly', FIRST, LAST, day=15)] == expected
+
+    regular = [date for date, lunar in lunar_days(FIRST, LAST) if lunar.day == 1 and not lunar.isleap]
+    assert [item.date for item in recurrence.expand('monthly', FIRST, LAST, day=1, leap='regular')] == regular
+
+
+def test_yearly_matches_lunar_to_solar():
+    occurrences = recurrence.expand('yearly', FIRST, LAST, month=8, day=15)
+    assert [item.date for item in occurrences] == \
+        [datetime.date(*lunar_to_solar(year, 8, 15)) for year in range(2000, 2040)]
+    assert all((item.lunar_month, item.lunar_day, item.isleap) == (8, 15, False) for item in occurrences)
+
+
+@pytest.mark.parametrize('missing, expected', [
+    # Lunar 2023 has a 30-day 2nd month and a 29-day leap 2nd month
+    ('last', [(2023, 2, 30, False, '2023-03-21'), (2023, 2, 29, True, '2023-04-19')]),
+    ('next', [(2023, 2, 30, False, '2023-03-21'), (2023, 3, 1, False, '2023-04-20')]),
+    ('skip', [(2023, 2, 30, False, '2023-03-21')]),
+])
+def test_day_30_policies(missing, expected):
+    items = recurrence.expand('yearly', datetime.date(2023, 1, 1), datetime.date(2023, 12, 31),
+                              month=2, day=30, missing=missing, leap='both')
+    assert [(i.lunar_year, i.lunar_month, i.lunar_day, i.isleap, i.date.isoformat()) for i in items] == expected
+
+
+def test_leap_policies():
+    first, last = datetime.date(2022, 1, 1), datetime.date(2024, 12, 31)
+    def dates(leap):
+        return [item.date.isoformat() for item in recurrence.expand('yearly', first, last, month=2, day=1, leap=leap)]
+    assert dates('regular') == ['2022-03-03', '2023-02-20', '2024-03-10']
+    assert dates('leap') == ['2022-03-03', '2023-03-22', '2024-03-10']
+    assert dates('both') == ['2022-03-03', '2023-02-20', '2023-03-22', '2024-03-10']
+
+
+def test_invalid_rules():
+    for kwargs in ({'rule': 'weekly'}, {'rule': 'yearly', 'month': 13}, {'rule': 'monthly', 'day': 31},
+                   {'rule': 'monthly', 'missing': 'round'}, {'rule': 'monthly', 'leap': 'leap'}):
+        with pytest.raises(ValueError):
+            recurrence.expand(first=FIRST, last=LAST, **kwargs)
+    with pytest.raises(ValueError):
+        recurrence.expand('monthly', datetime.date(1599, 12, 1), FIRST)
+
+
+def test_extended_years(tmp_path, monkeypatch):
+    monkeypatch.setattr(astro_calendar, 'CACHE_FILE', str(tmp_path / 'lunar_years.csv'))
+    monkeypatch.setattr(astro_calendar, '_years', None)
+    monkeypatch.setattr(lunar_calendar, '_extended_years', {})
+    recurrence._year_months.cache_clear()
+    try:
+        items = recurrence.expand('yearly', datetime.date(2101, 1, 1), datetime.date(2103, 12, 31), month=1, day=1)
+        assert [item.date for item in items] == [datetime.date(*lunar_to_solar(y, 1, 1)) for y in (2101, 2102, 2103)]
+    finally:
+        recurrence._year_months.cache_clear()
+
+
+def test_thousands_of_occurrences_in_one_call():
+    first, last = datetime.date(2021, 1, 1), datetime.date(2100, 12, 31)
+    recurrence.expand_columns('monthly', first, last, day=1)
+    start = time.perf_counter()
+    columns = recurrence.expand_columns('monthly', first, last, day=1)
+    assert time.perf_counter() - start < 0.01
+    assert len(columns.ordinal) > 980
+
+
+def test_recurrence_api():
+    client = app.app.test_client()
+    response = client.get('/api/recurrence?rule=yearly&month=8&day=15&from=2021-01-01&to=2100-12-31')
+    assert response.status_code == 200 and response.headers['ETag']
+    occurrences = response.get_json()['occurrences']
+    assert len(occurrences) == 80
+    assert occurrences[4] == {'date': '2025-10-06', 'lunar_year': 2025, 'lunar_month': 8, 'lunar_day': 15,
+                              'lunar_leap': False}
+
+    response = client.get('/api/recurrence?rule=monthly&day=30&missing=skip&from=2025-01-01&to=2025-12-31')
+    assert all(item['lunar_day'] == 30 for item in response.get_json()['occurrences'])
+    assert client.get('/api/recurrence?rule=monthly&from=1900-01-01&to=2200-01-01').status_code == 400
+    assert client.get('/api/recurrence?rule=yearly&day=1').status_code == 400
+    assert client.get('/api/recurrence?rule=monthly&day=x').status_code == 400
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for shared_tables and serve - memory-mapped table file and pre-fork server
+"""
+
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'calendar_app'))
+
+import datetime
+import json
+import shutil
+import subprocess
+import urllib.request
+import pytest
+import holidays
+import holiday_index
+import lunar_calendar
+import serve
+import shared_tables
+import solar_terms
+from month_grid import build_month_grid
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'calendar_app')
+
+
+@pytest.fixture
+def table_file(tmp_path, monkeypatch):
+    """Build a table file; module tables are restored after the test"""
+    path = str(tmp_path / 'tables.bin')
+    shared_tables.build_table_file(path)
+    for module, names in ((lunar_calendar, ['_' + name for name in lunar_calendar.TABLE_NAMES]),
+                          (solar_terms, ['_day_terms', '_table_years']),
+                          (holiday_index, ['_index']),
+                          (shared_tables, ['_mapped'])):
+        for name in names:
+            monkeypatch.setattr(module, name, getattr(module, name))
+    return path
+
+
+def test_mapped_tables_match_built_tables(table_file):
+    months = [(1900, 1), (2023, 4), (2025, 7), (2026, 2), (2100, 12)]
+    expected = [build_month_grid(year, month) for year, month in months]
+    expected_range = lunar_calendar.solar_to_lunar_range(datetime.date(2020, 1, 1), datetime.date(2020, 12, 31))
+
+    header = shared_tables.map_table_file(table_file)
+    assert isinstance(lunar_calendar._lunar_days, memoryview)
+    assert holiday_index.get_index().version == header['holiday_version']
+    assert [build_month_grid(year, month) for year, month in months] == expected
+    columns = lunar_calendar.solar_to_lunar_range(datetime.date(2020, 1, 1), datetime.date(2020, 12, 31))
+    assert [list(column) for column in columns] == [list(column) for column in expected_range]
+    assert lunar_calendar.lunar_to_solar(2025, 6, 1, True) == (2025, 7, 25)
+    assert solar_terms.get_solar_term(2026, 2, 4) == "Spring Begins"
+    assert shared_tables.mapped_table_info()['version'] == header['version']
+
+
+def test_stale_holiday_section_is_rebuilt(table_file, monkeypatch):
+    monkeypatch.setattr(holidays, 'HOLIDAY_DATA_VERSION', 'changed')
+    assert not shared_tables.is_current(table_file)
+    shared_tables.map_table_file(table_file)
+    assert holiday_index.get_index().version == 'changed'
+
+
+def test_changed_table_sources_need_a_rebuild(table_file, tmp_path, monkeypatch):
+    assert shared_tables.is_current(table_file)
+    for module in (lunar_calendar, solar_terms):
+        path = str(tmp_path / os.path.basename(module.DATA_FILE))
+        shutil.copy(module.DATA_FILE, path)
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write('\n')
+        with monkeypatch.context() as patch:
+            patch.setattr(module, 'DATA_FILE', path)
+            assert not shared_tables.is_current(table_file)
+            shared_tables.build_table_file(table_file)
+            assert shared_tables.is_current(table_file)
+        assert not shared_tables.is_current(table_file)
+        shared_tables.build_table_file(table_file)
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / 'other.bin'
+    path.write_bytes(b'not a table file')
+    with pytest.raises(ValueError):
+        shared_tables.map_table_file(str(path))
+    assert not shared_tables.is_current(str(path))
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason="pre-fork serving needs os.fork")
+def test_prefork_server_reports_mapped_table(tmp_path):
+    path = str(tmp_path / 'tables.bin')
+    server = subprocess.Popen([sys.executable, 'serve.py', '--workers', '2', '--host', '127.0.0.1',
+                               '--port', '0', '--table-file', path],
+                              cwd=APP_DIR, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    try:
+        line = server.stdout.readline()
+        while line and not line.startswith('Listening'):
+            line = server.stdout.readline()
+        url = line.split()[2]
+        version = shared_tables.read_header(path)['version']
+        with urllib.request.urlopen(url + '/ready', timeout=10) as response:
+            info = json.loads(response.read())
+        assert info['mapped'] and info['table_version'] == version
+        with urllib.request.urlopen(url + '/api/calendar/2026/2', timeout=10) as response:
+            assert json.loads(response.read())['days'][3][1]['lunar_holiday'] == 'Spring Festival'
+    finally:
+        server.terminate()
+        assert server.wait(timeout=10) == 0
+
+
+def test_restart_delay_grows_with_early_exits():
+    assert serve.restart_delay(0) == 0
+    delays = [serve.restart_delay(n) for n in range(1, serve.MAX_EARLY_EXITS)]
+    assert delays[0] == serve.RESTART_DELAY and delays == sorted(delays)
+    assert delays[-1] == serve.MAX_RESTART_DELAY
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for solar_terms - precomputed table must match the ephem computation
+"""
+
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'calendar_app'))
+
+import datetime
+import solar_terms
+from solar_terms import get_solar_term, get_solar_terms, compute_year, load_table
+
+
+def test_table_covers_1900_to_2100():
+    table = load_table()
+    assert sorted(table) == list(range(1900, 2101))
+    assert all(len(dates) == 24 for dates in table.values())
+
+
+def test_table_matches_ephem_for_sample_years():
+    table = load_table()
+    for year in (1900, 1950, 2000, 2026, 2100):
+        assert table[year] == compute_year(year), year
+
+
+def test_get_solar_term():
+    assert get_solar_term(2026, 2, 4) == "Spring Begins"
+    assert get_solar_term(2026, 12, 22) == "Winter Solstice"
+    assert get_solar_term(2026, 2, 5) == ""
+
+
+def test_years_outside_table_are_computed_and_memoized(tmp_path, monkeypatch):
+    monkeypatch.setattr(solar_terms, 'CACHE_FILE', str(tmp_path / 'terms.csv'))
+    solar_terms._computed_year.cache_clear()
+    terms = get_solar_terms(1850)
+    assert len(terms) == 24
+    assert terms[0][0].year == 1850
+    assert [date for date, _ in terms] == sorted(date for date, _ in terms)
+    assert solar_terms._computed_year.cache_info().currsize >= 1
+    assert get_solar_term(1850, terms[0][0].month, terms[0][0].day) == terms[0][1]
+
+    # Later processes read the year back from the cache file
+    solar_terms._computed_year.cache_clear()
+    monkeypatch.setattr(solar_terms, 'compute_year', None)
+    assert get_solar_terms(1850) == terms
+
+
+def test_build_table_round_trips(tmp_path):
+    path = str(tmp_path / 'terms.csv')
+    solar_terms.build_table(2026, 2027, path)
+    table = load_table(path)
+    assert table[2026][0] == datetime.date(2026, 2, 4)
+    assert table[2027] == compute_year(2027)
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for workdays - cumulative working day engine against a day-by-day count
+"""
+
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'calendar_app'))
+
+import datetime
+import random
+import pytest
+from holidays import get_gregorian_holiday, get_adjusted_workday
+from workdays import is_workday, workdays_between, add_workdays
+
+
+def _is_workday(date):
+    if get_adjusted_workday(date.month, date.day, date.year):
+        return True
+    return date.weekday() < 5 and not get_gregorian_holiday(date.month, date.day, date.year)
+
+
+def test_make_up_workdays_and_holidays():
+    assert is_workday(datetime.date(2026, 2, 14))       # Saturday make-up day
+    assert not is_workday(datetime.date(2026, 2, 16))   # Spring Festival Monday
+    assert not is_workday(datetime.date(2030, 1, 5))    # Plain Saturday
+    assert is_workday(datetime.date(2030, 10, 1))       # No schedule announced for 2030
+
+
+def test_queries_match_day_by_day_iteration():
+    rng = random.Random(0)
+    first = datetime.date(2022, 6, 1)
+    one_day = datetime.timedelta(days=1)
+    for _ in range(300):
+        start = first + datetime.timedelta(days=rng.randint(0, 1700))
+        end = first + datetime.timedelta(days=rng.randint(0, 1700))
+        lo, hi = min(start, end), max(start, end)
+        count = sum(_is_workday(lo + one_day * i) for i in range((hi - lo).days))
+        assert workdays_between(start, end) == (count if end >= start else -count)
+
+        n = rng.randint(-40, 40)
+        date, remaining = start, abs(n)
+        while remaining:
+            date += one_day if n > 0 else -one_day
+            remaining -= _is_workday(date)
+        assert add_workdays(start, n) == date
+
+
+def test_range_limits():
+    assert add_workdays(datetime.date(2026, 5, 1), 0) == datetime.date(2026, 5, 1)
+    with pytest.raises(ValueError):
+        workdays_between(datetime.date(1899, 12, 31), datetime.date(1900, 1, 2))
+    with pytest.raises(ValueError):
+        add_workdays(datetime.date(2100, 12, 30), 5)